@@ -0,0 +1,210 @@
+"""
+Host model cascade.
+
+The v2 and v3 hosts answer yes/no questions about a topic they know, which a small, fast model gets right most of the time.
+A cascading host asks the small model first, and only escalates to the large model when the small model's answer is
+- low confidence: `HostResponse.confidence` below the threshold or missing, or
+- contested: with `consistency_samples > 1`, the small model is sampled several times in parallel and the samples disagree.
+
+To measure what the cascade costs in answer quality, a fraction (`audit_rate`) of the answers the small model kept are
+also sent to the large model in the background, and the agreement is counted. Audits run outside the game: they are not
+passed its config, so their tokens are not counted as the game's and the game's deadline does not apply to them. Escalated answers come from the large model,
+so together they estimate how often the cascade agrees with a large-model-only host.
+The evaluator reports hit rate, latency and agreement in `EvaluationMetrics.cascade`.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Literal, Optional
+
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from agents.resilience import guarded_structured_output
+
+# runs the audit calls, so they do not add to the game's latency
+_audit_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cascade-audit")
+
+
+class CascadeStats(BaseModel):
+    calls: int = 0
+    escalations: int = 0  # calls answered by the large model
+    low_confidence: int = 0
+    contested: int = 0
+    audits: int = 0  # small model answers also checked against the large model
+    audit_agreements: int = 0
+    seconds: float = 0.0  # total latency of cascade calls
+    large_calls: int = 0  # escalations and audits
+    large_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of calls answered by the small model."""
+        return 1 - self.escalations / self.calls if self.calls else 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.seconds / self.calls if self.calls else 0.0
+
+    @property
+    def avg_large_latency(self) -> float:
+        """Average latency of the large model, what every call would take without the cascade."""
+        return self.large_seconds / self.large_calls if self.large_calls else 0.0
+
+    @property
+    def agreement_rate(self) -> Optional[float]:
+        """Estimated fraction of answers that match a large-model-only host, None without audits."""
+        if not self.calls or not self.audits:
+            return None
+        kept = self.calls - self.escalations
+        return (self.escalations + kept * self.audit_agreements / self.audits) / self.calls
+
+    def since(self, earlier: "CascadeStats") -> "CascadeStats":
+        """Counts accumulated since `earlier`."""
+        return CascadeStats(
+            **{
+                name: getattr(self, name) - getattr(earlier, name)
+                for name in CascadeStats.model_fields
+            }
+        )
+
+
+class HostCascade:
+    """
+    Answers with a small host runnable, escalating uncertain answers to a large one.
+    Both runnables take the host's prompt inputs and return a `HostResponse` with a confidence.
+    Args:
+        small: Host runnable on the small model.
+        large: Host runnable on the large model.
+        threshold: Answers with a lower confidence are escalated.
+        consistency_samples: Samples of the small model per call, answers are contested if they disagree.
+        audit_rate: Fraction of kept answers checked against the large model in the background.
+        name: Name the stats are reported under.
+        seed: Seed for choosing the audited answers.
+    """
+
+    def __init__(
+        self,
+        small: Runnable,
+        large: Runnable,
+        threshold: float = 0.8,
+        consistency_samples: int = 1,
+        audit_rate: float = 0.0,
+        name: str = "host",
+        seed: Optional[int] = None,
+    ):
+        self.small = small
+        self.large = large
+        self.threshold = threshold
+        self.consistency_samples = consistency_samples
+        self.audit_rate = audit_rate
+        self.name = name
+        self._random = random.Random(seed)
+        self._stats = CascadeStats()
+        self._lock = threading.Lock()
+
+    def stats(self) -> CascadeStats:
+        with self._lock:
+            return self._stats.model_copy()
+
+    def _add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self._stats, name, getattr(self._stats, name) + value)
+
+    def _invoke_large(self, input: Dict[str, Any], config) -> Any:
+        start = time.perf_counter()
+        response = self.large.invoke(input, config)
+        self._add(large_calls=1, large_seconds=time.perf_counter() - start)
+        return response
+
+    def _audit(self, input: Dict[str, Any], kept: Any):
+        # audits are not passed the game's config, so they do not count towards the game's tokens or deadline,
+        # and do not report to the callbacks of a game that may be over by the time they finish
+        try:
+            response = self._invoke_large(input, None)
+        except Exception:
+            return
+        self._add(audits=1, audit_agreements=int(response.response == kept.response))
+
+    def invoke(self, input: Dict[str, Any], config=None) -> Any:
+        start = time.perf_counter()
+        if self.consistency_samples > 1:
+            samples = self.small.batch([input] * self.consistency_samples, config)
+        else:
+            samples = [self.small.invoke(input, config)]
+        response = samples[0]
+        contested = len({sample.response for sample in samples}) > 1
+        # a model that did not report its confidence is not trusted to be sure
+        low_confidence = any(
+            sample.confidence is None or sample.confidence < self.threshold for sample in samples
+        )
+
+        if contested or low_confidence:
+            response = self._invoke_large(input, config)
+            self._add(escalations=1, contested=int(contested), low_confidence=int(low_confidence))
+        elif self.audit_rate and self._random.random() < self.audit_rate:
+            _audit_executor.submit(self._audit, input, response)
+        self._add(calls=1, seconds=time.perf_counter() - start)
+        return response
+
+    def as_runnable(self) -> Runnable:
+        return RunnableLambda(self.invoke, name=f"cascade_{self.name}")
+
+
+_cascades: Dict[str, HostCascade] = {}
+_cascades_lock = threading.Lock()
+
+
+def register_cascade(cascade: HostCascade) -> Runnable:
+    """Register a cascade so its stats are reported by `cascade_stats`, returns its runnable."""
+    with _cascades_lock:
+        _cascades[cascade.name] = cascade
+    return cascade.as_runnable()
+
+
+def cascade_stats() -> Dict[str, CascadeStats]:
+    """Stats of every registered cascade."""
+    with _cascades_lock:
+        cascades = list(_cascades.values())
+    return {cascade.name: cascade.stats() for cascade in cascades}
+
+
+def get_cascading_host_llm(
+    version: Literal["v2", "v3"],
+    small_llm: Any,
+    large_llm: Any,
+    threshold: float = 0.8,
+    consistency_samples: int = 1,
+    audit_rate: float = 0.05,
+) -> Runnable:
+    """
+    Host runnable for the v2 or v3 graph that answers with `small_llm` and escalates to `large_llm`.
+    Args:
+        version: Agent version whose host prompt and response model are used.
+        small_llm: Small, fast chat model that answers first.
+        large_llm: Large chat model for uncertain answers.
+        threshold: Answers with a lower confidence are escalated.
+        consistency_samples: Samples of the small model per call, answers are contested if they disagree.
+        audit_rate: Fraction of kept answers checked against the large model in the background.
+    Returns:
+        The cascading host runnable.
+    """
+    if version == "v2":
+        from agents.v2.models import HostResponse
+        from agents.v2.prompts import HOST_PROMPT_v1 as HOST_PROMPT
+    else:
+        from agents.v3.models import HostResponse
+        from agents.v3.prompts import HOST_PROMPT
+
+    cascade = HostCascade(
+        HOST_PROMPT | guarded_structured_output(small_llm, HostResponse),
+        HOST_PROMPT | guarded_structured_output(large_llm, HostResponse),
+        threshold=threshold,
+        consistency_samples=consistency_samples,
+        audit_rate=audit_rate,
+        name=f"{version}_host",
+    )
+    return register_cascade(cascade)
@@ -0,0 +1,280 @@
+"""
+Host vote ensemble.
+
+A host at temperature 1 sometimes answers the same question differently, and one wrong answer can derail the guesser.
+A host ensemble sends the question to k host runnables at once (one model with different seeds, or several cheap models)
+and answers with the majority `YesNoResponse`. The calls run concurrently, and with `early_stop` the answer is returned
+as soon as one response has a majority of the k votes, so an ensemble answer takes about as long as a single call
+rather than k of them. Calls still running after an early stop finish in the background and are only counted in the stats:
+every member reports to the game's callbacks through a gate that is closed once the member is late, so a late call's
+tokens are not added to a game that no longer waits for it.
+
+The evaluator reports each ensemble's answer stability (the share of votes that agree with the answer it gave) and its
+cost multiplier (member calls per answer) in `EvaluationMetrics.ensemble`.
+"""
+
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.callbacks.manager import handle_event
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from agents.resilience import guarded_structured_output
+
+# runs the member calls of every ensemble, sized for the evaluator's 32 concurrent games with a few members each,
+# so that members do not queue behind each other
+_ensemble_executor = ThreadPoolExecutor(max_workers=128, thread_name_prefix="host-ensemble")
+
+
+class EnsembleStats(BaseModel):
+    answers: int = 0
+    member_calls: int = 0
+    member_errors: int = 0
+    votes: int = 0  # member answers, including those that arrived after an early stop
+    majority_votes: int = 0  # votes that agree with the ensemble's answer
+    unanimous: int = 0  # answers every member agreed with
+    early_stops: int = 0
+    late_calls: int = 0  # member calls still running at an early stop, reported to the stats only
+    seconds: float = 0.0  # total latency of ensemble answers
+    member_seconds: float = 0.0  # total latency of member calls
+
+    @property
+    def stability(self) -> float:
+        """Share of member votes that agree with the ensemble's answer."""
+        return self.majority_votes / self.votes if self.votes else 0.0
+
+    @property
+    def cost_multiplier(self) -> float:
+        """Member calls per answer, what the ensemble costs relative to a single host."""
+        return self.member_calls / self.answers if self.answers else 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.seconds / self.answers if self.answers else 0.0
+
+    @property
+    def avg_member_latency(self) -> float:
+        """Average latency of a single member call, what every answer would take without the ensemble."""
+        calls = self.votes + self.member_errors
+        return self.member_seconds / calls if calls else 0.0
+
+    def since(self, earlier: "EnsembleStats") -> "EnsembleStats":
+        """Counts accumulated since `earlier`."""
+        return EnsembleStats(
+            **{
+                name: getattr(self, name) - getattr(earlier, name)
+                for name in EnsembleStats.model_fields
+            }
+        )
+
+
+# the handler flag that skips each callback event
+_IGNORE_CONDITIONS = {
+    "on_llm_start": "ignore_llm",
+    "on_llm_new_token": "ignore_llm",
+    "on_llm_end": "ignore_llm",
+    "on_llm_error": "ignore_llm",
+    "on_chat_model_start": "ignore_chat_model",
+    "on_chain_start": "ignore_chain",
+    "on_chain_end": "ignore_chain",
+    "on_chain_error": "ignore_chain",
+    "on_tool_start": "ignore_agent",
+    "on_tool_end": "ignore_agent",
+    "on_tool_error": "ignore_agent",
+    "on_agent_action": "ignore_agent",
+    "on_agent_finish": "ignore_agent",
+    "on_retriever_start": "ignore_retriever",
+    "on_retriever_end": "ignore_retriever",
+    "on_retriever_error": "ignore_retriever",
+    "on_retry": "ignore_retry",
+    "on_custom_event": "ignore_custom_event",
+    "on_text": None,
+}
+
+
+class _CallbackGate(BaseCallbackHandler):
+    """Forwards a member call's callback events to the game's handlers until it is closed."""
+
+    def __init__(self, handlers: List[BaseCallbackHandler]):
+        self.handlers = handlers
+        self.open = True
+
+
+def _forward(event_name: str, ignore_condition: Optional[str]):
+    def forward(self: _CallbackGate, *args, **kwargs):
+        if self.open:
+            handle_event(self.handlers, event_name, ignore_condition, *args, **kwargs)
+
+    return forward
+
+
+for _event_name, _ignore_condition in _IGNORE_CONDITIONS.items():
+    setattr(_CallbackGate, _event_name, _forward(_event_name, _ignore_condition))
+
+
+def _gated(config) -> Tuple[Any, Optional[_CallbackGate]]:
+    """A member's config, whose callbacks go through a gate, and the gate (None if the game has no callbacks)."""
+    callbacks = (config or {}).get("callbacks")
+    handlers = list(getattr(callbacks, "handlers", callbacks) or [])
+    if not handlers:
+        return config, None
+    gate = _CallbackGate(handlers)
+    return {**config, "callbacks": [gate]}, gate
+
+
+class HostEnsemble:
+    """
+    Answers with the majority vote of several host runnables called concurrently.
+    Every member takes the host's prompt inputs and returns a `HostResponse`.
+    Args:
+        members: Host runnables that vote, an odd number avoids ties.
+        early_stop: Whether to answer as soon as one response has a majority of the votes.
+        name: Name the stats are reported under.
+    """
+
+    def __init__(self, members: List[Runnable], early_stop: bool = True, name: str = "host"):
+        if not members:
+            raise ValueError("A host ensemble needs at least one member")
+        self.members = members
+        self.early_stop = early_stop
+        self.name = name
+        self._stats = EnsembleStats()
+        self._lock = threading.Lock()
+
+    def stats(self) -> EnsembleStats:
+        with self._lock:
+            return self._stats.model_copy()
+
+    def _add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self._stats, name, getattr(self._stats, name) + value)
+
+    def _call(self, member: Runnable, input: Dict[str, Any], config) -> Any:
+        start = time.perf_counter()
+        try:
+            return member.invoke(input, config)
+        finally:
+            self._add(member_seconds=time.perf_counter() - start)
+
+    def _count_late_vote(self, future: Future, answer: Any, tally: Dict[str, int]):
+        # a call that finished after an early stop was paid for, so its vote counts towards the stability
+        if future.exception() is not None:
+            agrees, counts = False, {"member_errors": 1}
+        else:
+            agrees = future.result().response == answer
+            counts = {"votes": 1, "majority_votes": int(agrees)}
+        with self._lock:
+            tally["pending"] -= 1
+            tally["agree"] += agrees
+            # whether every member agreed is only known once the last one has answered
+            if tally["pending"] == 0 and tally["agree"] == len(self.members):
+                counts["unanimous"] = 1
+        self._add(**counts)
+
+    def invoke(self, input: Dict[str, Any], config=None) -> Any:
+        start = time.perf_counter()
+        majority = len(self.members) // 2 + 1
+        gates: Dict[Future, Optional[_CallbackGate]] = {}
+        for member in self.members:
+            member_config, gate = _gated(config)
+            gates[_ensemble_executor.submit(self._call, member, input, member_config)] = gate
+        pending = set(gates)
+        votes: Counter = Counter()
+        first: Dict[Any, Any] = {}  # first response with each answer
+        errors: List[Exception] = []
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                    continue
+                response = future.result()
+                votes[response.response] += 1
+                first.setdefault(response.response, response)
+            if self.early_stop and votes and votes.most_common(1)[0][1] >= majority:
+                break
+
+        if not votes:
+            self._add(member_calls=len(self.members), member_errors=len(errors))
+            raise errors[-1]
+        # most_common keeps insertion order between ties, so a tie goes to the answer that arrived first
+        answer, count = votes.most_common(1)[0]
+
+        late = [future for future in pending if not future.cancel()]
+        for future in late:
+            # the game no longer waits for this call, so it does not report to the game's callbacks
+            if gates[future] is not None:
+                gates[future].open = False
+        tally = {"pending": len(late), "agree": count}
+        self._add(
+            answers=1,
+            member_calls=len(self.members) - len(pending) + len(late),
+            member_errors=len(errors),
+            votes=sum(votes.values()),
+            majority_votes=count,
+            unanimous=int(count == len(self.members)),
+            early_stops=int(bool(pending)),
+            late_calls=len(late),
+            seconds=time.perf_counter() - start,
+        )
+        for future in late:
+            future.add_done_callback(lambda future: self._count_late_vote(future, answer, tally))
+        return first[answer]
+
+    def as_runnable(self) -> Runnable:
+        return RunnableLambda(self.invoke, name=f"ensemble_{self.name}")
+
+
+_ensembles: Dict[str, HostEnsemble] = {}
+_ensembles_lock = threading.Lock()
+
+
+def register_ensemble(ensemble: HostEnsemble) -> Runnable:
+    """Register an ensemble so its stats are reported by `ensemble_stats`, returns its runnable."""
+    with _ensembles_lock:
+        _ensembles[ensemble.name] = ensemble
+    return ensemble.as_runnable()
+
+
+def ensemble_stats() -> Dict[str, EnsembleStats]:
+    """Stats of every registered ensemble."""
+    with _ensembles_lock:
+        ensembles = list(_ensembles.values())
+    return {ensemble.name: ensemble.stats() for ensemble in ensembles}
+
+
+def get_host_ensemble_llm(
+    version: Literal["v2", "v3"],
+    llms: List[Any],
+    early_stop: bool = True,
+) -> Runnable:
+    """
+    Host runnable for the v2 or v3 graph that answers with the majority vote of `llms`.
+    Args:
+        version: Agent version whose host prompt and response model are used.
+        llms: Chat models that vote, e.g. one model with different seeds
+            (`[get_chat_model("gpt-4o-mini", temperature=1, seed=i) for i in range(3)]`) or several cheap models.
+        early_stop: Whether to answer as soon as one response has a majority of the votes.
+    Returns:
+        The ensemble host runnable.
+    """
+    if version == "v2":
+        from agents.v2.models import HostResponse
+        from agents.v2.prompts import HOST_PROMPT_v1 as HOST_PROMPT
+    else:
+        from agents.v3.models import HostResponse
+        from agents.v3.prompts import HOST_PROMPT
+
+    ensemble = HostEnsemble(
+        [HOST_PROMPT | guarded_structured_output(llm, HostResponse) for llm in llms],
+        early_stop=early_stop,
+        name=f"{version}_host",
+    )
+    return register_ensemble(ensemble)
@@ -0,0 +1,122 @@
+"""
+Direct-loop game executor.
+
+Every agent version has the same topology: START -> host <-> guesser -> END, with `should_continue` deciding after the host.
+`GameExecutor` runs the version's node functions in a plain loop instead of through `CompiledStateGraph`,
+merging each update into one state dict in place. It streams the same `{node: update}` events as `graph.stream`,
+so it can stand in for the graph wherever games are run in bulk (see `TwentyQuestionsEvaluator(executor="loop")`).
+"""
+
+import uuid
+from typing import Any, Dict, Iterator, Literal, Optional
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables.config import RunnableConfig, var_child_runnable_config
+from langgraph.errors import GraphRecursionError
+from langgraph.graph import END
+
+from agents.resilience import check_deadline, get_deadline
+from agents.v1.nodes import guesser_node_v1, host_node_v1
+from agents.v1.nodes import should_continue as should_continue_v1
+from agents.v2.nodes import guesser_node as guesser_node_v2
+from agents.v2.nodes import host_node as host_node_v2
+from agents.v2.nodes import should_continue as should_continue_v2
+from agents.v3.nodes import guesser_node as guesser_node_v3
+from agents.v3.nodes import host_node as host_node_v3
+from agents.v3.nodes import should_continue as should_continue_v3
+
+NODES = {
+    "v1": (host_node_v1, guesser_node_v1, should_continue_v1),
+    "v2": (host_node_v2, guesser_node_v2, should_continue_v2),
+    "v3": (host_node_v3, guesser_node_v3, should_continue_v3),
+}
+
+# same default as langgraph
+DEFAULT_RECURSION_LIMIT = 25
+
+
+def apply_update(state: Dict[str, Any], update: Dict[str, Any]):
+    """
+    Merge a node's update into the state in place.
+    Messages are appended like the graph's `add_messages` reducer, including giving them ids.
+    The nodes only ever add new messages, so replacing messages by id is not needed.
+    """
+    for key, value in update.items():
+        if key == "messages":
+            messages = state.setdefault("messages", [])
+            for message in value:
+                if isinstance(message, BaseMessage) and message.id is None:
+                    message.id = str(uuid.uuid4())
+                messages.append(message)
+        else:
+            state[key] = value
+
+
+class GameExecutor:
+    """
+    Runs the host and guesser nodes of an agent version in a loop.
+    Args:
+        version: Agent version whose nodes are run.
+    """
+
+    def __init__(self, version: Literal["v1", "v2", "v3"]):
+        self.host_node, self.guesser_node, self.should_continue = NODES[version]
+
+    def _run_node(self, node, state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+        # like the graph, make the config the parent of runnables invoked inside the node,
+        # so callbacks passed in the config see the LLM calls
+        token = var_child_runnable_config.set(config)
+        try:
+            return node(state, config)
+        finally:
+            var_child_runnable_config.reset(token)
+
+    def _play(
+        self, state: Dict[str, Any], config: RunnableConfig
+    ) -> Iterator[Dict[str, Dict[str, Any]]]:
+        recursion_limit = config.get("recursion_limit", DEFAULT_RECURSION_LIMIT)
+        deadline = get_deadline(config)
+        node_name, node = "host", self.host_node
+        # langgraph counts reading the input as the first step
+        for _ in range(recursion_limit - 1):
+            check_deadline(deadline)
+            update = self._run_node(node, state, config)
+            apply_update(state, update)
+            yield {node_name: update}
+
+            if node_name == "guesser":
+                node_name, node = "host", self.host_node
+            elif self.should_continue(state) == END:
+                return
+            else:
+                node_name, node = "guesser", self.guesser_node
+
+        raise GraphRecursionError(
+            f"Recursion limit of {recursion_limit} reached without hitting a stop condition."
+        )
+
+    def stream(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None
+    ) -> Iterator[Dict[str, Dict[str, Any]]]:
+        """
+        Play a game, yielding `{node: update}` after every node like `graph.stream`.
+        Args:
+            input: Initial state, e.g. {"question_count": 0, "messages": []}.
+            config: Runtime configuration, the same as for the graph.
+        Raises:
+            GraphRecursionError: If the game takes more than `config["recursion_limit"]` steps.
+            GameTimeoutError: If the game runs past `game_deadline` in the configurable.
+        """
+        state: Dict[str, Any] = {}
+        apply_update(state, input)
+        yield from self._play(state, config or {})
+
+    def invoke(
+        self, input: Dict[str, Any], config: Optional[RunnableConfig] = None
+    ) -> Dict[str, Any]:
+        """Play a game and return the final state, like `graph.invoke`."""
+        state: Dict[str, Any] = {}
+        apply_update(state, input)
+        for _ in self._play(state, config or {}):
+            pass
+        return state
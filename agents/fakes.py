@@ -0,0 +1,230 @@
+"""
+Fake LLMs for load tests, benchmarks and parity tests.
+
+The fakes keep the real prompts in front of them, so prompt rendering and runnable dispatch are exercised exactly as in a real game - only the model call is replaced.
+The guesser works through a fixed list of guesses, one per turn, so a game ends as soon as the host's topic comes up.
+"""
+
+import re
+import time
+from typing import Any, Dict, List, Literal
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import RunnableLambda
+
+DEFAULT_GUESSES = [
+    "apple",
+    "banana",
+    "cherry",
+    "dog",
+    "cat",
+    "car",
+    "house",
+    "tree",
+    "flower",
+    "book",
+]
+
+_TOPIC_PATTERN = re.compile(r"topic '([^']*)'")
+
+
+def _turn(prompt: PromptValue) -> int:
+    """Number of questions the guesser has asked so far."""
+    return sum(isinstance(m, AIMessage) for m in prompt.to_messages())
+
+
+class TokenCountingChatModel(BaseChatModel):
+    """
+    Chat model that answers with an empty message and reports the prompt's size as its usage,
+    at about 4 characters per token, so token accounting can be measured without a provider.
+    """
+
+    @property
+    def _llm_type(self) -> str:
+        return "token-counting-fake"
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        usage = {"input_tokens": input_tokens, "output_tokens": 0, "total_tokens": input_tokens}
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="", usage_metadata=usage))])
+
+
+_token_counter = TokenCountingChatModel()
+
+
+def _fake(prompt, respond, latency: float, count_tokens: bool = False):
+    def call(prompt_value: PromptValue):
+        if count_tokens:
+            _token_counter.invoke(prompt_value)
+        if latency:
+            time.sleep(latency)
+        return respond(prompt_value)
+
+    return prompt | RunnableLambda(call, name="fake_llm")
+
+
+def get_fake_configurable(
+    version: Literal["v1", "v2", "v3"],
+    guesses: List[str] = DEFAULT_GUESSES,
+    latency: float = 0.0,
+    count_tokens: bool = False,
+) -> Dict[str, Any]:
+    """
+    Fake LLM runnables for a game, keyed like the graph's `configurable`.
+    Args:
+        version: Agent version the runnables are for.
+        guesses: Guesses the guesser makes, one per turn, cycling when exhausted.
+        latency: Seconds every fake call sleeps, to simulate the model.
+        count_tokens: Whether every fake call also reports the prompt's size in tokens, see `TokenCountingChatModel`.
+    Returns:
+        The runnables for the version's host and guesser roles.
+    """
+
+    def guess(prompt_value: PromptValue) -> str:
+        return guesses[_turn(prompt_value) % len(guesses)]
+
+    def is_topic(prompt_value: PromptValue) -> bool:
+        messages = prompt_value.to_messages()
+        topic = _TOPIC_PATTERN.search(messages[0].content).group(1)
+        return topic in messages[-1].content
+
+    if version == "v1":
+        from agents.v1.models import GuesserQuestion, HostResponse_v3, YesNoResponse
+        from agents.v1.prompts import GUESSER_PROMPT_v2, HOST_PROMPT_v3
+
+        return {
+            "host_llm": _fake(
+                HOST_PROMPT_v3,
+                lambda p: HostResponse_v3(
+                    response=YesNoResponse.YES if is_topic(p) else YesNoResponse.NO,
+                    correct_guess=is_topic(p),
+                    analysis="",
+                ),
+                latency,
+                count_tokens,
+            ),
+            "guesser_llm": _fake(
+                GUESSER_PROMPT_v2,
+                lambda p: GuesserQuestion(question=f"Is it a {guess(p)}?"),
+                latency,
+                count_tokens,
+            ),
+        }
+    if version == "v2":
+        from agents.v2.models import (
+            FusedGuesserOutput,
+            GuessOrQuestion,
+            HostResponse,
+            PossibleGuesses,
+            YesNoResponse,
+        )
+        from agents.v2.prompts import (
+            GUESSER_EVALUATOR_PROMPT_v2,
+            GUESSER_FUSED_PROMPT,
+            GUESSER_RECOMMENDER_PROMPT_v1,
+            HOST_PROMPT_v1,
+        )
+
+        return {
+            "host_llm": _fake(
+                HOST_PROMPT_v1,
+                lambda p: HostResponse(response=YesNoResponse.NO),
+                latency,
+                count_tokens,
+            ),
+            "guesser_recommender_llm": _fake(
+                GUESSER_RECOMMENDER_PROMPT_v1,
+                lambda p: PossibleGuesses(
+                    guesses=guesses[:5], questions=["Is it alive?"]
+                ),
+                latency,
+                count_tokens,
+            ),
+            "guesser_evaluator_llm": _fake(
+                GUESSER_EVALUATOR_PROMPT_v2,
+                lambda p: GuessOrQuestion(
+                    choice="guess", guess=guess(p), question=None, analysis=None
+                ),
+                latency,
+                count_tokens,
+            ),
+            # used with guesser_mode="fused"
+            "guesser_fused_llm": _fake(
+                GUESSER_FUSED_PROMPT,
+                lambda p: FusedGuesserOutput(
+                    guesses=guesses[:5],
+                    questions=["Is it alive?"],
+                    choice="guess",
+                    guess=guess(p),
+                    question=None,
+                ),
+                latency,
+                count_tokens,
+            ),
+        }
+
+    from agents.v3.models import (
+        CandidateDelta,
+        HostResponse,
+        QuestionEvaluation,
+        QuestionGenerator,
+        RecommenderDecision,
+        YesNoResponse,
+    )
+    from agents.v3.prompts import (
+        EVALUATOR_PROMPT,
+        HOST_PROMPT,
+        INCREMENTAL_RECOMMENDER_PROMPT,
+        QUESTION_GENERATOR_PROMPT,
+        RECOMMENDER_PROMPT,
+    )
+
+    return {
+        "host_llm": _fake(
+            HOST_PROMPT,
+            lambda p: HostResponse(response=YesNoResponse.NO),
+            latency,
+            count_tokens,
+        ),
+        "recommender_llm": _fake(
+            RECOMMENDER_PROMPT,
+            lambda p: RecommenderDecision(
+                decision="question",
+                possible_candidates=guesses[:5],
+                reasoning="",
+            ),
+            latency,
+            count_tokens,
+        ),
+        # used with recommender_mode="incremental", keeps the candidates it started with
+        "incremental_recommender_llm": _fake(
+            INCREMENTAL_RECOMMENDER_PROMPT,
+            lambda p: CandidateDelta(
+                decision="question",
+                additions=guesses[:5],
+                removals=[],
+                reasoning="",
+            ),
+            latency,
+            count_tokens,
+        ),
+        "question_generator_llm": _fake(
+            QUESTION_GENERATOR_PROMPT,
+            lambda p: QuestionGenerator(
+                question=f"Is it a {guess(p)}?",
+                yes_candidates=[guess(p)],
+                no_candidates=[],
+            ),
+            latency,
+            count_tokens,
+        ),
+        "evaluator_llm": _fake(
+            EVALUATOR_PROMPT,
+            lambda p: QuestionEvaluation(is_good_question=True, reasoning=""),
+            latency,
+            count_tokens,
+        ),
+    }
@@ -0,0 +1,221 @@
+"""
+Hedged requests for LLM calls.
+
+A 20 question game is a serial chain of up to 80 LLM calls, so a single slow call on any turn puts the whole game in the tail.
+A hedged runnable sends its call, and if no answer arrived within a tracked percentile of recent latencies (p95 by default),
+sends a duplicate to the same or a fallback model. Whichever answers first wins and the other is cancelled
+(async calls are cancelled, sync calls are abandoned and their result dropped).
+Only the calls in the slowest few percent are duplicated, so the extra call rate stays around 100 - percentile %.
+
+Hedging is opt-in: `get_sample_llms_v2(llm, hedging=True)`. `python -m benchmarks.hedging` reports the p99 improvement.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Dict, Optional, Type
+
+from langchain_core.runnables import Runnable, RunnableLambda
+from langchain_core.runnables.config import ContextThreadPoolExecutor
+from pydantic import BaseModel
+
+from agents.resilience import guarded_structured_output
+
+# runs the sync calls, each hedged call uses at most two threads while in flight
+_executor = ContextThreadPoolExecutor(max_workers=128, thread_name_prefix="hedging")
+
+
+class LatencyTracker:
+    """
+    Rolling percentile of the latencies of the most recent calls.
+    Args:
+        percentile: Percentile after which a call is hedged.
+        window: Number of recent latencies kept.
+        min_samples: Latencies needed before the percentile is used, `initial_delay` is used until then.
+        initial_delay: Seconds to wait before hedging while there are too few samples.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        window: int = 200,
+        min_samples: int = 20,
+        initial_delay: float = 10.0,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def delay(self) -> float:
+        """Seconds to wait for the first call before hedging."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return self.initial_delay
+            latencies = sorted(self._latencies)
+        return latencies[min(int(self.percentile * len(latencies)), len(latencies) - 1)]
+
+
+class HedgingStats(BaseModel):
+    calls: int = 0
+    hedges: int = 0  # duplicate calls sent
+    hedge_wins: int = 0  # hedges that answered first
+
+    @property
+    def extra_call_rate(self) -> float:
+        return self.hedges / self.calls if self.calls else 0.0
+
+    def since(self, earlier: "HedgingStats") -> "HedgingStats":
+        """Counts accumulated since `earlier`."""
+        return HedgingStats(
+            calls=self.calls - earlier.calls,
+            hedges=self.hedges - earlier.hedges,
+            hedge_wins=self.hedge_wins - earlier.hedge_wins,
+        )
+
+
+class Hedger:
+    """
+    Latency tracking and counters of one hedged runnable.
+    Args:
+        name: Name the stats are reported under.
+        tracker: Latency tracker deciding when to hedge.
+    """
+
+    def __init__(self, name: str, tracker: Optional[LatencyTracker] = None):
+        self.name = name
+        self.tracker = tracker or LatencyTracker()
+        self._stats = HedgingStats()
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self._stats, name, getattr(self._stats, name) + 1)
+
+    def stats(self) -> HedgingStats:
+        with self._lock:
+            return self._stats.model_copy()
+
+    def call(self, primary: Runnable, hedge: Runnable, input: Any, config) -> Any:
+        self._count("calls")
+        start = time.perf_counter()
+        # the first call's latency is recorded whenever it finishes, even if it lost,
+        # otherwise the percentile would only ever see the fast calls
+        first = _executor.submit(primary.invoke, input, config)
+        first.add_done_callback(lambda _: self.tracker.record(time.perf_counter() - start))
+        done, _ = wait([first], timeout=self.tracker.delay())
+        if done:
+            return first.result()
+
+        self._count("hedges")
+        second = _executor.submit(hedge.invoke, input, config)
+        pending = {first, second}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # prefer an answer over an error if both finished
+            for future in sorted(done, key=lambda f: f.exception() is not None):
+                if future.exception() is None or not pending:
+                    for other in pending:
+                        other.cancel()
+                    if future is second and future.exception() is None:
+                        self._count("hedge_wins")
+                    return future.result()
+
+    async def acall(self, primary: Runnable, hedge: Runnable, input: Any, config) -> Any:
+        self._count("calls")
+        start = time.perf_counter()
+        first = asyncio.ensure_future(primary.ainvoke(input, config))
+        try:
+            return await asyncio.wait_for(asyncio.shield(first), self.tracker.delay())
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if first.done():
+                self.tracker.record(time.perf_counter() - start)
+
+        self._count("hedges")
+        second = asyncio.ensure_future(hedge.ainvoke(input, config))
+        pending = {first, second}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in sorted(done, key=lambda t: t.exception() is not None):
+                    if task.exception() is None or not pending:
+                        if task is second and task.exception() is None:
+                            self._count("hedge_wins")
+                        return task.result()
+        finally:
+            # the first call took this long, or at least this long if it is being cancelled
+            self.tracker.record(time.perf_counter() - start)
+            for task in pending:
+                task.cancel()
+
+
+_hedgers: Dict[str, Hedger] = {}
+_hedgers_lock = threading.Lock()
+
+
+def get_hedger(name: str) -> Hedger:
+    """The shared hedger of a role, created on first use."""
+    with _hedgers_lock:
+        if name not in _hedgers:
+            _hedgers[name] = Hedger(name)
+        return _hedgers[name]
+
+
+def hedging_stats() -> Dict[str, HedgingStats]:
+    """Hedging counters of every hedged role used so far."""
+    with _hedgers_lock:
+        hedgers = list(_hedgers.values())
+    return {hedger.name: hedger.stats() for hedger in hedgers}
+
+
+def with_hedging(
+    primary: Runnable, hedge: Optional[Runnable] = None, hedger: Optional[Hedger] = None
+) -> Runnable:
+    """
+    Wrap a runnable so slow calls are hedged.
+    Args:
+        primary: Runnable to call.
+        hedge: Runnable the duplicate call is sent to, the primary itself by default.
+        hedger: Latency tracker and counters, a new one by default.
+    Returns:
+        The hedged runnable.
+    """
+    hedge = hedge or primary
+    hedger = hedger or Hedger(primary.get_name())
+
+    def invoke(input, config):
+        return hedger.call(primary, hedge, input, config)
+
+    async def ainvoke(input, config):
+        return await hedger.acall(primary, hedge, input, config)
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=f"hedged_{hedger.name}")
+
+
+def hedged_structured_output(
+    llm: Any, schema: Type[BaseModel], hedge_llm: Any = None
+) -> Runnable:
+    """
+    `guarded_structured_output(llm, schema)`, hedged with the same or a fallback model.
+    Calls with the same schema share one latency tracker, reported under the schema's name.
+    Args:
+        llm: Chat model.
+        schema: Structured output model.
+        hedge_llm: Chat model the duplicate calls are sent to, `llm` by default.
+    Returns:
+        The hedged runnable.
+    """
+    return with_hedging(
+        guarded_structured_output(llm, schema),
+        guarded_structured_output(hedge_llm or llm, schema),
+        get_hedger(schema.__name__),
+    )
@@ -0,0 +1,216 @@
+"""
+Interactive play with token streaming.
+
+The guesser's reasoning and questions are streamed token by token using `astream_events`, so the terminal shows progress while the structured output calls are still running.
+A human can act as the host from the terminal, and every turn reports the time to the first guesser token and the time until the question is ready.
+
+Usage:
+    python -m agents.interactive --version v2 --human-host
+"""
+
+import argparse
+import asyncio
+import getpass
+import sys
+import time
+from typing import List, Literal, Optional, TextIO
+
+from dotenv import load_dotenv
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.config import RunnableConfig
+from langgraph.graph.state import CompiledStateGraph
+from pydantic import BaseModel
+
+from agents.roles import get_configurable
+
+
+class TurnTiming(BaseModel):
+    turn: int
+    time_to_first_token: Optional[float]  # None if the guesser did not stream any tokens
+    time_to_question: float
+    question: str
+
+
+def _read_answer(prompt: str, choices: List[str]) -> str:
+    while True:
+        answer = input(prompt).strip().lower()
+        if answer in choices:
+            return answer
+        print(f"Please answer with one of: {', '.join(choices)}")
+
+
+def get_human_host_llm(version: Literal["v1", "v2", "v3"]) -> RunnableLambda:
+    """
+    Host runnable that asks the human at the terminal instead of an LLM.
+    It takes the same inputs as the LLM host, so the host node is unchanged.
+    Args:
+        version: Agent version, decides which host response model is returned.
+    Returns:
+        A runnable returning the version's host response.
+    """
+    if version == "v1":
+        from agents.v1.models import HostResponse_v1, YesNoResponse
+
+        def ask_human(inputs: dict) -> HostResponse_v1:
+            # the v1 host also judges whether the guess is correct
+            answer = _read_answer("Your answer (y/n, c if it is a correct guess): ", ["y", "n", "c"])
+            return HostResponse_v1(
+                response=YesNoResponse.NO if answer == "n" else YesNoResponse.YES,
+                correct_guess=answer == "c",
+            )
+
+    else:
+        from agents.v2.models import HostResponse, YesNoResponse
+
+        def ask_human(inputs: dict) -> HostResponse:
+            answer = _read_answer("Your answer (y/n): ", ["y", "n"])
+            return HostResponse(
+                response=YesNoResponse.YES if answer == "y" else YesNoResponse.NO
+            )
+
+    return RunnableLambda(ask_human, name="human_host")
+
+
+def get_interactive_game(
+    version: Literal["v1", "v2", "v3"],
+    model_name: str = "gpt-4o-mini",
+    human_host: bool = False,
+    topic: Optional[str] = None,
+    max_questions: int = 20,
+) -> tuple[CompiledStateGraph, RunnableConfig]:
+    """
+    Build the graph and config for an interactive game.
+    Args:
+        version: Agent version to play.
+        model_name: Model used for the LLM roles.
+        human_host: Whether the human at the terminal answers the questions.
+        topic: Topic of the game, chosen at random if not provided.
+        max_questions: Maximum number of questions the guesser can ask.
+    Returns:
+        The game graph and its config.
+    """
+    if version == "v1":
+        from agents.v1.agent import get_game_graph_v1 as get_game_graph
+    elif version == "v2":
+        from agents.v2.agent import get_game_graph_v2 as get_game_graph
+    else:
+        from agents.v3.agent import get_game_graph_v3 as get_game_graph
+
+    graph = get_game_graph()
+    configurable = get_configurable(version, model_name)
+    if human_host:
+        configurable["host_llm"] = get_human_host_llm(version)
+    configurable["max_questions"] = max_questions
+    if topic is not None:
+        configurable["topic"] = topic
+    return graph, RunnableConfig(configurable=configurable, recursion_limit=100)
+
+
+def _chunk_text(chunk) -> str:
+    """Text of a streamed message chunk, including partial structured output arguments."""
+    if isinstance(chunk.content, str) and chunk.content:
+        return chunk.content
+    if isinstance(chunk.content, list) and chunk.content:
+        # anthropic streams content blocks, tool arguments arrive as partial json
+        return "".join(
+            part.get("text") or part.get("partial_json") or ""
+            for part in chunk.content
+            if isinstance(part, dict)
+        )
+    return "".join(c.get("args") or "" for c in chunk.tool_call_chunks)
+
+
+async def play(
+    graph: CompiledStateGraph, config: RunnableConfig, output: TextIO = sys.stdout
+) -> List[TurnTiming]:
+    """
+    Play one game, streaming the guesser's tokens to the output as they arrive.
+    Args:
+        graph: The game graph.
+        config: Runtime configuration for the graph.
+        output: Where the streamed tokens and timings are written.
+    Returns:
+        Timings for each guesser turn.
+    """
+    timings: List[TurnTiming] = []
+    turn_start = first_token = None
+
+    async for event in graph.astream_events(
+        {"question_count": 0, "messages": []}, config, version="v2"
+    ):
+        kind, node = event["event"], event.get("metadata", {}).get("langgraph_node")
+        if kind == "on_chain_start" and event["name"] == "guesser":
+            turn_start, first_token = time.perf_counter(), None
+            output.write(f"\n[turn {len(timings) + 1}] guesser: ")
+        elif kind == "on_chat_model_stream" and node == "guesser":
+            text = _chunk_text(event["data"]["chunk"])
+            if text and first_token is None:
+                first_token = time.perf_counter()
+            output.write(text)
+            output.flush()
+        elif kind == "on_chain_end" and event["name"] == "guesser":
+            question = event["data"]["output"]["guesser_question"].question
+            timing = TurnTiming(
+                turn=len(timings) + 1,
+                time_to_first_token=first_token - turn_start if first_token else None,
+                time_to_question=time.perf_counter() - turn_start,
+                question=question,
+            )
+            timings.append(timing)
+            ttft = (
+                f"{timing.time_to_first_token:.2f}s"
+                if timing.time_to_first_token is not None
+                else "n/a"
+            )
+            output.write(
+                f"\nQuestion: {question}\n"
+                f"(time to first token: {ttft}, time to question: {timing.time_to_question:.2f}s)\n"
+            )
+        elif kind == "on_chain_end" and event["name"] == "host":
+            update = event["data"]["output"]
+            for message in update.get("messages", []):
+                output.write(f"Host: {message.content}\n")
+            if update.get("error"):
+                output.write(f"Game over: {update['error']}\n")
+            output.flush()
+
+    return timings
+
+
+def _print_timings(timings: List[TurnTiming]):
+    if not timings:
+        return
+    ttfts = [t.time_to_first_token for t in timings if t.time_to_first_token is not None]
+    print("\nTurn timings:")
+    for t in timings:
+        ttft = f"{t.time_to_first_token:.2f}s" if t.time_to_first_token is not None else "n/a"
+        print(f"  turn {t.turn}: first token {ttft}, question {t.time_to_question:.2f}s")
+    if ttfts:
+        print(f"Avg time to first token: {sum(ttfts) / len(ttfts):.2f}s")
+    print(f"Avg time to question: {sum(t.time_to_question for t in timings) / len(timings):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play 20 questions interactively.")
+    parser.add_argument("--version", choices=["v1", "v2", "v3"], default="v2")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--human-host", action="store_true", help="answer the questions yourself")
+    parser.add_argument("--topic", default=None)
+    parser.add_argument("--max-questions", type=int, default=20)
+    args = parser.parse_args()
+
+    load_dotenv()
+    topic = args.topic
+    if args.human_host and topic is None:
+        # hidden so that it does not stay on screen while playing
+        topic = getpass.getpass("Think of a topic and type it in (hidden): ").strip()
+
+    graph, config = get_interactive_game(
+        args.version, args.model, args.human_host, topic, args.max_questions
+    )
+    timings = asyncio.run(play(graph, config))
+    _print_timings(timings)
+
+
+if __name__ == "__main__":
+    main()
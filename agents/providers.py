@@ -0,0 +1,206 @@
+"""
+Registry of the chat model providers that the agents and evals can use.
+
+Provider SDKs are slow to import, so a provider's SDK is only imported the first time a model from that provider is resolved.
+
+Chat models are pooled: every role and every game asking for the same provider, model and settings shares one client,
+and providers that accept an httpx client share one keep-alive connection pool per provider.
+"""
+
+import importlib
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import httpx
+from pydantic import BaseModel
+
+
+class Provider(NamedTuple):
+    name: str
+    module: str  # module that holds the langchain chat model class
+    class_name: str
+    defaults: Dict[str, Any]  # constructor arguments used unless overridden
+    # constructor arguments that accept a (sync, async) httpx client, if the provider supports it
+    http_client_args: Optional[Tuple[str, str]] = None
+
+
+# Seconds a single request may take before the SDK gives up, so a hung request cannot block a game forever.
+# Override per model with get_chat_model(model_name, timeout=...).
+DEFAULT_CALL_TIMEOUT = 60.0
+
+# Order matters: the first provider whose key is contained in the model name wins.
+# SDK retries are turned off, retries are made by agents/resilience.py so they count against its retry budget.
+PROVIDERS: Dict[str, Provider] = {
+    "gemini": Provider(
+        name="google",
+        module="langchain_google_genai",
+        class_name="ChatGoogleGenerativeAI",
+        defaults={"max_tokens": None, "timeout": DEFAULT_CALL_TIMEOUT, "max_retries": 0},
+    ),
+    "gpt": Provider(
+        name="openai",
+        module="langchain_openai",
+        class_name="ChatOpenAI",
+        defaults={"timeout": DEFAULT_CALL_TIMEOUT, "max_retries": 0},
+        http_client_args=("http_client", "http_async_client"),
+    ),
+    "claude": Provider(
+        name="anthropic",
+        module="langchain_anthropic",
+        class_name="ChatAnthropic",
+        defaults={"timeout": DEFAULT_CALL_TIMEOUT, "max_retries": 0},
+    ),
+}
+
+
+def get_provider(model_name: str) -> Provider:
+    """
+    Resolve the provider for a model name without importing its SDK.
+    Args:
+        model_name: The model to use, e.g. "gpt-4o-mini".
+    Returns:
+        The matching provider.
+    """
+    for key, provider in PROVIDERS.items():
+        if key in model_name:
+            return provider
+    raise ValueError(f"Unsupported model: {model_name}")
+
+
+@lru_cache(maxsize=None)
+def _load_chat_class(module: str, class_name: str):
+    return getattr(importlib.import_module(module), class_name)
+
+
+# Sized for the evaluator's thread pool (up to 32 workers), each holding at most one request in flight.
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=64, max_keepalive_connections=32, keepalive_expiry=60
+)
+
+
+class ConnectionStats(BaseModel):
+    requests: int = 0
+    https_requests: int = 0
+    connections_opened: int = 0
+    tls_handshakes: int = 0
+    connections_reused: int = 0  # requests sent over an already open connection
+    tls_handshakes_avoided: int = 0  # https requests sent over an already open TLS connection
+
+
+class ClientPool:
+    """
+    Shares chat models and HTTP connections across roles, games and threads.
+    Args:
+        limits: Connection limits for the shared httpx clients.
+    """
+
+    def __init__(self, limits: httpx.Limits = DEFAULT_LIMITS):
+        self.limits = limits
+        self._lock = threading.Lock()
+        self._models: Dict[tuple, Any] = {}
+        self._http_clients: Dict[str, Tuple[httpx.Client, httpx.AsyncClient]] = {}
+        self._counters: Dict[str, Counter] = {}
+
+    def get(self, model_name: str, **kwargs):
+        """
+        Get the shared chat model for a model name and settings, creating it on first use.
+        Args:
+            model_name: The model to use.
+            kwargs: Constructor arguments, these override the provider defaults.
+        Returns:
+            A langchain chat model.
+        """
+        provider = get_provider(model_name)
+        key = (
+            provider.name,
+            model_name,
+            tuple(sorted((k, repr(v)) for k, v in kwargs.items())),
+        )
+        with self._lock:
+            if key not in self._models:
+                self._models[key] = self._create(provider, model_name, kwargs)
+            return self._models[key]
+
+    def stats(self) -> Dict[str, ConnectionStats]:
+        """Connection reuse per provider, for the providers whose HTTP client is pooled."""
+        with self._lock:
+            return {
+                name: ConnectionStats(
+                    requests=counter["requests"],
+                    https_requests=counter["https"],
+                    connections_opened=counter["connections"],
+                    tls_handshakes=counter["tls"],
+                    connections_reused=max(counter["requests"] - counter["connections"], 0),
+                    tls_handshakes_avoided=max(counter["https"] - counter["tls"], 0),
+                )
+                for name, counter in self._counters.items()
+            }
+
+    def _create(self, provider: Provider, model_name: str, kwargs: Dict[str, Any]):
+        chat_class = _load_chat_class(provider.module, provider.class_name)
+        arguments = {**provider.defaults, **kwargs}
+        if provider.http_client_args:
+            sync_arg, async_arg = provider.http_client_args
+            sync_client, async_client = self._get_http_clients(provider.name)
+            arguments.setdefault(sync_arg, sync_client)
+            arguments.setdefault(async_arg, async_client)
+        return chat_class(model=model_name, **arguments)
+
+    def _get_http_clients(self, provider_name: str):
+        if provider_name not in self._http_clients:
+            counter = self._counters.setdefault(provider_name, Counter())
+
+            def count(event_name: str, info: Dict[str, Any]):
+                if event_name == "connection.connect_tcp.complete":
+                    with self._lock:
+                        counter["connections"] += 1
+                elif event_name == "connection.start_tls.complete":
+                    with self._lock:
+                        counter["tls"] += 1
+
+            async def acount(event_name: str, info: Dict[str, Any]):
+                count(event_name, info)
+
+            def count_request(request: httpx.Request):
+                # only https requests would need a TLS handshake on a new connection
+                with self._lock:
+                    counter["requests"] += 1
+                    counter["https"] += request.url.scheme == "https"
+
+            def on_request(request: httpx.Request):
+                count_request(request)
+                request.extensions["trace"] = count
+
+            async def aon_request(request: httpx.Request):
+                count_request(request)
+                request.extensions["trace"] = acount
+
+            self._http_clients[provider_name] = (
+                httpx.Client(limits=self.limits, event_hooks={"request": [on_request]}),
+                httpx.AsyncClient(
+                    limits=self.limits, event_hooks={"request": [aon_request]}
+                ),
+            )
+        return self._http_clients[provider_name]
+
+
+_default_pool = ClientPool()
+
+
+def get_chat_model(model_name: str, **kwargs):
+    """
+    Get a shared chat model from the default pool, importing the provider SDK on first use.
+    Args:
+        model_name: The model to use.
+        kwargs: Constructor arguments, these override the provider defaults.
+    Returns:
+        A langchain chat model.
+    """
+    return _default_pool.get(model_name, **kwargs)
+
+
+def connection_stats() -> Dict[str, ConnectionStats]:
+    """Connection reuse per provider for the default pool."""
+    return _default_pool.stats()
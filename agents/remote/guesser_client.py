@@ -0,0 +1,138 @@
+"""
+Guesser client for the host service.
+
+The guesser keeps its own conversation history and runs the same guesser node functions the graphs use,
+sending each question to the host service and adding the host's answer to its history.
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Any, Dict, List, Literal, Optional
+
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel
+
+from agents.executor import apply_update
+from agents.remote.protocol import Ask, Error, NewGame, encode, response_adapter
+from agents.v1.nodes import guesser_node_v1
+from agents.v2.nodes import guesser_node as guesser_node_v2
+from agents.v3.nodes import guesser_node as guesser_node_v3
+
+GUESSER_NODES = {"v1": guesser_node_v1, "v2": guesser_node_v2, "v3": guesser_node_v3}
+
+
+class HostServiceError(Exception):
+    pass
+
+
+class RemoteGameResult(BaseModel):
+    session_id: str
+    correct_guess: bool
+    num_questions: int
+    error: Optional[str]
+    messages: List[str]
+    turn_latencies: List[float]  # seconds from sending a question to receiving the answer
+
+
+class HostClient:
+    """
+    Connection to a host service, shared by any number of concurrent games.
+    Use `HostClient.connect` to create one.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._read_task = asyncio.create_task(self._read_responses())
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 8765) -> "HostClient":
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _read_responses(self):
+        try:
+            while line := await self._reader.readline():
+                response = response_adapter.validate_json(line)
+                future = self._pending.pop(response.request_id, None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(HostServiceError("Connection closed"))
+
+    async def request(self, message: NewGame | Ask):
+        """Send a request and wait for its response."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message.request_id] = future
+        self._writer.write(encode(message))
+        await self._writer.drain()
+        response = await future
+        if isinstance(response, Error):
+            raise HostServiceError(response.message)
+        return response
+
+    def next_request_id(self) -> int:
+        return next(self._request_ids)
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._read_task.cancel()
+
+
+async def play_remote_game(
+    client: HostClient,
+    version: Literal["v1", "v2", "v3"],
+    configurable: Dict[str, Any],
+    topic: Optional[str] = None,
+) -> RemoteGameResult:
+    """
+    Play one game against a host service.
+    Args:
+        client: Connection to the host service.
+        version: Agent version whose guesser node asks the questions.
+        configurable: Guesser runnables, keyed like the graph's `configurable`.
+        topic: Topic to ask the host for, chosen by the host if not provided.
+    Returns:
+        Result of the game.
+    """
+    guesser_node = GUESSER_NODES[version]
+    started = await client.request(
+        NewGame(request_id=client.next_request_id(), topic=topic)
+    )
+    config = {
+        "configurable": {**configurable, "max_questions": started.max_questions}
+    }
+    state: Dict[str, Any] = {"question_count": 0, "messages": []}
+    latencies = []
+
+    while True:
+        update = await asyncio.to_thread(guesser_node, state, config)
+        apply_update(state, update)
+
+        start = time.perf_counter()
+        answer = await client.request(
+            Ask(
+                request_id=client.next_request_id(),
+                session_id=started.session_id,
+                question=state["guesser_question"].question,
+            )
+        )
+        latencies.append(time.perf_counter() - start)
+        apply_update(state, {"messages": [HumanMessage(content=answer.response)]})
+        if answer.done:
+            break
+
+    return RemoteGameResult(
+        session_id=started.session_id,
+        correct_guess=answer.correct_guess,
+        num_questions=state["question_count"],
+        error=answer.error,
+        messages=[m.content for m in state["messages"]],
+        turn_latencies=latencies,
+    )
@@ -0,0 +1,235 @@
+"""
+Standalone host service.
+
+The host runs as its own asyncio process and answers questions from guesser clients over a local TCP socket,
+instead of sharing a `GameState` with the guesser in one graph.
+The answers come from the same host node functions the graphs use, so game rules are identical.
+
+Usage:
+    python -m agents.remote.host_service --version v2 --port 8765
+"""
+
+import argparse
+import asyncio
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Literal, Optional
+
+from pydantic import ValidationError
+
+from agents.remote.protocol import (
+    Answer,
+    Ask,
+    Error,
+    GameStarted,
+    NewGame,
+    encode,
+    request_adapter,
+)
+from agents.remote.sessions import SessionManager
+from agents.roles import get_configurable
+from agents.v1.models import GuesserQuestion as GuesserQuestion_v1
+from agents.v1.nodes import host_node_v1
+from agents.v2.models import GuesserQuestion as GuesserQuestion_v2
+from agents.v2.nodes import host_node as host_node_v2
+from agents.v3.models import GuesserQuestion as GuesserQuestion_v3
+from agents.v3.nodes import host_node as host_node_v3
+
+logger = logging.getLogger(__name__)
+
+HOST_NODES = {
+    "v1": (host_node_v1, GuesserQuestion_v1),
+    "v2": (host_node_v2, GuesserQuestion_v2),
+    "v3": (host_node_v3, GuesserQuestion_v3),
+}
+
+
+class SessionError(Exception):
+    pass
+
+
+class HostService:
+    """
+    Hosts any number of concurrent game sessions.
+    Args:
+        version: Agent version whose host node answers the questions.
+        host_llm: Host runnable passed to the host node.
+        max_questions: Maximum number of questions per game.
+        max_workers: Threads used to run the (synchronous) host node.
+        sessions: Where sessions are kept, idle sessions are spilled to a temporary directory by default.
+    """
+
+    def __init__(
+        self,
+        version: Literal["v1", "v2", "v3"],
+        host_llm: Any,
+        max_questions: int = 20,
+        max_workers: int = 64,
+        sessions: Optional[SessionManager] = None,
+    ):
+        self.host_node, self.question_model = HOST_NODES[version]
+        self.host_llm = host_llm
+        self.max_questions = max_questions
+        self.sessions = sessions if sessions is not None else SessionManager()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _config(self, topic: Optional[str]) -> dict:
+        configurable = {"host_llm": self.host_llm, "max_questions": self.max_questions}
+        if topic:
+            configurable["topic"] = topic
+        return {"configurable": configurable}
+
+    async def _run_host_node(self, state: dict) -> dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self.host_node, state, self._config(state.get("topic"))
+        )
+
+    async def new_game(self, topic: Optional[str] = None) -> str:
+        """Start a session, the host node picks a topic if one is not provided."""
+        update = await self._run_host_node({"question_count": 0, "topic": topic})
+        session_id = uuid.uuid4().hex
+        await asyncio.to_thread(self.sessions.put, session_id, {"question_count": 0, **update})
+        return session_id
+
+    async def ask(self, session_id: str, question: str) -> Answer:
+        """Answer the guesser's next question in a session."""
+        # the session manager may read, write or delete spill files while holding its lock, so every call runs in a
+        # thread instead of blocking the event loop (and with it every other session's request)
+        session = await asyncio.to_thread(self.sessions.get, session_id)
+        if session is None:
+            raise SessionError(f"Unknown session: {session_id}")
+        if session.done:
+            raise SessionError(f"Game is over: {session_id}")
+
+        # the guesser node counts the question before the host sees it
+        state = {
+            **session.to_state(),
+            "question_count": session.question_count + 1,
+            "guesser_question": self.question_model(question=question),
+        }
+        update = await self._run_host_node(state)
+        session = await asyncio.to_thread(self.sessions.put, session_id, {**state, **update})
+        if session.done:
+            # nothing more can be asked in a finished game, so it does not need to be kept
+            await asyncio.to_thread(self.sessions.remove, session_id)
+
+        messages = update.get("messages")
+        response = messages[0].content if messages else update.get("error", "")
+        return Answer(
+            request_id=0,
+            session_id=session_id,
+            response=getattr(response, "value", response),
+            done=session.done,
+            correct_guess=session.correct_guess,
+            error=session.error or None,
+        )
+
+    async def handle(self, request: NewGame | Ask):
+        if isinstance(request, NewGame):
+            session_id = await self.new_game(request.topic)
+            return GameStarted(
+                request_id=request.request_id,
+                session_id=session_id,
+                max_questions=self.max_questions,
+            )
+        answer = await self.ask(request.session_id, request.question)
+        answer.request_id = request.request_id
+        return answer
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Serve one client connection, requests on it are handled concurrently."""
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(line: bytes):
+            request_id = None
+            try:
+                request = request_adapter.validate_json(line)
+                request_id = request.request_id
+                response = await self.handle(request)
+            except (ValidationError, SessionError) as e:
+                response = Error(request_id=request_id, message=str(e))
+            except Exception as e:
+                logger.error(f"Error handling request {request_id}: {str(e)}")
+                response = Error(request_id=request_id, message=str(e))
+            async with write_lock:
+                writer.write(encode(response))
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def _evict_idle_sessions(self):
+        while True:
+            await asyncio.sleep(self.sessions.idle_timeout / 2)
+            evicted = await asyncio.to_thread(self.sessions.evict_idle)
+            if evicted:
+                logger.info(f"Spilled {evicted} idle sessions to disk")
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.Server:
+        """Start listening, use port 0 to pick a free port."""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        eviction = asyncio.create_task(self._evict_idle_sessions())
+        # stop evicting once the server is closed
+        asyncio.create_task(server.wait_closed()).add_done_callback(
+            lambda _: eviction.cancel()
+        )
+        return server
+
+
+async def _serve_forever(service: HostService, port: int):
+    server = await service.serve(port=port)
+    print(f"Host service listening on {server.sockets[0].getsockname()}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the 20 questions host service.")
+    parser.add_argument("--version", choices=["v1", "v2", "v3"], default="v2")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-questions", type=int, default=20)
+    parser.add_argument("--max-resident-sessions", type=int, default=100_000)
+    parser.add_argument("--idle-timeout", type=float, default=300)
+    parser.add_argument("--spill-dir", default=None)
+    parser.add_argument(
+        "--fake-latency",
+        type=float,
+        default=None,
+        help="answer with a fake LLM that sleeps this many seconds (for load tests)",
+    )
+    args = parser.parse_args()
+
+    if args.fake_latency is not None:
+        from agents.fakes import get_fake_configurable
+
+        host_llm = get_fake_configurable(args.version, latency=args.fake_latency)["host_llm"]
+    else:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        host_llm = get_configurable(args.version, args.model)["host_llm"]
+
+    sessions = SessionManager(
+        args.spill_dir, args.max_resident_sessions, args.idle_timeout
+    )
+    service = HostService(
+        args.version, host_llm, max_questions=args.max_questions, sessions=sessions
+    )
+    asyncio.run(_serve_forever(service, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Messages exchanged between the host service and guesser clients.
+
+Every message is a JSON object on its own line. Requests carry a `request_id` which the response echoes,
+so one connection can multiplex any number of game sessions.
+"""
+
+from typing import Annotated, Literal, Optional, Union
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+
+class NewGame(BaseModel):
+    type: Literal["new_game"] = "new_game"
+    request_id: int
+    topic: Optional[str] = Field(
+        default=None, description="Topic of the game, chosen by the host if not provided."
+    )
+
+
+class Ask(BaseModel):
+    type: Literal["ask"] = "ask"
+    request_id: int
+    session_id: str
+    question: str
+
+
+class GameStarted(BaseModel):
+    type: Literal["game_started"] = "game_started"
+    request_id: int
+    session_id: str
+    max_questions: int
+
+
+class Answer(BaseModel):
+    type: Literal["answer"] = "answer"
+    request_id: int
+    session_id: str
+    response: str = Field(..., description="Host's answer, e.g. Yes, No or Correct guess!")
+    done: bool = Field(..., description="Whether the game is over.")
+    correct_guess: bool = False
+    error: Optional[str] = None
+
+
+class Error(BaseModel):
+    type: Literal["error"] = "error"
+    request_id: Optional[int] = None
+    message: str
+
+
+Request = Annotated[Union[NewGame, Ask], Field(discriminator="type")]
+Response = Annotated[Union[GameStarted, Answer, Error], Field(discriminator="type")]
+
+request_adapter = TypeAdapter(Request)
+response_adapter = TypeAdapter(Response)
+
+
+def encode(message: BaseModel) -> bytes:
+    return message.model_dump_json().encode() + b"\n"
@@ -0,0 +1,186 @@
+"""
+Session storage for the host service.
+
+Each session is kept as a small tuple instead of a full `GameState`, only the most recently used sessions stay in memory,
+and idle or least recently used sessions are spilled to disk and rehydrated on their next move.
+Finished sessions are removed, from memory and from disk.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, NamedTuple, Optional
+
+from langgraph.graph import END
+from pydantic import BaseModel
+
+
+class Session(NamedTuple):
+    session_id: str
+    topic: str
+    question_count: int
+    done: bool
+    correct_guess: bool
+    error: str
+    last_active: float
+
+    def to_state(self) -> dict:
+        """The part of the game state the host node needs."""
+        return {
+            "topic": self.topic,
+            "question_count": self.question_count,
+            "next": END if self.done else "guesser",
+            "correct_guess": self.correct_guess,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_state(cls, session_id: str, state: dict, last_active: float) -> "Session":
+        return cls(
+            session_id=session_id,
+            topic=state["topic"],
+            question_count=state.get("question_count", 0),
+            done=state.get("next") == END,
+            correct_guess=bool(state.get("correct_guess")),
+            error=state.get("error") or "",
+            last_active=last_active,
+        )
+
+
+class SessionStats(BaseModel):
+    resident: int
+    spilled: int
+    spills: int
+    rehydrations: int
+
+
+class SessionManager:
+    """
+    Keeps at most `max_resident` sessions in memory, spilling the rest to disk.
+    Args:
+        spill_dir: Directory for spilled sessions, a temporary directory if not provided.
+        max_resident: Maximum number of sessions kept in memory.
+        idle_timeout: Seconds after which `evict_idle` spills an inactive session.
+        clock: Time source, monotonic by default.
+    """
+
+    def __init__(
+        self,
+        spill_dir: Optional[str] = None,
+        max_resident: int = 100_000,
+        idle_timeout: float = 300,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="twenty-questions-sessions-")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self.max_resident = max_resident
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._resident: "OrderedDict[str, Session]" = OrderedDict()  # least recently used first
+        self._spilled = set()
+        self._spills = 0
+        self._rehydrations = 0
+        self._lock = threading.Lock()
+
+    def _path(self, session_id: str) -> str:
+        # shard by prefix so that no single directory grows too large
+        return os.path.join(self.spill_dir, session_id[:2], f"{session_id}.json")
+
+    def _spill(self, session: Session):
+        path = self._path(session.session_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(session, f)
+        self._spilled.add(session.session_id)
+        self._spills += 1
+
+    def _rehydrate(self, session_id: str) -> Session:
+        path = self._path(session_id)
+        with open(path) as f:
+            session = Session(*json.load(f))
+        os.remove(path)
+        self._spilled.discard(session_id)
+        self._rehydrations += 1
+        return session
+
+    def _make_resident(self, session: Session):
+        self._resident[session.session_id] = session
+        self._resident.move_to_end(session.session_id)
+        while len(self._resident) > self.max_resident:
+            _, evicted = self._resident.popitem(last=False)
+            self._spill(evicted)
+
+    def put(self, session_id: str, state: dict) -> Session:
+        """Create or update a session from a game state, marking it as active."""
+        session = Session.from_state(session_id, state, self.clock())
+        with self._lock:
+            if session_id in self._spilled:
+                # spilled while the move was in flight, the new state supersedes the file
+                os.remove(self._path(session_id))
+                self._spilled.discard(session_id)
+            self._make_resident(session)
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        """Get a session, rehydrating it from disk if it was spilled."""
+        with self._lock:
+            session = self._resident.get(session_id)
+            if session is not None:
+                session = session._replace(last_active=self.clock())
+                self._resident[session_id] = session
+                self._resident.move_to_end(session_id)
+                return session
+            if session_id not in self._spilled:
+                return None
+            session = self._rehydrate(session_id)._replace(last_active=self.clock())
+            self._make_resident(session)
+            return session
+
+    def remove(self, session_id: str) -> bool:
+        """Forget a session, e.g. once its game is over, deleting its spill file. Returns whether it existed."""
+        with self._lock:
+            if self._resident.pop(session_id, None) is not None:
+                return True
+            if session_id not in self._spilled:
+                return False
+            path = self._path(session_id)
+            os.remove(path)
+            self._spilled.discard(session_id)
+        try:
+            # drop the shard directory once its last session is gone
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+        return True
+
+    def evict_idle(self) -> int:
+        """Spill every session that has been inactive for longer than `idle_timeout`."""
+        cutoff = self.clock() - self.idle_timeout
+        evicted = 0
+        with self._lock:
+            # sessions are in least recently used order, so stop at the first active one
+            while self._resident:
+                session = next(iter(self._resident.values()))
+                if session.last_active > cutoff:
+                    break
+                self._resident.popitem(last=False)
+                self._spill(session)
+                evicted += 1
+        return evicted
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._resident or session_id in self._spilled
+
+    def __len__(self) -> int:
+        return len(self._resident) + len(self._spilled)
+
+    def stats(self) -> SessionStats:
+        return SessionStats(
+            resident=len(self._resident),
+            spilled=len(self._spilled),
+            spills=self._spills,
+            rehydrations=self._rehydrations,
+        )
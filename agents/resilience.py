@@ -0,0 +1,363 @@
+"""
+Retry budgets, circuit breakers and deadlines for LLM calls.
+
+Wrapping every runnable in `.with_retry(retry_if_exception_type=(Exception,))` retries everything:
+a provider outage doubles the traffic sent to an already failing endpoint, and schema bugs are retried for nothing.
+`guarded_structured_output` replaces it with a guard per provider that
+- only retries transport errors, timeouts, rate limits and server errors (see `is_retryable`),
+- caps retries at a fraction of the provider's calls with a token bucket (`RetryBudget`),
+- fails calls fast while the provider is down (`CircuitBreaker`),
+- stops calling once the game's time budget is spent (`game_deadline` in the configurable, see `check_deadline`),
+and counts all of it (`resilience_stats`), so the evaluator can report it.
+
+Single calls are bounded by the providers' request timeout (see agents/providers.py). A game past its deadline
+fails with `GameTimeoutError` at the next LLM call or node; async calls in flight are cancelled right away.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Dict, Literal, Optional, Type
+
+import httpx
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from agents.providers import PROVIDERS
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+# provider SDK exceptions for transport failures, matched by name so no SDK has to be imported
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "ResourceExhausted",
+    "InternalServerError",
+    "RateLimitError",
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider while its circuit breaker is open."""
+
+
+class GameTimeoutError(Exception):
+    """Raised when a game runs past its deadline. Not a TimeoutError, so it is never retried."""
+
+
+def get_deadline(config: Optional[dict]) -> Optional[float]:
+    """The game's deadline (in `time.monotonic()` seconds) from a runnable config, if it has one."""
+    if not config:
+        return None
+    return config.get("configurable", {}).get("game_deadline")
+
+
+def check_deadline(deadline: Optional[float]):
+    """Raise GameTimeoutError if the deadline has passed."""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise GameTimeoutError("Game time budget exceeded")
+
+
+async def _await_with_deadline(awaitable, deadline: Optional[float]):
+    if deadline is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, max(deadline - time.monotonic(), 0))
+    except asyncio.TimeoutError:
+        # the call itself may have timed out before the deadline
+        check_deadline(deadline)
+        raise
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether an error is transient and worth retrying.
+    Validation and parsing errors (a schema the model does not follow) are not, and neither is anything unknown.
+    """
+    while error is not None:
+        if isinstance(error, (httpx.TransportError, TimeoutError, ConnectionError)):
+            return True
+        if any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__):
+            return True
+        status = getattr(error, "status_code", None) or getattr(error, "code", None)
+        if isinstance(status, int) and status in RETRYABLE_STATUS_CODES:
+            return True
+        error = error.__cause__
+    return False
+
+
+class RetryBudget:
+    """
+    Token bucket capping retries at a fraction of calls.
+    Every call deposits `ratio` tokens and every retry spends one, so in steady state at most `ratio` of calls are retried.
+    `min_tokens` lets a quiet provider still retry a few times.
+    Args:
+        ratio: Retries allowed per call.
+        min_tokens: Tokens the bucket starts with, and the most it can hold beyond `ratio * max_calls`.
+        max_calls: Number of calls the bucket remembers.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_tokens: float = 10, max_calls: int = 1000):
+        self.ratio = ratio
+        self.max_tokens = min_tokens + ratio * max_calls
+        self.tokens = min_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Spend a token for a retry, returns False if the budget is exhausted."""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures, and then rejects calls for `reset_timeout` seconds.
+    After that one call is let through (half open): if it succeeds the breaker closes, if it fails it opens again,
+    and if it ends without an answer (cancelled or interrupted) the next call probes instead.
+    Args:
+        failure_threshold: Consecutive failures that open the breaker.
+        reset_timeout: Seconds the breaker stays open.
+        clock: Time source, monotonic by default.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state: Literal["closed", "open", "half_open"] = "closed"
+        self.failures = 0
+        self.opened = 0  # times the breaker opened
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self.clock() - self._opened_at >= self.reset_timeout:
+                # let a single probe through
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def release_probe(self):
+        """
+        End a half open probe that neither succeeded nor failed (e.g. it was cancelled), so that another probe is let
+        through right away instead of the breaker staying half open and rejecting every call.
+        """
+        with self._lock:
+            if self.state == "half_open":
+                # the reset timeout has already passed, so the next call probes again
+                self.state = "open"
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened += 1
+                self.state = "open"
+                self._opened_at = self.clock()
+
+
+class ResilienceStats(BaseModel):
+    calls: int = 0
+    retries: int = 0
+    retries_denied: int = 0  # retryable errors not retried because the budget was exhausted
+    non_retryable_errors: int = 0
+    rejected: int = 0  # calls failed fast by the open breaker
+    breaker_opened: int = 0
+    breaker_state: str = "closed"
+
+    def since(self, earlier: "ResilienceStats") -> "ResilienceStats":
+        """Counts accumulated since `earlier`, with the current breaker state."""
+        counts = {
+            name: getattr(self, name) - getattr(earlier, name)
+            for name in ResilienceStats.model_fields
+            if name != "breaker_state"
+        }
+        return ResilienceStats(**counts, breaker_state=self.breaker_state)
+
+
+class ProviderGuard:
+    """
+    Retry budget, circuit breaker and counters shared by all calls to one provider.
+    Args:
+        name: Provider name, used in errors.
+        max_attempts: Attempts per call, including the first.
+        budget: Retry budget, 10% of calls by default.
+        breaker: Circuit breaker, opens after 5 consecutive failures by default.
+        backoff: Base seconds of the exponential backoff between attempts (with full jitter).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int = 2,
+        budget: Optional[RetryBudget] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        backoff: float = 1.0,
+    ):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.budget = budget or RetryBudget()
+        self.breaker = breaker or CircuitBreaker()
+        self.backoff = backoff
+        self._stats = ResilienceStats()
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self._stats, name, getattr(self._stats, name) + 1)
+
+    def stats(self) -> ResilienceStats:
+        with self._lock:
+            return self._stats.model_copy(
+                update={"breaker_opened": self.breaker.opened, "breaker_state": self.breaker.state}
+            )
+
+    def _before_attempt(self):
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"Circuit open for provider {self.name}, failing fast")
+
+    def _after_error(self, error: Exception, attempt: int) -> Optional[float]:
+        """Record a failed attempt, returns the seconds to wait before retrying or None to give up."""
+        if not is_retryable(error):
+            # the provider answered, it just did not follow the schema
+            self.breaker.record_success()
+            self._count("non_retryable_errors")
+            return None
+        self.breaker.record_failure()
+        if attempt >= self.max_attempts:
+            return None
+        if not self.budget.withdraw():
+            self._count("retries_denied")
+            return None
+        self._count("retries")
+        return random.uniform(0, self.backoff * 2 ** (attempt - 1))
+
+    def call(self, fn, *args, deadline: Optional[float] = None):
+        self._count("calls")
+        self.budget.deposit()
+        for attempt in range(1, self.max_attempts + 1):
+            check_deadline(deadline)
+            self._before_attempt()
+            settled = False
+            try:
+                result = fn(*args)
+            except GameTimeoutError:
+                # the game's budget ran out, which says nothing about the provider
+                raise
+            except Exception as e:
+                settled = True
+                wait = self._after_error(e, attempt)
+                if wait is None:
+                    raise
+                if deadline is not None:
+                    wait = min(wait, max(deadline - time.monotonic(), 0))
+                time.sleep(wait)
+            else:
+                settled = True
+                self.breaker.record_success()
+                return result
+            finally:
+                if not settled:
+                    # game timeout or interrupted without an answer from the provider, an inconclusive probe
+                    self.breaker.release_probe()
+
+    async def acall(self, fn, *args, deadline: Optional[float] = None):
+        self._count("calls")
+        self.budget.deposit()
+        for attempt in range(1, self.max_attempts + 1):
+            check_deadline(deadline)
+            self._before_attempt()
+            settled = False
+            try:
+                result = await _await_with_deadline(fn(*args), deadline)
+            except GameTimeoutError:
+                # the game's budget ran out, which says nothing about the provider
+                raise
+            except Exception as e:
+                settled = True
+                wait = self._after_error(e, attempt)
+                if wait is None:
+                    raise
+                if deadline is not None:
+                    wait = min(wait, max(deadline - time.monotonic(), 0))
+                await asyncio.sleep(wait)
+            else:
+                settled = True
+                self.breaker.record_success()
+                return result
+            finally:
+                if not settled:
+                    # game timeout, cancelled (e.g. a hedge that lost) or interrupted without an answer from the
+                    # provider, an inconclusive probe
+                    self.breaker.release_probe()
+
+
+_guards: Dict[str, ProviderGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(name: str) -> ProviderGuard:
+    """The shared guard of a provider, created on first use."""
+    with _guards_lock:
+        if name not in _guards:
+            _guards[name] = ProviderGuard(name)
+        return _guards[name]
+
+
+def resilience_stats() -> Dict[str, ResilienceStats]:
+    """Retry and circuit breaker counters of every provider used so far."""
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {guard.name: guard.stats() for guard in guards}
+
+
+def _provider_name(llm: Any) -> str:
+    package = type(llm).__module__.split(".")[0]
+    for provider in PROVIDERS.values():
+        if provider.module == package:
+            return provider.name
+    return type(llm).__name__
+
+
+def with_guard(runnable: Runnable, guard: ProviderGuard) -> Runnable:
+    """Wrap a runnable so its calls go through the guard."""
+
+    def invoke(input, config):
+        return guard.call(runnable.invoke, input, config, deadline=get_deadline(config))
+
+    async def ainvoke(input, config):
+        return await guard.acall(runnable.ainvoke, input, config, deadline=get_deadline(config))
+
+    return RunnableLambda(invoke, afunc=ainvoke, name=f"guarded_{guard.name}")
+
+
+def guarded_structured_output(llm: Any, schema: Type[BaseModel]) -> Runnable:
+    """
+    `llm.with_structured_output(schema)`, guarded by the retry budget and circuit breaker of the llm's provider.
+    Args:
+        llm: Chat model.
+        schema: Structured output model.
+    Returns:
+        The guarded runnable.
+    """
+    return with_guard(llm.with_structured_output(schema), get_guard(_provider_name(llm)))
@@ -0,0 +1,46 @@
+"""
+LLM runnables for every role of a game.
+
+`get_configurable` is the real counterpart of `agents.fakes.get_fake_configurable`: the sample runnables of an agent
+version on one chat model, keyed like the graph's `configurable`. The interactive mode, the host service, the corpus
+generator and the replay all build their roles with it.
+"""
+
+from typing import Any, Dict, Literal
+
+from agents.providers import get_chat_model
+
+
+def get_configurable(version: Literal["v1", "v2", "v3"], model_name: str = "gpt-4o-mini") -> Dict[str, Any]:
+    """
+    The sample LLM runnables of an agent version, keyed like the graph's `configurable`.
+    Args:
+        version: Agent version the runnables are for.
+        model_name: Model every role runs on.
+    Returns:
+        The runnables for the version's host and guesser roles.
+    """
+    llm = get_chat_model(model_name, temperature=1)
+    if version == "v1":
+        from agents.v1.agent import get_sample_llms_v1
+
+        host_llm, guesser_llm = get_sample_llms_v1(llm)
+        return {"host_llm": host_llm, "guesser_llm": guesser_llm}
+    if version == "v2":
+        from agents.v2.agent import get_sample_llms_v2
+
+        host_llm, recommender_llm, evaluator_llm = get_sample_llms_v2(llm)
+        return {
+            "host_llm": host_llm,
+            "guesser_recommender_llm": recommender_llm,
+            "guesser_evaluator_llm": evaluator_llm,
+        }
+    from agents.v3.agent import get_sample_llms_v3
+
+    host_llm, recommender_llm, question_generator_llm, evaluator_llm = get_sample_llms_v3(llm)
+    return {
+        "host_llm": host_llm,
+        "recommender_llm": recommender_llm,
+        "question_generator_llm": question_generator_llm,
+        "evaluator_llm": evaluator_llm,
+    }
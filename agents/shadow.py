@@ -0,0 +1,310 @@
+"""
+Shadow-mode evaluation of alternative prompts and models inside live games.
+
+With `shadows` in the graph config, every call of a role also sends the same input to the role's shadow runnables,
+e.g. a guesser on a new prompt or a host on a smaller model:
+
+    configurable = {
+        ...,
+        "shadows": {"guesser_evaluator_llm": {"fused_prompt": alt_evaluator_llm}},
+        "shadow_log": ShadowLog("shadows.jsonl"),
+    }
+
+The shadows run on a background pool, so the primary call never waits for them, and their outputs never reach the game.
+Once a shadow answers, its output is logged next to the primary's: whether they agree, how long each took, and whether
+either would have guessed the topic, e.g. a guesser that would have guessed correctly at a turn where the primary did not.
+Only guesses count (see `guess`), and a guess names the topic if it contains the topic's words as whole words.
+`ShadowLog.summary()` aggregates the log per role and shadow, so one sweep evaluates several candidates at once.
+Shadow calls are not passed the game's config, so they do not count towards the game's tokens or deadline.
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+
+from agents.providers import DEFAULT_CALL_TIMEOUT
+
+# runs the shadow calls, so they do not add to the game's latency
+_shadow_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="shadow")
+
+# seconds a finished shadow waits for the primary's decision before giving up on the comparison,
+# enough for a primary call with retries and backoff, each bounded by the providers' request timeout
+PRIMARY_TIMEOUT = 5 * DEFAULT_CALL_TIMEOUT
+
+
+class ShadowRecord(BaseModel):
+    role: str
+    shadow: str
+    topic: Optional[str] = None
+    turn: Optional[int] = None
+    primary: Optional[str] = None  # the primary's decision, see `decision`
+    output: Optional[str] = None  # the shadow's decision
+    error: Optional[str] = None
+    agree: bool = False
+    primary_names_topic: bool = False  # whether the primary guessed the topic, see `guess`
+    shadow_names_topic: bool = False
+    primary_seconds: float = 0.0
+    shadow_seconds: float = 0.0
+
+
+class ShadowSummary(BaseModel):
+    calls: int = 0
+    errors: int = 0
+    agreements: int = 0
+    earlier_correct: int = 0  # turns where the shadow guessed the topic and the primary did not
+    missed_correct: int = 0  # turns where the primary guessed the topic and the shadow did not
+    primary_seconds: float = 0.0
+    shadow_seconds: float = 0.0
+
+    @property
+    def agreement_rate(self) -> float:
+        answered = self.calls - self.errors
+        return self.agreements / answered if answered else 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        answered = self.calls - self.errors
+        return self.shadow_seconds / answered if answered else 0.0
+
+    @property
+    def avg_primary_latency(self) -> float:
+        return self.primary_seconds / self.calls if self.calls else 0.0
+
+
+def decision(output: Any) -> str:
+    """
+    The part of a role's output that the game acts on, to compare a shadow with the primary:
+    the host's answer, the guesser's guess or question, or the recommender's decision and candidates.
+    """
+    if isinstance(output, BaseModel):
+        fields = output.model_dump(mode="json")
+        if "response" in fields:
+            return str(fields["response"])
+        if "choice" in fields:
+            return f"{fields['choice']}: {fields.get(fields['choice'])}"
+        if "question" in fields:
+            return fields["question"]
+        if "decision" in fields:
+            candidates = fields.get("possible_candidates") or fields.get("additions") or []
+            return f"{fields['decision']}: {', '.join(sorted(candidates))}"
+        return output.model_dump_json()
+    return str(output)
+
+
+def normalize_question(question: Optional[str]) -> str:
+    """
+    Key a question (or any decision) is matched by: lowercased, whitespace collapsed, trailing punctuation dropped.
+    The replay's answer oracle (evals/replay.py) matches questions with it too.
+    """
+    return " ".join((question or "").lower().split()).rstrip("?.! ")
+
+
+def guess(output: Any) -> Optional[str]:
+    """
+    The guess a role's output commits to, None if it does not guess:
+    the guess of a v2 evaluator that chose to guess, the best scored candidate of a v3 recommender that decided to guess,
+    or the question of the v1 guesser, which guesses by asking e.g. "Is it a dog?".
+    Candidate lists, suggested guesses and other questions are not guesses.
+    """
+    if not isinstance(output, BaseModel):
+        return None
+    fields = output.model_dump(mode="json")
+    if "choice" in fields:
+        return fields.get("guess") if fields["choice"] == "guess" else None
+    if "decision" in fields:
+        scores = fields.get("confidence_scores") or {}
+        return max(scores, key=scores.get) if fields["decision"] == "guess" and scores else None
+    if set(fields) == {"question"}:
+        return fields["question"]
+    return None
+
+
+_WORD = re.compile(r"\w+")
+
+
+def _names_topic(text: Optional[str], topic: Optional[str]) -> bool:
+    """Whether the topic's words appear in the text as consecutive whole words."""
+    words, topic_words = _WORD.findall(normalize_question(text)), _WORD.findall(normalize_question(topic))
+    if not topic_words:
+        return False
+    return any(
+        words[i : i + len(topic_words)] == topic_words for i in range(len(words) - len(topic_words) + 1)
+    )
+
+
+class ShadowLog:
+    """
+    Collects the shadow records of every game, optionally appending them to a JSONL file.
+    Args:
+        path: JSONL file the records are appended to.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._records: List[ShadowRecord] = []
+        self._pending: set = set()
+        self._lock = threading.Lock()
+
+    def records(self) -> List[ShadowRecord]:
+        with self._lock:
+            return list(self._records)
+
+    def add(self, record: ShadowRecord):
+        with self._lock:
+            self._records.append(record)
+            if self.path:
+                with open(self.path, "a") as f:
+                    f.write(record.model_dump_json() + "\n")
+
+    def _track(self, future: Future):
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._untrack)
+
+    def _untrack(self, future: Future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def wait(self, timeout: Optional[float] = None):
+        """Wait for the shadow calls still running, e.g. before reading the summary at the end of a sweep."""
+        with self._lock:
+            pending = list(self._pending)
+        wait(pending, timeout=timeout)
+
+    def summary(self) -> Dict[str, ShadowSummary]:
+        """Aggregated records, keyed by "role/shadow"."""
+        summaries: Dict[str, ShadowSummary] = {}
+        for record in self.records():
+            summary = summaries.setdefault(f"{record.role}/{record.shadow}", ShadowSummary())
+            summary.calls += 1
+            summary.primary_seconds += record.primary_seconds
+            if record.error is not None:
+                summary.errors += 1
+                continue
+            summary.agreements += record.agree
+            summary.shadow_seconds += record.shadow_seconds
+            summary.earlier_correct += record.shadow_names_topic and not record.primary_names_topic
+            summary.missed_correct += record.primary_names_topic and not record.shadow_names_topic
+        return summaries
+
+
+class ShadowedRunnable:
+    """
+    Invokes the primary runnable of a role and sends the same input to its shadows in the background.
+    Args:
+        role: Config key of the role, e.g. "host_llm".
+        primary: Runnable whose output the game uses.
+        shadows: Alternative runnables by name.
+        log: Log the comparisons are added to.
+        topic: The game's topic, to check whether a guess names it.
+        turn: Questions asked so far in the game.
+    """
+
+    def __init__(
+        self,
+        role: str,
+        primary: Runnable,
+        shadows: Dict[str, Runnable],
+        log: ShadowLog,
+        topic: Optional[str] = None,
+        turn: Optional[int] = None,
+    ):
+        self.role = role
+        self.primary = primary
+        self.shadows = shadows
+        self.log = log
+        self.topic = topic
+        self.turn = turn
+
+    def _run_shadow(self, name: str, shadow: Runnable, input: Dict[str, Any], primary: Future):
+        start = time.perf_counter()
+        output, error = None, None
+        try:
+            output = shadow.invoke(input)
+        except Exception as e:
+            error = str(e)
+        seconds = time.perf_counter() - start
+        try:
+            primary_decision, primary_guess, primary_seconds = primary.result(timeout=PRIMARY_TIMEOUT)
+        except BaseException:
+            # the primary call failed, was interrupted or never finished, so there is nothing to compare with
+            return
+        shadow_decision = decision(output) if error is None else None
+        self.log.add(
+            ShadowRecord(
+                role=self.role,
+                shadow=name,
+                topic=self.topic,
+                turn=self.turn,
+                primary=primary_decision,
+                output=shadow_decision,
+                error=error,
+                agree=error is None and normalize_question(shadow_decision) == normalize_question(primary_decision),
+                primary_names_topic=_names_topic(primary_guess, self.topic),
+                shadow_names_topic=error is None and _names_topic(guess(output), self.topic),
+                primary_seconds=primary_seconds,
+                shadow_seconds=seconds,
+            )
+        )
+
+    def invoke(self, input: Dict[str, Any], config=None) -> Any:
+        # the shadows start before the primary call and run concurrently with it,
+        # each one waits for the primary's decision only to log the comparison
+        primary: Future = Future()
+        # the state's lists (e.g. the messages) are appended to in place as the game goes on, and a shadow may still be
+        # queued by then, so the shadows get a snapshot of the input the primary sees
+        snapshot = {key: list(value) if isinstance(value, list) else value for key, value in input.items()}
+        for name, shadow in self.shadows.items():
+            self.log._track(_shadow_executor.submit(self._run_shadow, name, shadow, snapshot, primary))
+        start = time.perf_counter()
+        try:
+            output = self.primary.invoke(input, config)
+        except BaseException as e:
+            # always resolve the future, or the shadows would wait for it until PRIMARY_TIMEOUT
+            primary.set_exception(e)
+            raise
+        primary.set_result((decision(output), guess(output), time.perf_counter() - start))
+        return output
+
+
+def get_role(configuration: Dict[str, Any], role: str, state: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Runnable of a role from the graph's `configurable`, shadowed if `shadows` lists alternatives for it.
+    Args:
+        configuration: The graph's `configurable`.
+        role: Config key of the role, e.g. "guesser_llm".
+        state: The game's state, to tag the shadow records with the topic and turn.
+    Returns:
+        The role's runnable, or a `ShadowedRunnable` around it.
+    """
+    primary = configuration.get(role)
+    shadows = (configuration.get("shadows") or {}).get(role)
+    if primary is None or not shadows:
+        return primary
+    log = configuration.get("shadow_log")
+    if log is None:
+        raise ValueError("shadows are configured without a shadow_log")
+    state = state or {}
+    return ShadowedRunnable(
+        role,
+        primary,
+        shadows,
+        log,
+        topic=state.get("topic") or configuration.get("topic"),
+        turn=state.get("question_count"),
+    )
+
+
+def print_shadow_summary(log: ShadowLog):
+    for key, summary in log.summary().items():
+        print(
+            f"{key}: {summary.calls} calls, agreed with the primary {summary.agreement_rate:.1%}, "
+            f"guessed the topic {summary.earlier_correct} times when the primary did not "
+            f"(and missed it {summary.missed_correct} times), "
+            f"{summary.avg_latency:.2f}s per call vs {summary.avg_primary_latency:.2f}s, {summary.errors} errors"
+        )
@@ -0,0 +1,105 @@
+import itertools
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableLambda
+
+from agents.cascade import HostCascade
+from agents.v2.models import HostResponse, YesNoResponse
+
+
+def _host(responses, calls):
+    responses = itertools.cycle(responses)
+
+    def call(input):
+        calls.append(input)
+        return next(responses)
+
+    return RunnableLambda(call)
+
+
+YES = HostResponse(response=YesNoResponse.YES, confidence=0.95)
+NO = HostResponse(response=YesNoResponse.NO, confidence=0.95)
+UNSURE_NO = HostResponse(response=YesNoResponse.NO, confidence=0.3)
+
+
+def test_confident_answers_are_not_escalated():
+    """Test that confident, consistent small model answers are returned without calling the large model"""
+    small_calls, large_calls = [], []
+    cascade = HostCascade(_host([NO], small_calls), _host([YES], large_calls), threshold=0.8)
+
+    assert cascade.invoke({"topic": "dog", "question": "Is it red?"}) == NO
+    assert not large_calls
+    assert cascade.stats().hit_rate == 1.0
+
+
+def test_low_confidence_and_contested_answers_escalate():
+    """Test that low confidence or disagreeing samples are answered by the large model"""
+    small_calls, large_calls = [], []
+    low = HostCascade(_host([UNSURE_NO], small_calls), _host([YES], large_calls))
+    assert low.invoke({"topic": "dog", "question": "Is it a pet?"}) == YES
+
+    contested = HostCascade(
+        _host([NO, YES], small_calls), _host([YES], large_calls), consistency_samples=2
+    )
+    assert contested.invoke({"topic": "dog", "question": "Is it small?"}) == YES
+
+    assert len(large_calls) == 2
+    assert low.stats().low_confidence == 1 and contested.stats().contested == 1
+    assert low.stats().hit_rate == 0.0
+
+
+def test_answers_without_confidence_escalate():
+    """Test that an answer that leaves out its confidence is answered by the large model"""
+    small_calls, large_calls = [], []
+    cascade = HostCascade(_host([HostResponse(response=YesNoResponse.NO)], small_calls), _host([YES], large_calls))
+
+    assert cascade.invoke({"topic": "dog", "question": "Is it a pet?"}) == YES
+    assert len(large_calls) == 1 and cascade.stats().low_confidence == 1
+
+
+def test_audits_estimate_agreement_with_large_model():
+    """Test that audited answers estimate the agreement rate with a large-model-only host"""
+    small_calls, large_calls = [], []
+    # the large model disagrees with every answer the small model keeps
+    cascade = HostCascade(
+        _host([NO, NO, NO, UNSURE_NO], small_calls),
+        _host([YES], large_calls),
+        audit_rate=1.0,
+    )
+    for _ in range(8):
+        cascade.invoke({"topic": "dog", "question": "Is it a cat?"})
+    deadline = time.monotonic() + 2
+    while cascade.stats().audits < 6 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    stats = cascade.stats()
+    assert stats.calls == 8 and stats.escalations == 2
+    assert stats.audits == 6 and stats.large_calls == 8
+    assert stats.audit_agreements == 0
+    # only the 2 escalated answers match the large model
+    assert stats.agreement_rate == 2 / 8
+
+
+def test_audits_run_outside_the_game():
+    """Test that audit calls get neither the game's callbacks nor its deadline"""
+    configs = []
+
+    def large(input, config):
+        configs.append(config)
+        return YES
+
+    cascade = HostCascade(_host([NO], []), RunnableLambda(large), audit_rate=1.0)
+    game_callback = BaseCallbackHandler()
+    game_config = {
+        "callbacks": [game_callback],
+        "configurable": {"game_deadline": time.monotonic() - 1},
+    }
+    cascade.invoke({"topic": "dog", "question": "Is it a cat?"}, game_config)
+    deadline = time.monotonic() + 2
+    while cascade.stats().audits < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert cascade.stats().audits == 1
+    assert game_callback not in configs[0]["callbacks"].handlers
+    assert "game_deadline" not in configs[0].get("configurable", {})
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableLambda
+
+from agents.ensemble import HostEnsemble
+from agents.v3.models import HostResponse, YesNoResponse
+
+YES = HostResponse(response=YesNoResponse.YES)
+NO = HostResponse(response=YesNoResponse.NO)
+QUESTION = {"topic": "dog", "question": "Is it a pet?"}
+
+
+def _host(response, delay=0.0, name=None):
+    def call(input):
+        time.sleep(delay)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return RunnableLambda(call, name=name)
+
+
+class RunRecorder(BaseCallbackHandler):
+    def __init__(self):
+        self.names = {}
+        self.finished = []
+
+    def on_chain_start(self, serialized, inputs, *, run_id, **kwargs):
+        self.names[run_id] = kwargs.get("name")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self.finished.append(self.names.get(run_id))
+
+
+def test_majority_answer_stops_early():
+    """Test that the majority answer is returned without waiting for the slow dissenting member"""
+    ensemble = HostEnsemble([_host(YES, 0.05), _host(NO, 0.5), _host(YES, 0.05)])
+
+    start = time.perf_counter()
+    assert ensemble.invoke(QUESTION) == YES
+    assert time.perf_counter() - start < 0.3
+
+    time.sleep(0.6)  # the slow member's vote still counts towards the stability
+    stats = ensemble.stats()
+    assert stats.answers == 1 and stats.early_stops == 1 and stats.unanimous == 0
+    assert stats.votes == 3 and stats.stability == pytest.approx(2 / 3)
+    assert stats.cost_multiplier == 3.0
+
+
+def test_ensemble_latency_matches_a_single_call():
+    """Test that the members are called concurrently, with and without early stopping"""
+    for early_stop in (True, False):
+        ensemble = HostEnsemble([_host(NO, 0.1) for _ in range(5)], early_stop=early_stop)
+        start = time.perf_counter()
+        assert ensemble.invoke(QUESTION) == NO
+        assert time.perf_counter() - start < 0.25
+    assert ensemble.stats().unanimous == 1
+
+
+def test_failed_members_do_not_vote():
+    """Test that errors are counted and the remaining members decide, and that all members failing raises"""
+    ensemble = HostEnsemble([_host(ValueError("down")), _host(NO), _host(YES, 0.05), _host(NO, 0.05)])
+    assert ensemble.invoke(QUESTION) == NO
+    assert ensemble.stats().member_errors == 1
+
+    with pytest.raises(ValueError, match="down"):
+        HostEnsemble([_host(ValueError("down"))] * 3).invoke(QUESTION)
+
+
+def test_unanimity_is_counted_once_late_members_agree():
+    """Test that an early stopped answer counts as unanimous once the late member agrees too"""
+    ensemble = HostEnsemble([_host(YES, 0.02), _host(YES, 0.02), _host(YES, 0.3)])
+    assert ensemble.invoke(QUESTION) == YES
+    assert ensemble.stats().unanimous == 0 and ensemble.stats().late_calls == 1
+
+    time.sleep(0.5)
+    stats = ensemble.stats()
+    assert stats.unanimous == 1 and stats.votes == 3 and stats.early_stops == 1
+
+
+def test_late_members_do_not_report_to_the_game():
+    """Test that members still running after an early stop do not reach the game's callbacks"""
+    recorder = RunRecorder()
+    members = [_host(NO, 0.02, "fast"), _host(NO, 0.02, "fast"), _host(NO, 0.3, "late")]
+    ensemble = HostEnsemble(members)
+    assert ensemble.invoke(QUESTION, {"callbacks": [recorder]}) == NO
+
+    time.sleep(0.5)
+    assert ensemble.stats().votes == 3
+    assert recorder.finished.count("fast") == 2 and "late" not in recorder.finished
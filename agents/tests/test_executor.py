@@ -0,0 +1,89 @@
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.errors import GraphRecursionError
+
+from agents.executor import GameExecutor
+from agents.fakes import get_fake_configurable
+from agents.v1.agent import get_game_graph_v1
+from agents.v2.agent import get_game_graph_v2
+from agents.v3.agent import get_game_graph_v3
+
+GRAPHS = {"v1": get_game_graph_v1, "v2": get_game_graph_v2, "v3": get_game_graph_v3}
+
+
+def _config(version: str, topic: str, **kwargs) -> dict:
+    return {
+        "configurable": {
+            **get_fake_configurable(version),
+            "max_questions": 20,
+            "topic": topic,
+            "rate_limit_delay": 0,
+        },
+        **kwargs,
+    }
+
+
+def _events(runner, config):
+    """Stream a game, with messages reduced to their contents (ids are random)."""
+    events = []
+    for event in runner.stream({"question_count": 0, "messages": []}, config):
+        for node, update in event.items():
+            update = dict(update)
+            if "messages" in update:
+                update["messages"] = [m.content for m in update["messages"]]
+            events.append((node, update))
+    return events
+
+
+@pytest.mark.parametrize("version", ["v1", "v2", "v3"])
+@pytest.mark.parametrize("topic", ["dog", "apple", "spaceship"])
+def test_executor_streams_same_events_as_graph(version, topic):
+    """Test that the executor yields the same node updates as the graph, including when the game runs out of questions"""
+    config = _config(version, topic, recursion_limit=100)
+    assert _events(GameExecutor(version), config) == _events(GRAPHS[version](), config)
+
+
+@pytest.mark.parametrize("version", ["v1", "v2", "v3"])
+def test_executor_final_state_matches_graph(version):
+    """Test that invoke returns the same final state as the graph"""
+    config = _config(version, "car")
+    graph_state = GRAPHS[version]().invoke({"question_count": 0, "messages": []}, config)
+    state = GameExecutor(version).invoke({"question_count": 0, "messages": []}, config)
+
+    assert state.keys() == graph_state.keys()
+    assert [m.content for m in state["messages"]] == [m.content for m in graph_state["messages"]]
+    assert all(m.id for m in state["messages"])
+    assert {k: v for k, v in state.items() if k != "messages"} == {
+        k: v for k, v in graph_state.items() if k != "messages"
+    }
+
+
+@pytest.mark.parametrize("recursion_limit", [8, 9, 12, 13])
+def test_executor_recursion_limit_matches_graph(recursion_limit):
+    """Test that the executor stops at the same recursion limit as the graph"""
+    config = _config("v2", "car", recursion_limit=recursion_limit)  # 6 questions, 13 steps
+
+    def outcome(runner):
+        try:
+            return len(list(runner.stream({"question_count": 0, "messages": []}, config)))
+        except GraphRecursionError:
+            return "recursion limit"
+
+    assert outcome(GameExecutor("v2")) == outcome(get_game_graph_v2())
+
+
+def test_executor_passes_callbacks_to_llm_calls():
+    """Test that callbacks in the config see the runnables invoked inside the nodes"""
+
+    class CountStarts(BaseCallbackHandler):
+        def __init__(self):
+            self.starts = 0
+
+        def on_chain_start(self, *args, **kwargs):
+            self.starts += 1
+
+    handler = CountStarts()
+    GameExecutor("v2").invoke(
+        {"question_count": 0, "messages": []}, _config("v2", "dog", callbacks=[handler])
+    )
+    assert handler.starts > 0
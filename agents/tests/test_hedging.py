@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from agents.hedging import Hedger, LatencyTracker, with_hedging
+
+
+def _sleeper(seconds: float, answer: str):
+    def call(_):
+        time.sleep(seconds)
+        return answer
+
+    async def acall(_):
+        await asyncio.sleep(seconds)
+        return answer
+
+    return RunnableLambda(call, afunc=acall)
+
+
+def test_latency_tracker_percentile():
+    """Test that the hedge delay is the tracked percentile once there are enough samples"""
+    tracker = LatencyTracker(percentile=0.9, min_samples=10, initial_delay=5)
+    assert tracker.delay() == 5
+    for i in range(100):
+        tracker.record(i / 100)
+    assert tracker.delay() == 0.9
+
+
+def test_fast_call_is_not_hedged():
+    """Test that a call answering within the delay sends no duplicate"""
+    hedger = Hedger("test", LatencyTracker(initial_delay=1))
+    hedged = with_hedging(_sleeper(0, "primary"), _sleeper(0, "fallback"), hedger)
+    assert hedged.invoke(None) == "primary"
+    assert hedger.stats().hedges == 0
+
+
+def test_slow_call_is_hedged():
+    """Test that a call slower than the delay is answered by the hedge, sync and async"""
+    hedger = Hedger("test", LatencyTracker(initial_delay=0.02))
+    hedged = with_hedging(_sleeper(1, "primary"), _sleeper(0, "fallback"), hedger)
+
+    start = time.perf_counter()
+    assert hedged.invoke(None) == "fallback"
+    assert asyncio.run(hedged.ainvoke(None)) == "fallback"
+    assert time.perf_counter() - start < 0.5
+
+    stats = hedger.stats()
+    assert stats.calls == 2 and stats.hedges == 2 and stats.hedge_wins == 2
+    assert stats.extra_call_rate == 1.0
+
+
+def test_hedge_error_falls_back_to_first_call():
+    """Test that a failing hedge does not fail the call while the first call can still answer"""
+
+    def fail(_):
+        raise ConnectionError()
+
+    hedger = Hedger("test", LatencyTracker(initial_delay=0.01))
+    hedged = with_hedging(_sleeper(0.1, "primary"), RunnableLambda(fail), hedger)
+    assert hedged.invoke(None) == "primary"
+    assert hedger.stats().hedge_wins == 0
@@ -0,0 +1,64 @@
+import asyncio
+import io
+from itertools import cycle
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.runnables import RunnableLambda
+
+from agents.interactive import get_human_host_llm, play
+from agents.v2.agent import get_game_graph_v2
+from agents.v2.models import GuessOrQuestion, HostResponse, PossibleGuesses, YesNoResponse
+from agents.v2.prompts import GUESSER_EVALUATOR_PROMPT_v2, GUESSER_RECOMMENDER_PROMPT_v1
+
+
+def _streaming_llm(model, content: str):
+    """Fake LLM that streams the json of a structured output word by word"""
+    fake = GenericFakeChatModel(messages=cycle([AIMessage(content=content)]))
+    return fake | PydanticOutputParser(pydantic_object=model)
+
+
+def test_play_streams_guesser_tokens():
+    """Test that guesser tokens are streamed and each turn is timed"""
+    recommender = GUESSER_RECOMMENDER_PROMPT_v1 | _streaming_llm(
+        PossibleGuesses, '{"guesses": ["dog", "cat"], "questions": ["Is it a pet?"]}'
+    )
+    evaluator = GUESSER_EVALUATOR_PROMPT_v2 | _streaming_llm(
+        GuessOrQuestion,
+        '{"choice": "guess", "guess": "dog", "question": null, "analysis": "It barks"}',
+    )
+    config = {
+        "configurable": {
+            "host_llm": RunnableLambda(lambda _: HostResponse(response=YesNoResponse.NO)),
+            "guesser_recommender_llm": recommender,
+            "guesser_evaluator_llm": evaluator,
+            "max_questions": 20,
+            "topic": "dog",
+        }
+    }
+    output = io.StringIO()
+
+    timings = asyncio.run(play(get_game_graph_v2(), config, output))
+
+    assert len(timings) == 1
+    assert timings[0].question == "Is it a dog?"
+    assert timings[0].time_to_first_token is not None
+    assert timings[0].time_to_first_token <= timings[0].time_to_question
+    assert '"guesses":' in output.getvalue()
+    assert "Host: Correct guess!" in output.getvalue()
+
+
+def test_human_host_llm(monkeypatch):
+    """Test that the human host returns the version's host response"""
+    answers = iter(["maybe", "y"])
+    monkeypatch.setattr("builtins.input", lambda _: next(answers))
+
+    response = get_human_host_llm("v2").invoke({"topic": "dog", "question": "Is it an animal?"})
+
+    assert response == HostResponse(response=YesNoResponse.YES)
+
+    monkeypatch.setattr("builtins.input", lambda _: "c")
+    response = get_human_host_llm("v1").invoke({"topic": "dog", "question": "Is it a dog?"})
+
+    assert response.correct_guess
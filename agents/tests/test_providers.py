@@ -0,0 +1,117 @@
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from agents import providers
+from agents.providers import ClientPool, Provider, get_chat_model, get_provider
+
+
+def test_get_provider_matches_model_name():
+    """Test that model names resolve to the expected provider"""
+    assert get_provider("gpt-4o-mini").name == "openai"
+    assert get_provider("claude-3-5-sonnet-latest").name == "anthropic"
+    assert get_provider("gemini-1.5-flash").name == "google"
+
+
+def test_get_provider_unsupported_model():
+    """Test that an unknown model name raises a ValueError"""
+    with pytest.raises(ValueError, match="Unsupported model"):
+        get_provider("llama-3")
+
+
+def test_get_chat_model_merges_defaults(monkeypatch):
+    """Test that constructor arguments override the provider defaults"""
+    monkeypatch.setitem(
+        providers.PROVIDERS,
+        "fake",
+        Provider(
+            name="fake",
+            module="types",
+            class_name="SimpleNamespace",
+            defaults={"temperature": 0, "timeout": None},
+        ),
+    )
+    llm = get_chat_model("fake-model", temperature=1)
+
+    assert llm.model == "fake-model"
+    assert llm.temperature == 1
+    assert llm.timeout is None
+
+
+def test_agents_import_without_side_effects():
+    """Test that importing the agents and evaluator does not import any provider SDK"""
+    code = (
+        "import sys\n"
+        "import agents.v1.agent, agents.v2.agent, agents.v3.agent, evals.evaluation\n"
+        "print([m for m in sys.modules if m.split('.')[0] in "
+        "('langchain_openai', 'langchain_anthropic', 'langchain_google_genai')])\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).resolve().parents[2],
+    )
+    assert output.stdout.strip() == "[]"
+
+
+class FakeChatModel:
+    def __init__(self, model, http_client=None, http_async_client=None, **kwargs):
+        self.model = model
+        self.http_client = http_client
+        self.http_async_client = http_async_client
+
+
+def test_client_pool_shares_models_and_connections(monkeypatch):
+    """Test that the pool returns one model per settings and reuses keep-alive connections"""
+    monkeypatch.setitem(
+        providers.PROVIDERS,
+        "fake",
+        Provider(
+            name="fake",
+            module=__name__,
+            class_name="FakeChatModel",
+            defaults={},
+            http_client_args=("http_client", "http_async_client"),
+        ),
+    )
+    pool = ClientPool()
+    host_llm = pool.get("fake-model", temperature=1)
+    guesser_llm = pool.get("fake-model", temperature=1)
+    other_llm = pool.get("fake-model", temperature=0)
+
+    assert host_llm is guesser_llm
+    assert other_llm is not host_llm
+    assert other_llm.http_client is host_llm.http_client
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        for _ in range(3):
+            host_llm.http_client.get(f"http://127.0.0.1:{server.server_port}/")
+    finally:
+        server.shutdown()
+
+    stats = pool.stats()["fake"]
+    assert stats.requests == 3
+    assert stats.connections_opened == 1
+    assert stats.connections_reused == 2
+    # plain HTTP requests never needed a TLS handshake, so none was avoided
+    assert stats.https_requests == 0
+    assert stats.tls_handshakes_avoided == 0
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import pytest
+
+from agents.fakes import get_fake_configurable
+from agents.remote.guesser_client import HostClient, HostServiceError, play_remote_game
+from agents.remote.host_service import HostService, SessionError
+from agents.remote.protocol import Ask
+from agents.remote.sessions import SessionManager
+
+
+async def _play(version: str, topics, service=None):
+    configurable = get_fake_configurable(version)
+    service = service or HostService(version, configurable["host_llm"])
+    server = await service.serve(port=0)
+    client = await HostClient.connect(*server.sockets[0].getsockname()[:2])
+    try:
+        return await asyncio.gather(
+            *(play_remote_game(client, version, configurable, topic=t) for t in topics)
+        )
+    finally:
+        await client.close()
+        server.close()
+
+
+@pytest.mark.parametrize("version", ["v1", "v2", "v3"])
+def test_remote_games_share_one_connection(version, monkeypatch):
+    """Test that concurrent sessions over one connection each reach the correct guess"""
+    # the v1 host sleeps before every answer to avoid rate limiting
+    monkeypatch.setattr("agents.v1.nodes.time.sleep", lambda _: None)
+    results = asyncio.run(_play(version, ["dog", "car", "apple"]))
+
+    assert [r.num_questions for r in results] == [4, 6, 1]
+    assert all(r.correct_guess for r in results)
+    assert len({r.session_id for r in results}) == 3
+    assert results[0].messages[-2] == "Is it a dog?"
+    assert len(results[0].turn_latencies) == 4
+
+
+def test_finished_sessions_are_removed(tmp_path):
+    """Test that the host service forgets a session once its game is over"""
+    # every session is spilled between its moves
+    sessions = SessionManager(str(tmp_path), max_resident=0)
+    service = HostService("v2", get_fake_configurable("v2")["host_llm"], sessions=sessions)
+    results = asyncio.run(_play("v2", ["dog", "car", "apple"], service))
+
+    assert all(r.correct_guess for r in results)
+    assert len(sessions) == 0
+    assert sessions.stats().spills > 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_remote_unknown_session():
+    """Test that asking in an unknown session returns an error to the client"""
+
+    async def ask_unknown():
+        service = HostService("v2", get_fake_configurable("v2")["host_llm"])
+        server = await service.serve(port=0)
+        client = await HostClient.connect(*server.sockets[0].getsockname()[:2])
+        try:
+            await client.request(
+                Ask(request_id=client.next_request_id(), session_id="missing", question="Is it red?")
+            )
+        finally:
+            await client.close()
+            server.close()
+
+    with pytest.raises(HostServiceError, match="Unknown session"):
+        asyncio.run(ask_unknown())
+
+
+def test_session_file_io_does_not_block_the_event_loop(tmp_path):
+    """Test that a slow session lookup runs off the event loop, so other requests keep being served"""
+
+    class SlowSessions(SessionManager):
+        def get(self, session_id):
+            time.sleep(0.3)  # a rehydration from a slow disk
+            return super().get(session_id)
+
+    async def ask_while_ticking():
+        service = HostService("v2", get_fake_configurable("v2")["host_llm"], sessions=SlowSessions(str(tmp_path)))
+        ask = asyncio.create_task(service.ask("missing", "Is it red?"))
+        ticks = 0
+        while not ask.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        with pytest.raises(SessionError):
+            ask.result()
+        return ticks
+
+    assert asyncio.run(ask_while_ticking()) > 5
@@ -0,0 +1,243 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from langchain_core.exceptions import OutputParserException
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, ValidationError
+
+from agents.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    GameTimeoutError,
+    ProviderGuard,
+    RetryBudget,
+    is_retryable,
+    with_guard,
+)
+
+
+class Schema(BaseModel):
+    answer: str
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+
+async def _slow(x):
+    await asyncio.sleep(5)
+    return x
+
+
+async def _slow_ok(x):
+    await asyncio.sleep(0.01)
+    return x
+
+
+def _validation_error() -> ValidationError:
+    try:
+        Schema.model_validate({})
+    except ValidationError as e:
+        return e
+
+
+def _wrapped(error: Exception) -> Exception:
+    try:
+        raise RuntimeError("provider call failed") from error
+    except RuntimeError as e:
+        return e
+
+
+def test_is_retryable_separates_transport_from_validation_errors():
+    """Test that transport errors, timeouts, rate limits and server errors are retryable and schema errors are not"""
+    request = httpx.Request("POST", "https://example.com")
+    assert is_retryable(httpx.ConnectError("refused", request=request))
+    assert is_retryable(TimeoutError())
+    assert is_retryable(StatusError(429))
+    assert is_retryable(StatusError(503))
+    assert is_retryable(_wrapped(httpx.ReadTimeout("slow", request=request)))
+
+    assert not is_retryable(StatusError(400))
+    assert not is_retryable(_validation_error())
+    assert not is_retryable(OutputParserException("not json"))
+    assert not is_retryable(ValueError("unknown"))
+
+
+def _failing(error: Exception):
+    calls = []
+
+    def fn(_):
+        calls.append(1)
+        raise error
+
+    return fn, calls
+
+
+def test_validation_errors_are_not_retried():
+    """Test that a schema error is raised after one attempt and does not trip the breaker"""
+    guard = ProviderGuard("test", max_attempts=3, backoff=0)
+    fn, calls = _failing(_validation_error())
+    for _ in range(10):
+        with pytest.raises(ValidationError):
+            guard.call(fn, None)
+
+    assert len(calls) == 10
+    stats = guard.stats()
+    assert stats.retries == 0 and stats.non_retryable_errors == 10
+    assert stats.breaker_state == "closed"
+
+
+def test_retry_budget_caps_retries():
+    """Test that retries stay within the budget's fraction of calls during an outage"""
+    guard = ProviderGuard(
+        "test",
+        max_attempts=2,
+        budget=RetryBudget(ratio=0.1, min_tokens=0),
+        breaker=CircuitBreaker(failure_threshold=10**6),
+        backoff=0,
+    )
+    fn, calls = _failing(ConnectionError())
+    for _ in range(1000):
+        with pytest.raises(ConnectionError):
+            guard.call(fn, None)
+
+    stats = guard.stats()
+    assert stats.calls == 1000
+    assert 95 <= stats.retries <= 100
+    assert stats.retries + stats.retries_denied == 1000
+    assert len(calls) == 1000 + stats.retries
+
+
+def test_circuit_breaker_fails_fast_and_recovers():
+    """Test that the breaker opens after consecutive failures, rejects calls, and closes after a successful probe"""
+    now = [0.0]
+    guard = ProviderGuard(
+        "test",
+        max_attempts=1,
+        breaker=CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=lambda: now[0]),
+    )
+    fn, calls = _failing(ConnectionError())
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            guard.call(fn, None)
+    with pytest.raises(CircuitOpenError):
+        guard.call(fn, None)
+    assert len(calls) == 3
+    assert guard.stats().breaker_state == "open"
+
+    # the probe after the reset timeout fails, so the breaker opens again
+    now[0] = 30
+    with pytest.raises(ConnectionError):
+        guard.call(fn, None)
+    with pytest.raises(CircuitOpenError):
+        guard.call(fn, None)
+
+    now[0] = 60
+    assert guard.call(lambda x: x, "ok") == "ok"
+    stats = guard.stats()
+    assert stats.breaker_state == "closed"
+    assert stats.breaker_opened == 2 and stats.rejected == 2
+
+
+def test_with_guard_retries_sync_and_async():
+    """Test that a guarded runnable retries a transient error on invoke and ainvoke"""
+    attempts = []
+
+    def flaky(x):
+        attempts.append(x)
+        if len(attempts) % 2:
+            raise StatusError(503)
+        return x * 2
+
+    guarded = with_guard(RunnableLambda(flaky), ProviderGuard("test", backoff=0))
+    assert guarded.invoke(1) == 2
+    assert asyncio.run(guarded.ainvoke(2)) == 4
+    assert attempts == [1, 1, 2, 2]
+
+
+def test_deadline_stops_calls_and_cancels_async_call():
+    """Test that no call starts past the game deadline and an async call in flight is cancelled at it"""
+    guard = ProviderGuard("test", backoff=0)
+    guarded = with_guard(RunnableLambda(lambda x: x, afunc=_slow), guard)
+
+    past = {"configurable": {"game_deadline": time.monotonic()}}
+    with pytest.raises(GameTimeoutError):
+        guarded.invoke(1, past)
+
+    start = time.perf_counter()
+    soon = {"configurable": {"game_deadline": time.monotonic() + 0.05}}
+    with pytest.raises(GameTimeoutError):
+        asyncio.run(guarded.ainvoke(1, soon))
+    assert time.perf_counter() - start < 0.5
+    # the game's deadline is not the provider's fault
+    assert guard.stats().retries == 0 and guard.breaker.failures == 0
+
+
+def test_cancelled_probe_does_not_leave_the_breaker_half_open():
+    """Test that a half open probe that is cancelled lets the next call probe instead of rejecting calls for good"""
+    now = [0.0]
+    guard = ProviderGuard(
+        "test",
+        max_attempts=1,
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=lambda: now[0]),
+    )
+    fn, _ = _failing(ConnectionError())
+    with pytest.raises(ConnectionError):
+        guard.call(fn, None)
+    assert guard.stats().breaker_state == "open"
+
+    now[0] = 30
+
+    async def cancelled_probe():
+        task = asyncio.ensure_future(guard.acall(_slow, 1))
+        await asyncio.sleep(0.01)
+        assert guard.breaker.state == "half_open"
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancelled_probe())
+    assert guard.breaker.state == "open"
+
+    def interrupted(x):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        guard.call(interrupted, None)
+    assert guard.breaker.state == "open"
+
+    now[0] = 130
+    assert guard.call(lambda x: x, "ok") == "ok"
+    assert guard.stats().breaker_state == "closed"
+
+
+def test_probe_past_the_game_deadline_is_inconclusive():
+    """Test that a half open probe stopped by the game's deadline neither closes nor strands the breaker"""
+    now = [0.0]
+    guard = ProviderGuard(
+        "test",
+        max_attempts=1,
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=lambda: now[0]),
+    )
+    fn, _ = _failing(ConnectionError())
+    with pytest.raises(ConnectionError):
+        guard.call(fn, None)
+
+    now[0] = 30
+    with pytest.raises(GameTimeoutError):
+        asyncio.run(guard.acall(_slow, 1, deadline=time.monotonic() + 0.05))
+    assert guard.breaker.state == "open"
+
+    def game_timeout(x):
+        raise GameTimeoutError("Game time budget exceeded")
+
+    with pytest.raises(GameTimeoutError):
+        guard.call(game_timeout, None)
+    assert guard.breaker.state == "open" and guard.stats().non_retryable_errors == 0
+
+    now[0] = 130
+    assert asyncio.run(guard.acall(_slow_ok, 1)) == 1
+    assert guard.breaker.state == "closed"
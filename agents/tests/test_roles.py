@@ -0,0 +1,35 @@
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from agents import providers
+from agents.providers import Provider
+from agents.roles import get_configurable
+
+
+# models the structured outputs were built on
+structured_models = []
+
+
+class RecordingChatModel:
+    def __init__(self, model, **kwargs):
+        self.model = model
+
+    def with_structured_output(self, schema):
+        structured_models.append(self.model)
+        return RunnableLambda(lambda _: schema)
+
+
+@pytest.mark.parametrize("version", ["v1", "v2", "v3"])
+def test_every_role_runs_on_the_requested_model(version, monkeypatch):
+    """Test that every role of every version is built on the model it is asked for"""
+    monkeypatch.setitem(
+        providers.PROVIDERS,
+        "fake",
+        Provider(name="fake", module=__name__, class_name="RecordingChatModel", defaults={}),
+    )
+    structured_models.clear()
+    # a model name of its own, since the default pool caches the models other tests created
+    configurable = get_configurable(version, "fake-roles-model")
+
+    assert "host_llm" in configurable
+    assert structured_models == ["fake-roles-model"] * len(configurable)
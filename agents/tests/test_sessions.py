@@ -0,0 +1,71 @@
+from langgraph.graph import END
+
+from agents.remote.sessions import SessionManager
+
+STATE = {"topic": "dog", "question_count": 0, "next": "guesser"}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_least_recently_used_sessions_spill_to_disk(tmp_path):
+    """Test that sessions beyond max_resident are spilled and rehydrated on access"""
+    sessions = SessionManager(str(tmp_path), max_resident=2)
+    for session_id in ["aa1", "bb2", "cc3"]:
+        sessions.put(session_id, STATE)
+
+    assert sessions.stats().resident == 2
+    assert sessions.stats().spilled == 1
+    assert (tmp_path / "aa" / "aa1.json").exists()
+
+    session = sessions.get("aa1")
+
+    assert session.topic == "dog"
+    assert session.question_count == 0
+    assert not (tmp_path / "aa" / "aa1.json").exists()
+    # rehydrating aa1 pushes out the least recently used session, bb2
+    assert "bb2" in sessions
+    assert (tmp_path / "bb" / "bb2.json").exists()
+    assert len(sessions) == 3
+    assert sessions.get("missing") is None
+
+
+def test_evict_idle_sessions(tmp_path):
+    """Test that only sessions idle for longer than the timeout are spilled"""
+    clock = FakeClock()
+    sessions = SessionManager(str(tmp_path), idle_timeout=10, clock=clock)
+    sessions.put("aa1", STATE)
+    clock.now = 8
+    sessions.put("bb2", {**STATE, "question_count": 3, "next": END, "correct_guess": True})
+    clock.now = 15
+
+    assert sessions.evict_idle() == 1
+    assert sessions.stats().resident == 1
+
+    session = sessions.get("bb2")
+
+    assert session.done and session.correct_guess
+    assert session.to_state()["next"] == END
+    assert sessions.get("aa1").question_count == 0
+    assert sessions.stats().rehydrations == 1
+
+
+def test_remove_deletes_resident_and_spilled_sessions(tmp_path):
+    """Test that removed sessions are gone from memory and from disk"""
+    sessions = SessionManager(str(tmp_path), max_resident=1)
+    sessions.put("aa1", STATE)
+    sessions.put("bb2", STATE)
+    assert (tmp_path / "aa" / "aa1.json").exists()
+
+    assert sessions.remove("aa1")
+    assert sessions.remove("bb2")
+    assert not sessions.remove("missing")
+
+    assert len(sessions) == 0
+    assert sessions.get("aa1") is None
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,127 @@
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from agents.executor import GameExecutor
+from agents.fakes import get_fake_configurable
+from agents.shadow import ShadowedRunnable, ShadowLog, guess
+from agents.v1.models import GuesserQuestion
+from agents.v2.models import GuessOrQuestion, PossibleGuesses
+
+
+def test_shadows_are_logged_without_affecting_the_game():
+    """Test that shadow outputs are compared with the primary's and never change the game or slow it down"""
+    configurable = get_fake_configurable("v2")
+    # guesses "car" first, the primary gets to it at the 6th question
+    shadow_evaluator = get_fake_configurable("v2", guesses=["car"])["guesser_evaluator_llm"]
+    slow_evaluator = shadow_evaluator | RunnableLambda(lambda output: time.sleep(0.2) or output)
+
+    def failing_evaluator(input):
+        raise ValueError("shadow failure")
+
+    log = ShadowLog()
+    configurable.update(
+        topic="car",
+        max_questions=20,
+        shadows={
+            "guesser_evaluator_llm": {
+                "car_first": slow_evaluator,
+                "broken": RunnableLambda(failing_evaluator),
+            }
+        },
+        shadow_log=log,
+    )
+    start = time.perf_counter()
+    state = GameExecutor("v2").invoke(
+        {"question_count": 0, "messages": []},
+        {"configurable": configurable, "recursion_limit": 50},
+    )
+    elapsed = time.perf_counter() - start
+    assert state["correct_guess"] and state["question_count"] == 6
+    # six turns of a 0.2s shadow would take 1.2s if the game waited for them
+    assert elapsed < 0.6
+
+    log.wait()
+    records = log.records()
+    assert len(records) == 12 and {r.turn for r in records} == set(range(6))
+    summary = log.summary()
+    car_first = summary["guesser_evaluator_llm/car_first"]
+    assert car_first.calls == 6 and car_first.errors == 0
+    # the shadow guesses the topic on every turn, the primary only on the last one
+    assert car_first.earlier_correct == 5 and car_first.agreements == 1
+    broken = summary["guesser_evaluator_llm/broken"]
+    assert broken.errors == 6 and broken.agreement_rate == 0.0
+
+
+def test_only_guesses_of_the_whole_topic_name_it():
+    """Test that candidate lists and partial words never count as guessing the topic"""
+    log = ShadowLog()
+    candidates = PossibleGuesses(guesses=["ant", "dog"], questions=["Is it an insect?"])
+    important = GuessOrQuestion(choice="guess", guess="important thing", question=None, analysis=None)
+    shadowed = ShadowedRunnable(
+        "guesser_recommender_llm",
+        RunnableLambda(lambda _: candidates),
+        {"same": RunnableLambda(lambda _: candidates), "partial": RunnableLambda(lambda _: important)},
+        log,
+        topic="ant",
+    )
+    shadowed.invoke({})
+    log.wait()
+
+    assert len(log.records()) == 2
+    assert not any(r.primary_names_topic or r.shadow_names_topic for r in log.records())
+    assert guess(GuessOrQuestion(choice="question", guess="ant", question="Is it small?", analysis=None)) is None
+    assert guess(GuessOrQuestion(choice="guess", guess="Ant", question=None, analysis=None)) == "Ant"
+    assert guess(GuesserQuestion(question="Is it an ant?")) == "Is it an ant?"
+
+
+def test_shadows_see_the_primary_input_with_the_loop_executor():
+    """Test that a shadow still queued when the game moves on sees the messages of its own turn"""
+    configurable = get_fake_configurable("v3")
+    generator = configurable["question_generator_llm"]
+    primary_seen, shadow_seen = [], []
+
+    def primary(input):
+        primary_seen.append(len(input["messages"]))
+        return generator.invoke(input)
+
+    def late_shadow(input):
+        time.sleep(0.05)  # the loop executor appends to the state's messages in place meanwhile
+        shadow_seen.append(len(input["messages"]))
+        return generator.invoke(input)
+
+    log = ShadowLog()
+    configurable.update(
+        question_generator_llm=RunnableLambda(primary),
+        topic="car",
+        max_questions=20,
+        shadows={"question_generator_llm": {"late": RunnableLambda(late_shadow)}},
+        shadow_log=log,
+    )
+    GameExecutor("v3").invoke(
+        {"question_count": 0, "messages": []},
+        {"configurable": configurable, "recursion_limit": 50},
+    )
+    log.wait()
+    assert sorted(shadow_seen) == primary_seen == [0, 2, 4, 6, 8, 10]
+    assert log.summary()["question_generator_llm/late"].agreements == 6
+
+
+def test_interrupted_primary_releases_the_shadows():
+    """Test that shadows stop waiting when the primary call is interrupted by a BaseException"""
+
+    def interrupted(input):
+        raise KeyboardInterrupt
+
+    log = ShadowLog()
+    shadowed = ShadowedRunnable(
+        "host_llm", RunnableLambda(interrupted), {"fast": RunnableLambda(lambda input: "No")}, log
+    )
+    with pytest.raises(KeyboardInterrupt):
+        shadowed.invoke({"topic": "dog", "question": "Is it red?"})
+
+    start = time.perf_counter()
+    log.wait(timeout=5)
+    assert time.perf_counter() - start < 1
+    assert log.records() == []
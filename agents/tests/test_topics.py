@@ -0,0 +1,92 @@
+import collections
+import random
+
+import numpy as np
+import pytest
+
+from agents.topics import (
+    DEFAULT_TOPICS,
+    TopicCatalog,
+    TopicEntry,
+    build_alias_table,
+    get_random_topic,
+    read_entries,
+    write_catalog,
+)
+from agents.v2.nodes import host_node
+
+
+def _catalog_file(tmp_path, lines):
+    source = tmp_path / "topics.tsv"
+    source.write_text("\n".join(lines) + "\n")
+    path = tmp_path / "topics.cat"
+    with open(path, "wb") as f:
+        write_catalog(read_entries(str(source)), f)
+    return str(path)
+
+
+def test_alias_table_matches_weights():
+    """Test that the alias table reproduces the weights exactly"""
+    weights = np.array([1.0, 2.0, 3.0, 4.0, 0.5])
+    probability, alias = build_alias_table(weights)
+    n = len(weights)
+    implied = probability / n
+    for i in range(n):
+        implied[alias[i]] += (1 - probability[i]) / n
+    assert np.allclose(implied, weights / weights.sum())
+
+
+def test_catalog_round_trip(tmp_path):
+    """Test that a memory-mapped catalog returns the entries it was built from"""
+    path = _catalog_file(
+        tmp_path,
+        [
+            "# topic\tcategory\tweight\tdifficulty",
+            "elephant\tanimal\t2\t0.5",
+            "car\tvehicle",
+            "dog\tanimal",
+        ],
+    )
+    catalog = TopicCatalog.open(path)
+
+    assert len(catalog) == 3
+    assert set(catalog.categories) == {"animal", "vehicle"}
+    entries = {catalog.entry(i) for i in range(len(catalog))}
+    assert entries == {
+        TopicEntry("elephant", "animal", 2.0, 0.5),
+        TopicEntry("car", "vehicle", 1.0, 0.0),
+        TopicEntry("dog", "animal", 1.0, 0.0),
+    }
+
+
+def test_weighted_sampling_and_category_filter():
+    """Test that topics are drawn in proportion to their weight, within the selected categories"""
+    catalog = TopicCatalog.from_entries(
+        [TopicEntry("dog", "animal", 3), TopicEntry("cat", "animal", 1)]
+        + [TopicEntry(f"car-{i}", "vehicle", 1) for i in range(100)]
+    )
+    rng = random.Random(0)
+
+    counts = collections.Counter(catalog.sample(["animal"], rng) for _ in range(20000))
+    assert set(counts) == {"dog", "cat"}
+    assert counts["dog"] / 20000 == pytest.approx(0.75, abs=0.02)
+
+    vehicles = sum(catalog.sample(rng=rng).startswith("car") for _ in range(20000))
+    assert vehicles / 20000 == pytest.approx(100 / 104, abs=0.01)
+
+    with pytest.raises(KeyError):
+        catalog.sample(["plant"])
+
+
+def test_host_draws_from_configured_catalog(tmp_path):
+    """Test that the host picks a random topic from the configured catalog and categories"""
+    path = _catalog_file(tmp_path, ["dog\tanimal", "car\tvehicle"])
+    config = {
+        "configurable": {
+            "max_questions": 20,
+            "topic_catalog": path,
+            "topic_categories": ["vehicle"],
+        }
+    }
+    assert host_node({"question_count": 0}, config)["topic"] == "car"
+    assert get_random_topic() in DEFAULT_TOPICS
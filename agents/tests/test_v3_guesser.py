@@ -0,0 +1,160 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from agents.executor import GameExecutor
+from agents.fakes import get_fake_configurable
+from agents.v3.models import (
+    CandidateDelta,
+    HostResponse,
+    QuestionEvaluation,
+    QuestionGenerator,
+    RecommenderDecision,
+    YesNoResponse,
+)
+from agents.v3.nodes import guesser_node, recommend_incremental, update_posterior
+from agents.v3.posterior import CandidatePosterior
+from evals.corpus import play_transcript
+
+
+def test_incremental_recommender_applies_delta():
+    """Test that the incremental recommender sees only the latest Q/A and applies additions, removals and scores"""
+    prompts = []
+
+    def recommender(input):
+        prompts.append(input)
+        return CandidateDelta(
+            decision="question",
+            additions=["cat", "dog"],
+            removals=["car"],
+            confidence_scores={"cat": 0.6, "car": 0.9},
+            reasoning="",
+        )
+
+    state = {
+        "question_count": 3,
+        "candidates": ["dog", "car", "apple"],
+        "candidate_scores": {"dog": 0.4, "car": 0.3, "apple": 0.1},
+        "messages": [
+            AIMessage(content="Is it a plant?"),
+            HumanMessage(content="No"),
+            AIMessage(content="Is it alive?"),
+            HumanMessage(content="Yes"),
+        ],
+    }
+    decision = recommend_incremental(state, RunnableLambda(recommender))
+
+    assert prompts[0]["question"] == "Is it alive?" and prompts[0]["answer"] == "Yes"
+    assert "- car: 0.30" in prompts[0]["candidates"]
+    assert decision.possible_candidates == ["dog", "apple", "cat"]
+    assert decision.confidence_scores == {"dog": 0.4, "apple": 0.1, "cat": 0.6}
+
+
+def test_incremental_recommender_prompt_stays_flat():
+    """Test that the incremental recommender's tokens per turn stay flat while the full history's grow"""
+    counting = get_fake_configurable("v3", count_tokens=True)
+
+    def recommender_tokens(mode):
+        configurable = {
+            **get_fake_configurable("v3"),
+            "recommender_llm": counting["recommender_llm"],
+            "incremental_recommender_llm": counting["incremental_recommender_llm"],
+            "recommender_mode": mode,
+        }
+        transcript = play_transcript("v3", "spaceship", configurable, max_questions=20)
+        assert len(transcript.turns) == 20
+        return [turn.input_tokens for turn in transcript.turns]
+
+    full, incremental = recommender_tokens("full"), recommender_tokens("incremental")
+    assert full[-1] > full[1] + 50
+    # after the first turn, which has no candidates and no answer yet
+    assert max(incremental[1:]) - min(incremental[1:]) <= 2
+
+
+def test_posterior_update_follows_split_and_guesses():
+    """Test that answers move probability to the candidates on the answer's side of the split"""
+    posterior = CandidatePosterior(other=0.2).sync(["apple", "banana", "dog", "cat"])
+    assert posterior.probabilities["apple"] == pytest.approx(0.2)
+
+    posterior = posterior.update(["apple", "banana"], ["dog", "cat"], answer_yes=True, noise=0.1)
+    assert posterior.probabilities["apple"] == pytest.approx(9 * posterior.probabilities["dog"])
+    assert sum(posterior.probabilities.values()) + posterior.other == pytest.approx(1)
+
+    posterior = posterior.rule_out("apple")
+    assert posterior.best()[0] == "banana"
+
+
+# what the scripted host knows about each question
+KNOWLEDGE = {"Is it a fruit?": {"apple", "banana"}, "Is it yellow?": {"banana"}}
+SPLITS = [
+    ("Is it a fruit?", ["apple", "banana"], ["dog", "cat"]),
+    ("Is it yellow?", ["banana"], ["apple"]),
+    ("Is it big?", [], []),
+]
+
+
+def _scripted_configurable(recommender_decision):
+    def host(input):
+        yes = input["topic"] in KNOWLEDGE.get(input["question"], set())
+        return HostResponse(response=YesNoResponse.YES if yes else YesNoResponse.NO)
+
+    def question_generator(input):
+        asked = sum(isinstance(m, AIMessage) for m in input["messages"])
+        question, yes, no = SPLITS[min(asked, len(SPLITS) - 1)]
+        return QuestionGenerator(question=question, yes_candidates=yes, no_candidates=no)
+
+    return {
+        "host_llm": RunnableLambda(host),
+        "recommender_llm": RunnableLambda(lambda _: recommender_decision),
+        "question_generator_llm": RunnableLambda(question_generator),
+        "evaluator_llm": RunnableLambda(lambda _: QuestionEvaluation(is_good_question=True, reasoning="")),
+        "topic": "banana",
+        "max_questions": 20,
+    }
+
+
+def test_yes_answer_favours_the_yes_candidates():
+    """Test that a Yes answer raises the posterior of the generator's yes_candidates and a No answer its no_candidates"""
+    decision = RecommenderDecision(
+        decision="question", possible_candidates=["apple", "banana", "dog", "cat"], reasoning=""
+    )
+    config = {"configurable": _scripted_configurable(decision)}
+    # the first scripted question is "Is it a fruit?" with apple and banana as its yes_candidates
+    state = {"question_count": 0, "messages": []}
+    update = guesser_node(state, config)
+    assert update["pending_split"] == {"yes": ["apple", "banana"], "no": ["dog", "cat"]}
+
+    for answer, favoured, disfavoured in (("Yes", "apple", "dog"), ("No", "dog", "apple")):
+        state = {**update, "messages": [*update["messages"], HumanMessage(content=answer)]}
+        probabilities = update_posterior(state).probabilities
+        assert probabilities[favoured] > probabilities[disfavoured]
+
+
+def test_posterior_policy_guesses_as_soon_as_justified():
+    """Test that the posterior policy guesses once the answers single out a candidate"""
+    decision = RecommenderDecision(
+        decision="question", possible_candidates=["apple", "banana", "dog", "cat"], reasoning=""
+    )
+    config = {"configurable": _scripted_configurable(decision), "recursion_limit": 50}
+    state = GameExecutor("v3").invoke({"question_count": 0, "messages": []}, config)
+
+    assert state["correct_guess"] and state["question_count"] == 3
+    assert state["posterior"].best()[0] == "banana"
+
+    # the recommender never asks to guess, so the same game runs out of questions
+    config["configurable"]["guess_policy"] = "recommender"
+    state = GameExecutor("v3").invoke({"question_count": 0, "messages": []}, config)
+    assert not state["correct_guess"] and state["question_count"] == 20
+
+
+def test_recommender_policy_reads_confidence_scores_by_candidate():
+    """Test that the recommender policy guesses the candidate with the highest confidence score"""
+    decision = RecommenderDecision(
+        decision="guess",
+        possible_candidates=["apple", "banana"],
+        confidence_scores={"apple": 0.2, "banana": 0.95},
+        reasoning="",
+    )
+    configurable = {**_scripted_configurable(decision), "guess_policy": "recommender"}
+    state = GameExecutor("v3").invoke({"question_count": 0, "messages": []}, {"configurable": configurable})
+    assert state["correct_guess"] and state["question_count"] == 1
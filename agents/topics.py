@@ -0,0 +1,350 @@
+"""
+Topic catalog the host draws random topics from.
+
+A catalog is a binary file built once from a tab-separated topics file (`topic[\\tcategory[\\tweight[\\tdifficulty]]]`,
+the format the evaluations' topic sources in evals/topics.py read too, with the same `parse_topic_line`) and memory-mapped when opened. Opening reads only a small
+JSON header, so host startup does not grow with the catalog: topics, weights and alias tables are NumPy views on the file
+and pages are loaded as they are touched.
+
+Entries are sorted by category, so every category is a contiguous range with its own alias table (Vose's alias method).
+Sampling a weighted topic, from the whole catalog or from some categories, takes a few random numbers and array lookups
+whatever the catalog's size.
+
+Layout, little endian, sections 8-byte aligned:
+
+    b"TQCAT1\\0\\0" | uint64 header size | JSON header | string offsets uint64[n + 1] | topic strings (utf-8)
+    | category uint16[n] | weight float32[n] | difficulty float32[n]
+    | alias probability float64[n] | alias index uint32[n] (category-local) | global alias probability, index
+
+Build a catalog with:
+    python -m agents.topics topics.tsv topics.cat
+and pass it to the graph as `configurable["topic_catalog"]` (a path or `TopicCatalog`), optionally with
+`configurable["topic_categories"]`, or set the `TWENTY_QUESTIONS_TOPIC_CATALOG` environment variable.
+"""
+
+import argparse
+import io
+import json
+import mmap
+import os
+import random
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+MAGIC = b"TQCAT1\0\0"
+
+# the topics the hosts used to pick from, used when no catalog is configured
+DEFAULT_TOPICS = [
+    "apple",
+    "banana",
+    "cherry",
+    "dog",
+    "cat",
+    "car",
+    "house",
+    "tree",
+    "flower",
+    "book",
+]
+
+
+# tuples rather than Pydantic models, a file is parsed into one per line
+class TopicEntry(NamedTuple):
+    topic: str
+    category: Optional[str] = None
+    weight: float = 1.0
+    difficulty: float = 0.0
+
+
+def parse_topic_line(line: str) -> Optional[TopicEntry]:
+    """
+    Parse a line of a topics file.
+    Args:
+        line: `topic[\\tcategory[\\tweight[\\tdifficulty]]]`.
+    Returns:
+        The entry, or None for blank and comment lines.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    fields = [field.strip() for field in line.split("\t")]
+    category = fields[1] if len(fields) > 1 and fields[1] else None
+    weight = float(fields[2]) if len(fields) > 2 and fields[2] else 1.0
+    difficulty = float(fields[3]) if len(fields) > 3 and fields[3] else 0.0
+    return TopicEntry(fields[0], category, weight, difficulty)
+
+
+def build_alias_table(weights: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vose's alias table for sampling indices in proportion to `weights`.
+    Args:
+        weights: Non-negative weights, at least one positive.
+    Returns:
+        (probability, alias): pick a uniform index i, keep it with probability[i], otherwise take alias[i].
+    """
+    n = len(weights)
+    scaled = np.asarray(weights, dtype=np.float64) * n / weights.sum()
+    probability = np.ones(n, dtype=np.float64)
+    alias = np.arange(n, dtype=np.uint32)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        probability[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    # what is left is 1 up to rounding
+    return probability, alias
+
+
+def _align(f: io.BufferedIOBase):
+    f.write(b"\0" * (-f.tell() % 8))
+
+
+def write_catalog(entries: Iterable[TopicEntry], f: io.BufferedIOBase):
+    """
+    Write a catalog to a binary file object.
+    Args:
+        entries: Catalog entries, with positive weights.
+        f: File object opened for binary writing.
+    """
+    # topics without a category are stored under the name ""
+    entries = [entry._replace(category=entry.category or "") for entry in entries]
+    entries.sort(key=lambda entry: entry.category)
+    if not entries:
+        raise ValueError("A topic catalog needs at least one topic")
+    n = len(entries)
+
+    categories: List[Dict] = []
+    category_ids = np.zeros(n, dtype=np.uint16)
+    for i, entry in enumerate(entries):
+        if not categories or categories[-1]["name"] != entry.category:
+            categories.append({"name": entry.category, "start": i, "end": i, "weight": 0.0})
+        categories[-1]["end"] = i + 1
+        categories[-1]["weight"] += entry.weight
+        category_ids[i] = len(categories) - 1
+    if len(categories) > np.iinfo(np.uint16).max:
+        raise ValueError("A topic catalog holds at most 65535 categories")
+
+    encoded = [entry.topic.encode() for entry in entries]
+    offsets = np.zeros(n + 1, dtype=np.uint64)
+    offsets[1:] = np.cumsum([len(topic) for topic in encoded])
+    weights = np.array([entry.weight for entry in entries], dtype=np.float32)
+    if (weights <= 0).any():
+        raise ValueError("Topic weights must be positive")
+    difficulty = np.array([entry.difficulty for entry in entries], dtype=np.float32)
+
+    probability = np.empty(n, dtype=np.float64)
+    alias = np.empty(n, dtype=np.uint32)
+    for category in categories:
+        start, end = category["start"], category["end"]
+        probability[start:end], alias[start:end] = build_alias_table(weights[start:end])
+    global_probability, global_alias = build_alias_table(weights)
+
+    arrays = [
+        ("offsets", offsets),
+        ("strings", None),
+        ("category", category_ids),
+        ("weight", weights),
+        ("difficulty", difficulty),
+        ("probability", probability),
+        ("alias", alias),
+        ("global_probability", global_probability),
+        ("global_alias", global_alias),
+    ]
+    # the sections start after the header, so size the header with placeholders at least as long as the offsets
+    sections = {name: 10**15 for name, _ in arrays}
+    header_size = len(json.dumps({"size": n, "categories": categories, "sections": sections}).encode())
+    position = len(MAGIC) + 8 + header_size
+    for name, array in arrays:
+        position += -position % 8
+        sections[name] = position
+        position += int(offsets[-1]) if array is None else array.nbytes
+    header = json.dumps({"size": n, "categories": categories, "sections": sections}).encode()
+    header += b" " * (header_size - len(header))
+
+    f.write(MAGIC)
+    f.write(np.uint64(len(header)).tobytes())
+    f.write(header)
+    for name, array in arrays:
+        _align(f)
+        f.write(b"".join(encoded) if array is None else array.tobytes())
+
+
+def read_entries(path: str) -> Iterable[TopicEntry]:
+    """Stream the entries of a tab-separated topics file."""
+    with open(path) as f:
+        for line in f:
+            entry = parse_topic_line(line)
+            if entry is not None:
+                yield entry
+
+
+class TopicCatalog:
+    """
+    Memory-mapped topic catalog with O(1) weighted sampling.
+    Args:
+        buffer: The catalog's bytes, a memory map or bytes.
+    """
+
+    def __init__(self, buffer: Union[mmap.mmap, bytes]):
+        if bytes(buffer[: len(MAGIC)]) != MAGIC:
+            raise ValueError("Not a topic catalog")
+        self._buffer = buffer
+        header_size = int(np.frombuffer(buffer, dtype=np.uint64, count=1, offset=len(MAGIC))[0])
+        start = len(MAGIC) + 8
+        header = json.loads(bytes(buffer[start : start + header_size]))
+        self.size: int = header["size"]
+        self.categories: Dict[str, Dict] = {c["name"]: c for c in header["categories"]}
+        sections = header["sections"]
+
+        def view(name: str, dtype, count: int) -> np.ndarray:
+            return np.frombuffer(buffer, dtype=dtype, count=count, offset=sections[name])
+
+        n = self.size
+        self._offsets = view("offsets", np.uint64, n + 1)
+        self._strings = sections["strings"]
+        self._category = view("category", np.uint16, n)
+        self._weight = view("weight", np.float32, n)
+        self._difficulty = view("difficulty", np.float32, n)
+        self._probability = view("probability", np.float64, n)
+        self._alias = view("alias", np.uint32, n)
+        self._global_probability = view("global_probability", np.float64, n)
+        self._global_alias = view("global_alias", np.uint32, n)
+        self._category_names = [c["name"] for c in header["categories"]]
+        # alias tables over the total weights of category selections, built once per selection
+        self._selections: Dict[Tuple[str, ...], Tuple] = {}
+
+    @classmethod
+    def open(cls, path: str) -> "TopicCatalog":
+        """Memory-map a catalog file."""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[TopicEntry]) -> "TopicCatalog":
+        """Build a catalog in memory, e.g. for small or generated topic lists."""
+        f = io.BytesIO()
+        write_catalog(entries, f)
+        return cls(f.getvalue())
+
+    def __len__(self) -> int:
+        return self.size
+
+    def topic(self, i: int) -> str:
+        start = self._strings + int(self._offsets[i])
+        end = self._strings + int(self._offsets[i + 1])
+        return bytes(self._buffer[start:end]).decode()
+
+    def entry(self, i: int) -> TopicEntry:
+        return TopicEntry(
+            topic=self.topic(i),
+            category=self._category_names[self._category[i]] or None,
+            weight=float(self._weight[i]),
+            difficulty=float(self._difficulty[i]),
+        )
+
+    def _sample_category(self, category: Dict, uniform) -> int:
+        start, end = category["start"], category["end"]
+        i = start + int(uniform() * (end - start))
+        if uniform() < self._probability[i]:
+            return i
+        return start + int(self._alias[i])
+
+    def _selection(self, categories: Sequence[str]) -> Tuple:
+        key = tuple(sorted(set(categories)))
+        selection = self._selections.get(key)
+        if selection is None:
+            unknown = [name for name in key if name not in self.categories]
+            if unknown:
+                raise KeyError(f"Unknown topic categories: {unknown}")
+            selected = [self.categories[name] for name in key]
+            probability, alias = build_alias_table(np.array([c["weight"] for c in selected]))
+            selection = self._selections[key] = (selected, probability, alias)
+        return selection
+
+    def sample_index(
+        self, categories: Optional[Sequence[str]] = None, rng: Optional[random.Random] = None
+    ) -> int:
+        """
+        Index of a topic drawn in proportion to its weight.
+        Args:
+            categories: Categories to draw from, all by default.
+            rng: Random number generator, the `random` module's by default.
+        Returns:
+            The topic's index.
+        """
+        uniform = rng.random if rng is not None else random.random
+        if categories is None:
+            i = int(uniform() * self.size)
+            return i if uniform() < self._global_probability[i] else int(self._global_alias[i])
+        selected, probability, alias = self._selection(categories)
+        c = int(uniform() * len(selected))
+        if uniform() >= probability[c]:
+            c = int(alias[c])
+        return self._sample_category(selected[c], uniform)
+
+    def sample(
+        self, categories: Optional[Sequence[str]] = None, rng: Optional[random.Random] = None
+    ) -> str:
+        """A topic drawn in proportion to its weight, see `sample_index`."""
+        return self.topic(self.sample_index(categories, rng))
+
+
+_catalogs: Dict[str, TopicCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(path: Optional[str] = None) -> TopicCatalog:
+    """
+    Shared catalog for a path, opened once per process.
+    Args:
+        path: Catalog file, `TWENTY_QUESTIONS_TOPIC_CATALOG` or the built-in topics by default.
+    Returns:
+        The catalog.
+    """
+    path = path or os.environ.get("TWENTY_QUESTIONS_TOPIC_CATALOG") or ""
+    with _catalogs_lock:
+        catalog = _catalogs.get(path)
+        if catalog is None:
+            if path:
+                catalog = TopicCatalog.open(path)
+            else:
+                catalog = TopicCatalog.from_entries(TopicEntry(topic) for topic in DEFAULT_TOPICS)
+            _catalogs[path] = catalog
+    return catalog
+
+
+def get_random_topic(
+    catalog: Union[TopicCatalog, str, None] = None, categories: Optional[Sequence[str]] = None
+) -> str:
+    """
+    Random topic for the host, drawn in proportion to the topics' weights.
+    Args:
+        catalog: Catalog or path to one, see `get_catalog` for the default.
+        categories: Categories to draw from, all by default.
+    Returns:
+        The topic.
+    """
+    if not isinstance(catalog, TopicCatalog):
+        catalog = get_catalog(catalog)
+    return catalog.sample(categories)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a binary topic catalog.")
+    parser.add_argument("input", help="tab-separated topic, category, weight, difficulty")
+    parser.add_argument("output")
+    args = parser.parse_args()
+
+    with open(args.output, "wb") as f:
+        write_catalog(read_entries(args.input), f)
+    catalog = TopicCatalog.open(args.output)
+    print(f"Wrote {len(catalog)} topics in {len(catalog.categories)} categories to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Token usage accounting.
+
+`TokenUsageCallback` is a LangChain callback handler that counts the model calls of a run and the tokens the provider
+reported for them (`AIMessage.usage_metadata`). Passed in a game's `callbacks`, it sees every chat model call the nodes
+make, including retries and hedged duplicates, since the config is propagated to the roles' runnables.
+"""
+
+import threading
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from pydantic import BaseModel
+
+
+class TokenUsage(BaseModel):
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Counts chat model calls and the tokens reported for them."""
+
+    def __init__(self):
+        self._usage = TokenUsage()
+        self._lock = threading.Lock()
+
+    @property
+    def usage(self) -> TokenUsage:
+        with self._lock:
+            return self._usage.model_copy()
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any):
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+        with self._lock:
+            self._usage.llm_calls += 1
+            self._usage.input_tokens += input_tokens
+            self._usage.output_tokens += output_tokens
@@ -1,5 +1,4 @@
 from langchain_core.runnables.config import RunnableConfig
-from langchain_openai import ChatOpenAI
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
@@ -7,11 +6,12 @@ from agents.v1.nodes import guesser_node_v1, host_node_v1, should_continue
 from agents.v1.prompts import GUESSER_PROMPT_v1, HOST_PROMPT_v1
 from agents.v1.state import GameState
 from agents.v1.models import GuesserQuestion, HostResponse_v1
+from agents.providers import get_chat_model
+from agents.hedging import hedged_structured_output
+from agents.resilience import guarded_structured_output
 
 from dotenv import load_dotenv
 
-load_dotenv()
-
 
 def get_game_graph_v1() -> CompiledStateGraph:
     graph = StateGraph(GameState)
@@ -23,14 +23,28 @@ def get_game_graph_v1() -> CompiledStateGraph:
     return graph.compile()
 
 
-def get_sample_llms_v1():
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=1)
-    host_llm = HOST_PROMPT_v1 | llm.with_structured_output(HostResponse_v1)
-    guesser_llm = GUESSER_PROMPT_v1 | llm.with_structured_output(GuesserQuestion)
+def get_sample_llms_v1(llm=None, hedging: bool = False, hedge_llm=None):
+    """
+    Sample host and guesser LLMs.
+    Args:
+        llm: Chat model used by both roles, gpt-4o-mini by default.
+        hedging: Whether to hedge slow calls, see agents/hedging.py.
+        hedge_llm: Fallback chat model the hedged calls are sent to, `llm` by default.
+    """
+    llm = llm or get_chat_model("gpt-4o-mini", temperature=1)
+
+    def structured_output(schema):
+        if hedging:
+            return hedged_structured_output(llm, schema, hedge_llm)
+        return guarded_structured_output(llm, schema)
+
+    host_llm = HOST_PROMPT_v1 | structured_output(HostResponse_v1)
+    guesser_llm = GUESSER_PROMPT_v1 | structured_output(GuesserQuestion)
     return host_llm, guesser_llm
 
 
 def main():
+    load_dotenv()
     host_llm, guesser_llm = get_sample_llms_v1()
 
     graph = get_game_graph_v1()
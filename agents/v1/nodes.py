@@ -1,6 +1,7 @@
-import random
 import time
 
+from agents.shadow import get_role
+from agents.topics import get_random_topic
 from agents.v1.state import GameState
 from agents.v1.models import GuesserQuestion
 
@@ -9,22 +10,6 @@ from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables.config import RunnableConfig
 
 
-def get_random_topic():
-    topics = [
-        "apple",
-        "banana",
-        "cherry",
-        "dog",
-        "cat",
-        "car",
-        "house",
-        "tree",
-        "flower",
-        "book",
-    ]
-    return random.choice(topics)
-
-
 def host_node_v1(state: GameState, config: RunnableConfig) -> GameState:
     """
     Host node that takes in the guesser's question and answers it.
@@ -44,7 +29,7 @@ def host_node_v1(state: GameState, config: RunnableConfig) -> GameState:
 
     configuration = config.get("configurable", {})
     max_questions = configuration.get("max_questions")
-    host_llm = configuration.get("host_llm")
+    host_llm = get_role(configuration, "host_llm", state)
     topic = configuration.get("topic")
 
     if question_count < max_questions:
@@ -58,7 +43,9 @@ def host_node_v1(state: GameState, config: RunnableConfig) -> GameState:
 
     if question_count == 0 and topic is None:
         # At the very start, choose a random topic if one is not provided
-        topic = get_random_topic()
+        topic = get_random_topic(
+            configuration.get("topic_catalog"), configuration.get("topic_categories")
+        )
         return {
             "next": next,
             "question_count": 0,
@@ -74,7 +61,8 @@ def host_node_v1(state: GameState, config: RunnableConfig) -> GameState:
 
     # At the other steps, answer the guesser's question
     if guesser_question:
-        time.sleep(1)  # for avoiding rate limiting
+        # for avoiding rate limiting, benchmarks with fake LLMs set this to 0
+        time.sleep(configuration.get("rate_limit_delay", 1))
         host_response = host_llm.invoke(
             {"topic": topic, "question": guesser_question.question}
         )
@@ -112,7 +100,7 @@ def guesser_node_v1(state: GameState, config: RunnableConfig) -> GameState:
     question_count = state.get("question_count")
     configuration = config.get("configurable", {})
     max_questions = configuration.get("max_questions")
-    guesser_llm = configuration.get("guesser_llm")
+    guesser_llm = get_role(configuration, "guesser_llm", state)
 
     remaining_questions = max_questions - question_count
     question: GuesserQuestion = guesser_llm.invoke(
@@ -1,5 +1,4 @@
 from langchain_core.runnables.config import RunnableConfig
-from langchain_openai import ChatOpenAI
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
@@ -10,13 +9,15 @@ from agents.v2.prompts import (
     HOST_PROMPT_v1,
     GUESSER_RECOMMENDER_PROMPT_v1,
     GUESSER_EVALUATOR_PROMPT_v2,
+    GUESSER_FUSED_PROMPT,
 )
-from agents.v2.models import HostResponse, PossibleGuesses, GuessOrQuestion
+from agents.v2.models import FusedGuesserOutput, HostResponse, PossibleGuesses, GuessOrQuestion
+from agents.providers import get_chat_model
+from agents.hedging import hedged_structured_output
+from agents.resilience import guarded_structured_output
 
 from dotenv import load_dotenv
 
-load_dotenv()
-
 
 def get_game_graph_v2() -> CompiledStateGraph:
     graph = StateGraph(GameState)
@@ -28,32 +29,42 @@ def get_game_graph_v2() -> CompiledStateGraph:
     return graph.compile()
 
 
-def get_sample_llms_v2(llm):
+def get_sample_llms_v2(llm, hedging: bool = False, hedge_llm=None):
+    """
+    Sample host, recommender and evaluator LLMs.
+    Args:
+        llm: Chat model used by every role.
+        hedging: Whether to hedge slow calls, see agents/hedging.py.
+        hedge_llm: Fallback chat model the hedged calls are sent to, `llm` by default.
+    """
 
-    host_llm = HOST_PROMPT_v1 | llm.with_structured_output(HostResponse).with_retry(
-        retry_if_exception_type=(Exception,),
-        wait_exponential_jitter=True,
-        stop_after_attempt=2,
-    )
-    guesser_recommender_llm = (
-        GUESSER_RECOMMENDER_PROMPT_v1 | llm.with_structured_output(PossibleGuesses)
-    ).with_retry(
-        retry_if_exception_type=(Exception,),
-        wait_exponential_jitter=True,
-        stop_after_attempt=2,
-    )
-    guesser_evaluator_llm = GUESSER_EVALUATOR_PROMPT_v2 | llm.with_structured_output(
-        GuessOrQuestion
-    ).with_retry(
-        retry_if_exception_type=(Exception,),
-        wait_exponential_jitter=True,
-        stop_after_attempt=2,
-    )
+    def structured_output(schema):
+        if hedging:
+            return hedged_structured_output(llm, schema, hedge_llm)
+        return guarded_structured_output(llm, schema)
+
+    host_llm = HOST_PROMPT_v1 | structured_output(HostResponse)
+    guesser_recommender_llm = GUESSER_RECOMMENDER_PROMPT_v1 | structured_output(PossibleGuesses)
+    guesser_evaluator_llm = GUESSER_EVALUATOR_PROMPT_v2 | structured_output(GuessOrQuestion)
     return host_llm, guesser_recommender_llm, guesser_evaluator_llm
 
 
+def get_fused_guesser_llm_v2(llm, hedging: bool = False, hedge_llm=None):
+    """
+    Guesser LLM for `guesser_mode="fused"`, recommending and choosing in one structured call.
+    Args:
+        llm: Chat model of the guesser.
+        hedging: Whether to hedge slow calls, see agents/hedging.py.
+        hedge_llm: Fallback chat model the hedged calls are sent to, `llm` by default.
+    """
+    if hedging:
+        return GUESSER_FUSED_PROMPT | hedged_structured_output(llm, FusedGuesserOutput, hedge_llm)
+    return GUESSER_FUSED_PROMPT | guarded_structured_output(llm, FusedGuesserOutput)
+
+
 def main():
-    base_llm = ChatOpenAI(model="gpt-4o-mini", temperature=1)
+    load_dotenv()
+    base_llm = get_chat_model("gpt-4o-mini", temperature=1)
     host_llm, guesser_recommender_llm, guesser_evaluator_llm = get_sample_llms_v2(base_llm)
     graph = get_game_graph_v2()
     config = RunnableConfig(
@@ -14,6 +14,13 @@ class HostResponse(BaseModel):
         ...,
         description="Host's answer to the Guesser's question. Yes if the question is about the topic, No otherwise.",
     )
+    # None when the model left it out, which the host cascade treats as unsure
+    confidence: Optional[float] = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description="How confident the host is in the answer, from 0 (a guess) to 1 (certain).",
+    )
 
 
 class PossibleGuesses(BaseModel):
@@ -49,5 +56,27 @@ class GuessOrQuestion(BaseModel):
     )
 
 
+class FusedGuesserOutput(BaseModel):
+    """
+    Recommender and evaluator in one call: possible guesses and questions, then the choice between them.
+    """
+
+    guesses: List[str] = Field(
+        ..., description="Possible guesses at the topic, limited to 5."
+    )
+    questions: List[str] = Field(
+        ..., description="Possible questions to the host, limited to 5."
+    )
+    choice: Literal["guess", "question"] = Field(
+        ..., description="Either 'guess' or 'question'."
+    )
+    guess: Optional[str] = Field(
+        ..., description="Guess at the topic if choice is 'guess', one of the guesses."
+    )
+    question: Optional[str] = Field(
+        ..., description="Question to the host if choice is 'question', one of the questions."
+    )
+
+
 class GuesserQuestion(BaseModel):
     question: str = Field(..., description="Guesser's question to the Host.")
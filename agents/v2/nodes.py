@@ -1,30 +1,20 @@
-import random
 import time
 
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables.config import RunnableConfig
 from langgraph.graph import END
 
-from agents.v2.models import GuesserQuestion, PossibleGuesses, GuessOrQuestion
+from agents.shadow import get_role
+from agents.topics import get_random_topic
+from agents.v2.models import (
+    FusedGuesserOutput,
+    GuesserQuestion,
+    PossibleGuesses,
+    GuessOrQuestion,
+)
 from agents.v2.state import GameState
 
 
-def get_random_topic():
-    topics = [
-        "apple",
-        "banana",
-        "cherry",
-        "dog",
-        "cat",
-        "car",
-        "house",
-        "tree",
-        "flower",
-        "book",
-    ]
-    return random.choice(topics)
-
-
 def host_node(state: GameState, config: RunnableConfig) -> GameState:
     """
     Host node that takes in the guesser's question and answers it.
@@ -44,7 +34,7 @@ def host_node(state: GameState, config: RunnableConfig) -> GameState:
 
     configuration = config.get("configurable", {})
     max_questions = configuration.get("max_questions")
-    host_llm = configuration.get("host_llm")
+    host_llm = get_role(configuration, "host_llm", state)
 
     if question_count < max_questions:
         next = "guesser"
@@ -59,7 +49,9 @@ def host_node(state: GameState, config: RunnableConfig) -> GameState:
         topic = configuration.get("topic")
         if topic is None:
             # if the topic is not provided, then choose a random topic
-            topic = get_random_topic()
+            topic = get_random_topic(
+                configuration.get("topic_catalog"), configuration.get("topic_categories")
+            )
         # Else, use the provided topic
         return {
             "next": next,
@@ -104,6 +96,9 @@ def guesser_node(state: GameState, config: RunnableConfig) -> GameState:
 
     Another version of this is to have the recommender and evaluator as two separate agents collaborating.
     We can even model the current interaction as a sub-graph in langgraph.
+
+    With `guesser_mode="fused"` in the configuration, `guesser_fused_llm` comes up with the guesses and questions and
+    chooses between them in a single call, instead of the two serial calls that each get the full history.
     Args:
         state (GameState): Current state of the game.
         config (RunnableConfig): Runtime configuration arguments.
@@ -114,23 +109,28 @@ def guesser_node(state: GameState, config: RunnableConfig) -> GameState:
     question_count = state.get("question_count")
     configuration = config.get("configurable", {})
     max_questions = configuration.get("max_questions")
-    recommender_llm = configuration.get("guesser_recommender_llm")
-    evaluator_llm = configuration.get("guesser_evaluator_llm")
+    recommender_llm = get_role(configuration, "guesser_recommender_llm", state)
+    evaluator_llm = get_role(configuration, "guesser_evaluator_llm", state)
 
     remaining_questions = max_questions - question_count
-    recommender_output: PossibleGuesses = recommender_llm.invoke(
-        {"messages": state.get("messages")}
-    )
-
-    evaluator_output: GuessOrQuestion = evaluator_llm.invoke(
-        {
-            "guesses": recommender_output.guesses,
-            "questions": recommender_output.questions,
-            "messages": state.get("messages"),
-            "question_count": remaining_questions,
-            "input": "Come up with either a guess or question based on the analysis.",
-        }
-    )
+    if configuration.get("guesser_mode", "two_call") == "fused":
+        evaluator_output: FusedGuesserOutput = get_role(configuration, "guesser_fused_llm", state).invoke(
+            {"messages": state.get("messages"), "question_count": remaining_questions}
+        )
+    else:
+        recommender_output: PossibleGuesses = recommender_llm.invoke(
+            {"messages": state.get("messages")}
+        )
+
+        evaluator_output: GuessOrQuestion = evaluator_llm.invoke(
+            {
+                "guesses": recommender_output.guesses,
+                "questions": recommender_output.questions,
+                "messages": state.get("messages"),
+                "question_count": remaining_questions,
+                "input": "Come up with either a guess or question based on the analysis.",
+            }
+        )
     # Convert evaluator output to guesser question
     if evaluator_output.choice == "guess":
         question = GuesserQuestion(question=f"Is it a {evaluator_output.guess}?")
@@ -6,7 +6,7 @@ HOST_PROMPT_v1 = ChatPromptTemplate.from_messages(
     [
         (
             "system",
-            "You are a host of a game show playing the common game 20 qestions. You have chosen the topic '{topic}'. The guesser will ask you a question and you need to answer whether the question is about the topic or not. Respond with Yes if it is about the topic, No otherwise.",
+            "You are a host of a game show playing the common game 20 qestions. You have chosen the topic '{topic}'. The guesser will ask you a question and you need to answer whether the question is about the topic or not. Respond with Yes if it is about the topic, No otherwise. Also rate your confidence in the answer, from 0 (a guess) to 1 (certain).",
         ),
         ("human", "Question: {question}"),
     ]
@@ -78,3 +78,28 @@ GUESSER_EVALUATOR_PROMPT_v2 = ChatPromptTemplate.from_messages(
         ("human", "{input}"),
     ]
 )
+
+# recommender and evaluator in a single call, for guesser_mode="fused"
+GUESSER_FUSED_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            "You are an expert guesser in a game show playing the common game 20 qestions. \
+            The host has chosen a topic which is a specific object or living thing. \
+            Some examples of topics include: apple, car, dog, etc. \
+            First, come up with a list of possible guesses and a list of questions that can be asked to the host. \
+            Then evaluate them and choose one final guess or question, based on the following criteria: \
+            1. At this point in the game, should I be asking a question or making a guess? \
+            2. Do I have enough information to make a guess? \
+            3. Is the question going to help me come closer to guessing the topic or object? \
+            4. Is the guess a specific object or thing? \
+            5. Is the guess going to help me eliminate other potential guesses or similarities? \
+            You have {question_count} questions left. \
+            At no point should you repeat a question that has already been asked. Do not guess the same thing twice either. When a guess is wrong, reevaluate and try to gather more information before guessing again. \
+            ",
+        ),
+        # Messages placeholder inserts the entire conversation history
+        MessagesPlaceholder(variable_name="messages"),
+        ("human", "Come up with possible guesses and questions, then choose either a guess or a question."),
+    ]
+)
@@ -1,5 +1,4 @@
 from langchain_core.runnables.config import RunnableConfig
-from langchain_openai import ChatOpenAI
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from dotenv import load_dotenv
@@ -9,17 +8,20 @@ from agents.v3.state import GameState
 from agents.v3.prompts import (
     HOST_PROMPT,
     RECOMMENDER_PROMPT,
+    INCREMENTAL_RECOMMENDER_PROMPT,
     QUESTION_GENERATOR_PROMPT,
     EVALUATOR_PROMPT
 )
 from agents.v3.models import (
+    CandidateDelta,
     HostResponse,
     RecommenderDecision,
     QuestionGenerator,
     QuestionEvaluation
 )
-
-load_dotenv()
+from agents.providers import get_chat_model
+from agents.hedging import hedged_structured_output
+from agents.resilience import guarded_structured_output
 
 def get_game_graph_v3() -> CompiledStateGraph:
     """Create the game graph with binary search approach"""
@@ -34,47 +36,49 @@ def get_game_graph_v3() -> CompiledStateGraph:
     
     return graph.compile()
 
-def get_sample_llms_v3(llm):
-    """Initialize LLMs with appropriate prompts and structured outputs"""
+def get_sample_llms_v3(llm, hedging: bool = False, hedge_llm=None):
+    """
+    Initialize LLMs with appropriate prompts and structured outputs
+    Args:
+        llm: Chat model used by every role.
+        hedging: Whether to hedge slow calls, see agents/hedging.py.
+        hedge_llm: Fallback chat model the hedged calls are sent to, `llm` by default.
+    """
+
+    def structured_output(schema):
+        if hedging:
+            return hedged_structured_output(llm, schema, hedge_llm)
+        return guarded_structured_output(llm, schema)
     
     # Host LLM
-    host_llm = HOST_PROMPT | llm.with_structured_output(HostResponse).with_retry(
-        retry_if_exception_type=(Exception,),
-        wait_exponential_jitter=True,
-        stop_after_attempt=2,
-    )
+    host_llm = HOST_PROMPT | structured_output(HostResponse)
     
     # Recommender LLM - decides whether to guess or question
-    recommender_llm = RECOMMENDER_PROMPT | llm.with_structured_output(
-        RecommenderDecision
-    ).with_retry(
-        retry_if_exception_type=(Exception,),
-        wait_exponential_jitter=True,
-        stop_after_attempt=2,
-    )
+    recommender_llm = RECOMMENDER_PROMPT | structured_output(RecommenderDecision)
     
     # Question Generator LLM - creates binary search style questions
-    question_generator_llm = QUESTION_GENERATOR_PROMPT | llm.with_structured_output(
-        QuestionGenerator
-    ).with_retry(
-        retry_if_exception_type=(Exception,),
-        wait_exponential_jitter=True,
-        stop_after_attempt=2,
-    )
+    question_generator_llm = QUESTION_GENERATOR_PROMPT | structured_output(QuestionGenerator)
     
     # Evaluator LLM - assesses question quality
-    evaluator_llm = EVALUATOR_PROMPT | llm.with_structured_output(
-        QuestionEvaluation
-    ).with_retry(
-        retry_if_exception_type=(Exception,),
-        wait_exponential_jitter=True,
-        stop_after_attempt=2,
-    )
+    evaluator_llm = EVALUATOR_PROMPT | structured_output(QuestionEvaluation)
     
     return host_llm, recommender_llm, question_generator_llm, evaluator_llm
 
+def get_incremental_recommender_llm_v3(llm, hedging: bool = False, hedge_llm=None):
+    """
+    Recommender LLM for `recommender_mode="incremental"`, updating the candidates from the latest answer only.
+    Args:
+        llm: Chat model of the recommender.
+        hedging: Whether to hedge slow calls, see agents/hedging.py.
+        hedge_llm: Fallback chat model the hedged calls are sent to, `llm` by default.
+    """
+    if hedging:
+        return INCREMENTAL_RECOMMENDER_PROMPT | hedged_structured_output(llm, CandidateDelta, hedge_llm)
+    return INCREMENTAL_RECOMMENDER_PROMPT | guarded_structured_output(llm, CandidateDelta)
+
 def main():
-    base_llm = ChatOpenAI(model="gpt-4", temperature=0.7)
+    load_dotenv()
+    base_llm = get_chat_model("gpt-4", temperature=0.7)
     
     host_llm, recommender_llm, question_generator_llm, evaluator_llm = get_sample_llms_v3(base_llm)
 
@@ -13,6 +13,13 @@ class HostResponse(BaseModel):
         ...,
         description="Host's answer to the Guesser's question. Yes if the question is about the topic, No otherwise.",
     )
+    # None when the model left it out, which the host cascade treats as unsure
+    confidence: Optional[float] = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description="How confident the host is in the answer, from 0 (a guess) to 1 (certain).",
+    )
 
 
 class GuesserQuestion(BaseModel):
@@ -36,6 +43,26 @@ class RecommenderDecision(BaseModel):
     )
 
 
+class CandidateDelta(BaseModel):
+    """Incremental recommender's update of the carried-over candidates after the latest answer"""
+
+    decision: Literal["guess", "question"] = Field(
+        ..., description="Whether to make a guess or ask a question"
+    )
+    additions: List[str] = Field(
+        ..., description="New candidates consistent with every answer so far"
+    )
+    removals: List[str] = Field(
+        ..., description="Current candidates ruled out by the latest answer"
+    )
+    confidence_scores: Optional[dict[str, float]] = Field(
+        default=None, description="Updated confidence scores for the remaining and added candidates"
+    )
+    reasoning: str = Field(
+        ..., description="Reasoning behind the decision and the changes"
+    )
+
+
 class QuestionGenerator(BaseModel):
     """Generates a question that aims to split the candidate pool"""
 
@@ -43,11 +70,11 @@ class QuestionGenerator(BaseModel):
         ...,
         description="Question that should help eliminate roughly half of candidates",
     )
-    expected_elimination: List[str] = Field(
-        ..., description="Candidates that would be eliminated by a NO answer"
+    yes_candidates: List[str] = Field(
+        ..., description="Candidates for which the answer to the question is Yes"
     )
-    expected_retention: List[str] = Field(
-        ..., description="Candidates that would be retained by a YES answer"
+    no_candidates: List[str] = Field(
+        ..., description="Candidates for which the answer to the question is No"
     )
 
 
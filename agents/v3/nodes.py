@@ -1,35 +1,22 @@
-import random
 import time
 
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables.config import RunnableConfig
 from langgraph.graph import END
 
+from agents.shadow import get_role
+from agents.topics import get_random_topic
 from agents.v3.models import (
+    CandidateDelta,
     GuesserQuestion,
     QuestionGenerator,
     QuestionEvaluation,
     RecommenderDecision,
 )
+from agents.v3.posterior import GUESS_THRESHOLD, CandidatePosterior
 from agents.v3.state import GameState
 
 
-def get_random_topic():
-    topics = [
-        "apple",
-        "banana",
-        "cherry",
-        "dog",
-        "cat",
-        "car",
-        "house",
-        "tree",
-        "flower",
-        "book",
-    ]
-    return random.choice(topics)
-
-
 def host_node(state: GameState, config: RunnableConfig) -> GameState:
     """
     Host node that takes in the guesser's question and answers it.
@@ -49,7 +36,7 @@ def host_node(state: GameState, config: RunnableConfig) -> GameState:
 
     configuration = config.get("configurable", {})
     max_questions = configuration.get("max_questions")
-    host_llm = configuration.get("host_llm")
+    host_llm = get_role(configuration, "host_llm", state)
 
     if question_count < max_questions:
         next = "guesser"
@@ -64,7 +51,9 @@ def host_node(state: GameState, config: RunnableConfig) -> GameState:
         topic = configuration.get("topic")
         if topic is None:
             # if the topic is not provided, then choose a random topic
-            topic = get_random_topic()
+            topic = get_random_topic(
+                configuration.get("topic_catalog"), configuration.get("topic_categories")
+            )
         # Else, use the provided topic
         return {
             "next": next,
@@ -101,37 +90,129 @@ def host_node(state: GameState, config: RunnableConfig) -> GameState:
         }
 
 
-def guesser_node(state: GameState, config: RunnableConfig) -> GameState:
+def recommend_incremental(state: GameState, incremental_recommender_llm) -> RecommenderDecision:
     """
-    Enhanced guesser node with binary search approach
+    Update the carried-over candidates with the newest question and answer only.
+    The incremental recommender sees the candidates with their scores and the latest Q/A pair instead of the whole history,
+    and returns additions and removals, so its prompt stays the same size however long the game gets.
+    Args:
+        state (GameState): Current state of the game.
+        incremental_recommender_llm: Runnable returning a `CandidateDelta`.
+
+    Returns:
+        RecommenderDecision: The updated candidates and their scores.
     """
-    configuration = config.get("configurable", {})
-    recommender_llm = configuration.get("recommender_llm")
-    question_generator_llm = configuration.get("question_generator_llm")
-    evaluator_llm = configuration.get("evaluator_llm")
+    candidates = state.get("candidates") or []
+    scores = state.get("candidate_scores") or {}
+    messages = state.get("messages") or []
+    # the guesser's last question and the host's answer to it
+    question, answer = (messages[-2].content, messages[-1].content) if len(messages) >= 2 else ("none", "none")
 
-    # Step 1: Get recommendation
-    recommender_output: RecommenderDecision = recommender_llm.invoke(
+    delta: CandidateDelta = incremental_recommender_llm.invoke(
         {
-            "messages": state.get("messages"),
-            "candidates": state.get("candidates"),
+            "candidates": "\n".join(f"- {c}: {scores.get(c, 0.0):.2f}" for c in candidates)
+            or "none yet",
+            "question": question,
+            "answer": answer,
+            "question_count": state.get("question_count"),
         }
     )
+    removals = set(delta.removals)
+    kept = [c for c in candidates if c not in removals]
+    updated = kept + [c for c in dict.fromkeys(delta.additions) if c not in kept]
+    scores = {c: scores[c] for c in updated if c in scores}
+    scores.update({c: s for c, s in (delta.confidence_scores or {}).items() if c in updated})
+    return RecommenderDecision(
+        decision=delta.decision,
+        possible_candidates=updated,
+        confidence_scores=scores,
+        reasoning=delta.reasoning,
+    )
 
-    if recommender_output.decision == "guess":
-        # Make a guess based on highest confidence candidate - if the confidence score is greater than 90%, then make a guess
-        best_candidate_index = recommender_output.confidence_scores.index(
-            max(recommender_output.confidence_scores)
+
+def update_posterior(state: GameState, noise: float = 0.1) -> CandidatePosterior:
+    """
+    Update the posterior with the host's answer to the guesser's last question.
+    Args:
+        state (GameState): Current state of the game.
+        noise: Probability that an answer disagrees with the question's expected split.
+
+    Returns:
+        CandidatePosterior: The posterior after the answer.
+    """
+    posterior = state.get("posterior") or CandidatePosterior()
+    pending = state.get("pending_split") or {}
+    messages = state.get("messages") or []
+    if not pending or not messages:
+        return posterior
+    content = messages[-1].content
+    answer_yes = getattr(content, "value", content) == "Yes"
+    if "guess" in pending:
+        # the game would have ended on Yes
+        return posterior.rule_out(pending["guess"])
+    return posterior.update(pending["yes"], pending["no"], answer_yes, noise)
+
+
+def guesser_node(state: GameState, config: RunnableConfig) -> GameState:
+    """
+    Enhanced guesser node with binary search approach
+
+    With `recommender_mode="incremental"` in the configuration, `incremental_recommender_llm` updates the carried-over
+    candidates from the latest answer instead of `recommender_llm` re-deriving them from the whole history.
+
+    Whether to guess is decided by `guess_policy` in the configuration:
+    - "posterior" (default): guess the most likely candidate of the local posterior (agents/v3/posterior.py) once its
+      probability reaches `guess_threshold`, or on the last question.
+    - "recommender": guess when the recommender decides to and its best confidence score is above `guess_threshold` (0.9).
+    """
+    configuration = config.get("configurable", {})
+    recommender_llm = get_role(configuration, "recommender_llm", state)
+    question_generator_llm = get_role(configuration, "question_generator_llm", state)
+    evaluator_llm = get_role(configuration, "evaluator_llm", state)
+    question_count = state.get("question_count")
+    remaining_questions = configuration.get("max_questions") - question_count
+    guess_policy = configuration.get("guess_policy", "posterior")
+
+    posterior = update_posterior(state, configuration.get("answer_noise", 0.1))
+
+    # Step 1: Get recommendation
+    if configuration.get("recommender_mode", "full") == "incremental":
+        recommender_output = recommend_incremental(
+            state, get_role(configuration, "incremental_recommender_llm", state)
         )
-        best_candidate = recommender_output.possible_candidates[best_candidate_index]
-        if recommender_output.confidence_scores[best_candidate_index] > 0.9:
-            return {
-                "guesser_question": GuesserQuestion(question=f"Is it a {best_candidate}?"),
-                "messages": [AIMessage(content=f"Is it a {best_candidate}?")],
-                "question_count": state.get("question_count") + 1,
-                "candidates": recommender_output.possible_candidates,
+    else:
+        recommender_output: RecommenderDecision = recommender_llm.invoke(
+            {
+                "messages": state.get("messages"),
+                "candidates": state.get("candidates"),
             }
-    
+        )
+    candidate_scores = recommender_output.confidence_scores or {}
+    posterior = posterior.sync(recommender_output.possible_candidates)
+
+    best_candidate = None
+    if guess_policy == "posterior":
+        candidate, probability = posterior.best()
+        threshold = configuration.get("guess_threshold", GUESS_THRESHOLD)
+        if candidate is not None and (probability >= threshold or remaining_questions <= 1):
+            best_candidate = candidate
+    elif recommender_output.decision == "guess" and candidate_scores:
+        # Make a guess based on highest confidence candidate - if the confidence score is greater than 90%, then make a guess
+        candidate = max(candidate_scores, key=candidate_scores.get)
+        if candidate_scores[candidate] > configuration.get("guess_threshold", 0.9):
+            best_candidate = candidate
+
+    if best_candidate is not None:
+        return {
+            "guesser_question": GuesserQuestion(question=f"Is it a {best_candidate}?"),
+            "messages": [AIMessage(content=f"Is it a {best_candidate}?")],
+            "question_count": question_count + 1,
+            "candidates": recommender_output.possible_candidates,
+            "candidate_scores": candidate_scores,
+            "posterior": posterior,
+            "pending_split": {"guess": best_candidate},
+        }
+
     # Step 2: Generate binary search question
     question_output: QuestionGenerator = question_generator_llm.invoke(
         {
@@ -146,8 +227,8 @@ def guesser_node(state: GameState, config: RunnableConfig) -> GameState:
         {
             "candidates": recommender_output.possible_candidates,
             "question": question_output.question,
-            "expected_elimination": question_output.expected_elimination,
-            "expected_retention": question_output.expected_retention,
+            "yes_candidates": question_output.yes_candidates,
+            "no_candidates": question_output.no_candidates,
             "messages": state.get("messages"),
         }
     )
@@ -165,8 +246,15 @@ def guesser_node(state: GameState, config: RunnableConfig) -> GameState:
     return {
         "guesser_question": GuesserQuestion(question=question_output.question),
         "messages": [AIMessage(content=question_output.question)],
-        "question_count": state.get("question_count") + 1,
+        "question_count": question_count + 1,
         "candidates": recommender_output.possible_candidates,
+        "candidate_scores": candidate_scores,
+        "posterior": posterior,
+        # the answer to this question updates the posterior on the next turn
+        "pending_split": {
+            "yes": question_output.yes_candidates,
+            "no": question_output.no_candidates,
+        },
     }
 
 
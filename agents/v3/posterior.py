@@ -0,0 +1,100 @@
+"""
+Local posterior over the v3 guesser's candidates.
+
+The recommender's confidence scores are numbers the LLM made up, so a fixed threshold on them says little about how
+likely a guess is to be right. `CandidatePosterior` keeps a probability for every candidate instead, plus the mass of
+the topic being none of them, and updates it with Bayes' rule from the host's answers:
+- after a question, with the question generator's expected split: candidates for which the answer is Yes
+  (`yes_candidates`) and No (the rest of `no_candidates`). The answer agrees with the split with probability
+  `1 - noise`, to allow for wrong splits and wrong host answers; candidates outside the split are not informed.
+- after a wrong guess, the guessed candidate is all but ruled out.
+
+The guesser commits to the most likely candidate as soon as its probability reaches the guess threshold.
+`evals/calibration.py` checks the probabilities against recorded games.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+# probability that the answer to a direct guess is wrong
+GUESS_NOISE = 0.01
+
+# A guess costs one question like any other and ends the game with the candidate's probability, while a question
+# can at best halve the uncertainty. Once a candidate is more likely than everything else together, guessing it is the
+# better question.
+GUESS_THRESHOLD = 0.5
+
+
+class CandidatePosterior(BaseModel):
+    probabilities: Dict[str, float] = {}
+    other: float = 0.3  # probability that the topic is none of the candidates
+
+    def _normalize(self):
+        total = sum(self.probabilities.values()) + self.other
+        if total <= 0:
+            return
+        self.probabilities = {c: p / total for c, p in self.probabilities.items()}
+        self.other /= total
+
+    def sync(self, candidates: List[str]) -> "CandidatePosterior":
+        """
+        Follow the recommender's candidate list: dropped candidates go, new ones get the average candidate's probability.
+        Args:
+            candidates: The recommender's current candidates.
+        Returns:
+            The updated posterior.
+        """
+        kept = {c: p for c, p in self.probabilities.items() if c in candidates}
+        new = [c for c in dict.fromkeys(candidates) if c not in kept]
+        if new:
+            # with no evidence yet, the candidates share what the topic being unlisted does not take
+            share = (sum(kept.values()) / len(kept)) if kept else (1 - self.other) / len(new)
+            kept.update({c: share for c in new})
+        posterior = CandidatePosterior(probabilities=kept, other=self.other)
+        posterior._normalize()
+        return posterior
+
+    def update(
+        self, yes: List[str], no: List[str], answer_yes: bool, noise: float = 0.1
+    ) -> "CandidatePosterior":
+        """
+        Bayes update with the answer to a question that was expected to split the candidates.
+        Args:
+            yes: Candidates for which the answer is expected to be Yes.
+            no: Candidates for which the answer is expected to be No.
+            answer_yes: Whether the host answered Yes.
+            noise: Probability that the answer disagrees with the expected split.
+        Returns:
+            The updated posterior.
+        """
+        yes, no = set(yes), set(no) - set(yes)
+        agree, disagree = 1 - noise, noise
+        probabilities = {}
+        for candidate, p in self.probabilities.items():
+            if candidate in yes:
+                p *= agree if answer_yes else disagree
+            elif candidate in no:
+                p *= disagree if answer_yes else agree
+            else:
+                p *= 0.5
+            probabilities[candidate] = p
+        posterior = CandidatePosterior(probabilities=probabilities, other=self.other * 0.5)
+        posterior._normalize()
+        return posterior
+
+    def rule_out(self, candidate: str, noise: float = GUESS_NOISE) -> "CandidatePosterior":
+        """Update after the host answered No to a direct guess of `candidate`."""
+        probabilities = {
+            c: p * (noise if c == candidate else 1 - noise) for c, p in self.probabilities.items()
+        }
+        posterior = CandidatePosterior(probabilities=probabilities, other=self.other * (1 - noise))
+        posterior._normalize()
+        return posterior
+
+    def best(self) -> Tuple[Optional[str], float]:
+        """The most likely candidate and its probability, (None, 0) without candidates."""
+        if not self.probabilities:
+            return None, 0.0
+        candidate = max(self.probabilities, key=self.probabilities.get)
+        return candidate, self.probabilities[candidate]
@@ -5,7 +5,7 @@ HOST_PROMPT = ChatPromptTemplate.from_messages(
     [
         (
             "system",
-            "You are a host of a game show playing the common game 20 qestions. You have chosen the topic '{topic}'. The guesser will ask you a question and you need to answer whether the question is about the topic or not. Respond with Yes if it is about the topic, No otherwise.",
+            "You are a host of a game show playing the common game 20 qestions. You have chosen the topic '{topic}'. The guesser will ask you a question and you need to answer whether the question is about the topic or not. Respond with Yes if it is about the topic, No otherwise. Also rate your confidence in the answer, from 0 (a guess) to 1 (certain).",
         ),
         ("human", "Question: {question}"),
     ]
@@ -34,6 +34,30 @@ RECOMMENDER_PROMPT = ChatPromptTemplate.from_messages(
     ]
 )
 
+# only the carried-over candidates and the newest question and answer, so the prompt does not grow with the game
+INCREMENTAL_RECOMMENDER_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You are a strategic recommender in a 20 questions game. You keep a list of candidates for the topic
+            consistent with every answer so far, and update it after each answer. Your goal is to:
+            1. Remove the candidates ruled out by the latest answer, and add new candidates consistent with it.
+            2. Update the confidence scores of the remaining candidates.
+            3. Decide whether to make a guess or continue questioning.
+
+            Only recommend guessing if confidence is very high (>90%) for a specific candidate.
+            Questions asked so far: {question_count}
+            Current candidates with confidence scores:
+            {candidates}
+        """,
+        ),
+        (
+            "human",
+            "Latest question: {question}\nAnswer: {answer}\nWhich candidates should be removed or added, and should we guess or continue questioning?",
+        ),
+    ]
+)
+
 QUESTION_GENERATOR_PROMPT = ChatPromptTemplate.from_messages(
     [
         (
@@ -48,6 +72,9 @@ QUESTION_GENERATOR_PROMPT = ChatPromptTemplate.from_messages(
             2. Each question should target a property that divides the candidate pool
             3. Avoid questions that only eliminate 1-2 candidates
             4. Consider previous questions to avoid repetition
+            
+            Along with the question, list the candidates for which the answer would be Yes (yes_candidates)
+            and those for which it would be No (no_candidates).
         """,
         ),
         MessagesPlaceholder(variable_name="messages"),
@@ -70,8 +97,8 @@ EVALUATOR_PROMPT = ChatPromptTemplate.from_messages(
             
             Current candidates: {candidates}
             Proposed question: {question}
-            Expected elimination: {expected_elimination}
-            Expected retention: {expected_retention}
+            Candidates for which the answer is Yes: {yes_candidates}
+            Candidates for which the answer is No: {no_candidates}
         """,
         ),
         MessagesPlaceholder(variable_name="messages"),
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 from langgraph.graph import MessagesState
 from pydantic import BaseModel
 
@@ -12,3 +12,6 @@ class GameState(MessagesState):
     correct_guess: bool = False  # useful for evaluation
     error: str = ""
     candidates: List[str] = []  # Track current candidates
+    candidate_scores: Dict[str, float] = {}  # carried over by the incremental recommender
+    posterior: BaseModel = None  # local posterior over the candidates, see agents/v3/posterior.py
+    pending_split: Dict = {}  # expected answers to the last question, to update the posterior with
@@ -0,0 +1,60 @@
+"""
+Time of the paired bootstrap comparison of two evaluation runs.
+
+Builds two synthetic runs of the same topics, the candidate slightly better, and times `compare_runs` on them.
+
+Usage:
+    python -m benchmarks.bootstrap --games 100000 --resamples 10000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from evals.compare import compare_runs, print_comparison
+from evals.results import GameResult, ResultStore
+
+
+def _run(games: int, topics: int, success_rate: float, seed: int) -> ResultStore:
+    rng = np.random.default_rng(seed)
+    correct = rng.random(games) < success_rate
+    num_questions = np.where(correct, rng.integers(1, 21, games), 20)
+    total_time = rng.gamma(4.0, 5.0, games)
+    tokens = num_questions * rng.integers(300, 700, games)
+    store = ResultStore(capacity=games, keep_transcripts=False)
+    for i in range(games):
+        store.append(
+            GameResult(
+                topic=f"topic-{i % topics}",
+                correct_guess=bool(correct[i]),
+                num_questions=int(num_questions[i]),
+                error=None,
+                total_time=float(total_time[i]),
+                messages=[],
+                input_tokens=int(tokens[i]),
+            )
+        )
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the paired bootstrap comparison.")
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--resamples", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    baseline = _run(args.games, args.topics, 0.60, args.seed)
+    candidate = _run(args.games, args.topics, 0.61, args.seed + 1)
+
+    start = time.perf_counter()
+    comparison = compare_runs(baseline, candidate, args.resamples, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    print_comparison(comparison)
+    print(f"{args.resamples} resamples of {comparison.pairs} pairs in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
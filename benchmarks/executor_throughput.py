@@ -0,0 +1,77 @@
+"""
+Evaluation throughput with the StateGraph and with the direct-loop executor.
+
+Runs `TwentyQuestionsEvaluator` with zero-latency fake LLMs, once with `executor="graph"` and once with
+`executor="loop"`, for each of v1, v2 and v3, and reports games per second and microseconds per node step.
+The fakes ask every topic in DEFAULT_GUESSES in turn, so games take between 1 and 20 questions.
+
+Usage:
+    python -m benchmarks.executor_throughput --games 500
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from agents.fakes import DEFAULT_GUESSES, get_fake_configurable
+from evals.evaluation import TwentyQuestionsEvaluator
+
+# topics the fakes never guess run out of questions, the longest games
+TOPICS = DEFAULT_GUESSES + ["spaceship", "volcano"]
+
+
+def run(version: str, executor: str, games: int, workers: int):
+    config = {
+        "configurable": {
+            **get_fake_configurable(version),
+            "max_questions": 20,
+            "rate_limit_delay": 0,
+        },
+        "recursion_limit": 50,
+    }
+    evaluator = TwentyQuestionsEvaluator(
+        test_topics=TOPICS,
+        num_runs=max(games // len(TOPICS), 1),
+        config=config,
+        agent_version=version,
+        executor=executor,
+    )
+    evaluator.max_workers = workers
+
+    start = time.perf_counter()
+    results = evaluator.run_evaluation(compute_metrics=False)
+    seconds = time.perf_counter() - start
+
+    # every question is a guesser step and a host step, plus the host's first step
+    steps = int(results.num_questions.sum()) * 2 + len(results)
+    return len(results), seconds, steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare evaluator throughput of the graph and the loop executor.")
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=1, help="evaluator threads (1 measures pure overhead)")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    print(f"{'version':<8} {'executor':<8} {'games/sec':>10} {'us/step':>9}")
+    for version in ("v1", "v2", "v3"):
+        rates = {}
+        for executor in ("graph", "loop"):
+            # the v1 and v3 nodes print every turn, and tqdm draws a progress bar
+            stderr, stdout = sys.stderr, sys.stdout
+            with open(os.devnull, "w") as devnull:
+                sys.stderr = sys.stdout = devnull
+                try:
+                    games, seconds, steps = run(version, executor, args.games, args.workers)
+                finally:
+                    sys.stderr, sys.stdout = stderr, stdout
+            rates[executor] = games / seconds
+            print(f"{version:<8} {executor:<8} {games / seconds:>10.0f} {seconds * 1e6 / steps:>9.0f}")
+        print(f"{version}: loop executor is {rates['loop'] / rates['graph']:.1f}x the graph's throughput")
+
+
+if __name__ == "__main__":
+    main()
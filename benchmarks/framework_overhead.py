@@ -0,0 +1,252 @@
+"""
+Per-turn framework overhead of the v1, v2 and v3 game graphs.
+
+The LLMs are replaced with zero-latency fakes (see agents/fakes.py), so every microsecond measured here is spent
+in LangGraph dispatch, state merging, Pydantic validation and prompt rendering.
+
+Reports:
+- microseconds per node step for games of 1-20 turns (scaling with history length),
+- peak traced memory per turn, and the blocks a game allocates and still holds at its end per turn (retained blocks,
+  counted before garbage collection; tracemalloc only sees live blocks, so blocks freed within the game are not counted),
+- throughput with many concurrent games,
+- a breakdown of the `add_messages` reducer, Pydantic validation and prompt rendering at the longest history.
+
+Timings are normalized by a fixed pure-Python workload timed alongside them, so the stored baseline can be compared across machines.
+`--check` exits with an error if any normalized timing, peak memory or retained blocks per turn regressed by more than
+`--tolerance` against the baseline.
+
+Usage:
+    python -m benchmarks.framework_overhead --check
+    python -m benchmarks.framework_overhead --save-baseline
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph.message import add_messages
+
+from agents.fakes import get_fake_configurable
+from agents.v1.agent import get_game_graph_v1
+from agents.v2.agent import get_game_graph_v2
+from agents.v2.models import GuessOrQuestion
+from agents.v2.prompts import GUESSER_EVALUATOR_PROMPT_v2
+from agents.v3.agent import get_game_graph_v3
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "framework_overhead.json")
+
+GRAPHS = {"v1": get_game_graph_v1, "v2": get_game_graph_v2, "v3": get_game_graph_v3}
+TURNS = (1, 5, 10, 20)
+TOPIC = "zebra"
+
+
+def _config(version: str, turns: int) -> dict:
+    # the guesser only names the topic on the last turn
+    guesses = [f"thing{i}" for i in range(turns - 1)] + [TOPIC]
+    return {
+        "configurable": {
+            **get_fake_configurable(version, guesses=guesses),
+            "max_questions": 20,
+            "topic": TOPIC,
+            "rate_limit_delay": 0,
+        },
+        "recursion_limit": 100,
+    }
+
+
+def _play(graph, config) -> int:
+    """Play a game, returning the number of node steps."""
+    return sum(1 for _ in graph.stream({"question_count": 0, "messages": []}, config))
+
+
+def _calibration_workload():
+    """Fixed pure-Python workload, the unit timings are normalized by."""
+    total = 0
+    for i in range(100_000):
+        total += i % 7
+    return {str(i): i for i in range(10_000)}
+
+
+def _time(fn: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def _best_of(fn: Callable[[], object], repeats: int) -> Tuple[float, float]:
+    """
+    Best time of fn over the repeats, in seconds and in calibration units.
+    The calibration workload is timed right before every repeat,
+    so CPU frequency changes and noisy neighbours affect both sides of the ratio.
+    """
+    best_seconds, best_units = float("inf"), float("inf")
+    for _ in range(repeats):
+        calibration = _time(_calibration_workload)
+        seconds = _time(fn)
+        best_seconds = min(best_seconds, seconds)
+        best_units = min(best_units, seconds / calibration)
+    return best_seconds, best_units
+
+
+def _silenced(fn):
+    """Run fn with stdout discarded (the v1 and v3 nodes print every turn)."""
+    stdout = sys.stdout
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            return fn()
+        finally:
+            sys.stdout = stdout
+
+
+def _allocated_blocks(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> int:
+    """Blocks allocated between two snapshots and still allocated at the second, tracemalloc's own excluded."""
+    own = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diff = after.filter_traces(own).compare_to(before.filter_traces(own), "filename")
+    return sum(stat.count_diff for stat in diff)
+
+
+def measure_turns(version: str, repeats: int) -> Dict[str, dict]:
+    graph = GRAPHS[version]()
+    results = {}
+    for turns in TURNS:
+        config = _config(version, turns)
+        steps = _silenced(lambda: _play(graph, config))
+        seconds, units = _silenced(lambda: _best_of(lambda: _play(graph, config), repeats))
+
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        _silenced(lambda: _play(graph, config))
+        _, peak = tracemalloc.get_traced_memory()
+        # diffed before anything is collected, so blocks only reachable from reference cycles still count
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        blocks = _allocated_blocks(before, after)
+        results[str(turns)] = {
+            "steps": steps,
+            "us_per_step": seconds * 1e6 / steps,
+            "units_per_step": units / steps,
+            "peak_kib_per_turn": peak / 1024 / turns,
+            "retained_blocks_per_turn": blocks / turns,
+        }
+    return results
+
+
+def measure_concurrency(version: str, games: int, workers: int) -> float:
+    graph = GRAPHS[version]()
+    config = _config(version, 10)
+
+    def run_all():
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda _: _play(graph, config), range(games)))
+
+    return games / _silenced(lambda: _time(run_all))
+
+
+def measure_components(history: int, repeats: int) -> Dict[str, dict]:
+    messages = []
+    for i in range(history):
+        messages += [AIMessage(content=f"Is it a thing{i}?", id=f"a{i}"), HumanMessage(content="No", id=f"h{i}")]
+    new_message = [AIMessage(content="Is it a zebra?")]
+    evaluator_output = {"choice": "guess", "guess": "zebra", "question": None, "analysis": None}
+    prompt_inputs = {
+        "guesses": ["zebra", "horse"],
+        "questions": ["Is it striped?"],
+        "messages": messages,
+        "question_count": 20 - history,
+        "input": "Come up with either a guess or question based on the analysis.",
+    }
+    n = 200
+    components = {
+        "add_messages": lambda: add_messages(messages, new_message),
+        "pydantic_validation": lambda: GuessOrQuestion.model_validate(evaluator_output),
+        "prompt_rendering": lambda: GUESSER_EVALUATOR_PROMPT_v2.invoke(prompt_inputs),
+    }
+    results = {}
+    for name, fn in components.items():
+        seconds, units = _best_of(lambda: [fn() for _ in range(n)], repeats)
+        results[name] = {"us": seconds * 1e6 / n, "units": units / n}
+    return results
+
+
+def _normalized(report: dict) -> Dict[str, float]:
+    """The metrics that are checked against the baseline: timings in calibration units, and memory per turn."""
+    values = {
+        f"{version}.{turns}.{metric}": row[metric]
+        for version, rows in report["turns"].items()
+        for turns, row in rows.items()
+        for metric in ("units_per_step", "peak_kib_per_turn", "retained_blocks_per_turn")
+    }
+    values.update(
+        {f"component.{name}": row["units"] for name, row in report["components"].items()}
+    )
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-turn framework overhead.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--concurrent-games", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--check", action="store_true", help="fail on regressions against the baseline")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    report = {
+        "calibration_us": min(_time(_calibration_workload) for _ in range(5)) * 1e6,
+        "turns": {version: measure_turns(version, args.repeats) for version in GRAPHS},
+        "concurrent_games_per_sec": {
+            version: measure_concurrency(version, args.concurrent_games, args.workers)
+            for version in GRAPHS
+        },
+        "components": measure_components(max(TURNS), args.repeats),
+    }
+
+    print(f"Calibration workload: {report['calibration_us']:.0f}us")
+    print(f"{'version':<8} {'turns':>5} {'us/step':>9} {'peak KiB/turn':>14} {'retained blocks/turn':>21}")
+    for version, rows in report["turns"].items():
+        for turns, row in rows.items():
+            print(
+                f"{version:<8} {turns:>5} {row['us_per_step']:>9.0f} "
+                f"{row['peak_kib_per_turn']:>14.1f} {row['retained_blocks_per_turn']:>21.1f}"
+            )
+    for version, rate in report["concurrent_games_per_sec"].items():
+        print(f"{version}: {rate:.0f} games/sec with {args.workers} workers (10 turns)")
+    for name, row in report["components"].items():
+        print(f"{name} ({max(TURNS)} turn history): {row['us']:.1f}us")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+
+    if args.check:
+        with open(args.baseline) as f:
+            baseline = _normalized(json.load(f))
+        current = _normalized(report)
+        regressions = {
+            name: current[name] / baseline[name] - 1
+            for name in baseline
+            if name in current and current[name] > baseline[name] * (1 + args.tolerance)
+        }
+        for name, regression in regressions.items():
+            print(f"REGRESSION {name}: {regression:+.0%} against the baseline")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
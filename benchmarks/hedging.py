@@ -0,0 +1,91 @@
+"""
+Tail latency of games with and without hedged requests.
+
+Every call sleeps for a simulated provider latency: lognormal around `--median` seconds,
+with `--slow-rate` of the calls `--slow-factor` times slower. A game is a chain of `--calls-per-game` serial calls
+(a 20 question v2 game makes up to 60). Reports per-call and per-game p50/p99 with and without hedging,
+and the extra call rate hedging costs.
+
+Usage:
+    python -m benchmarks.hedging --games 200
+"""
+
+import argparse
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from langchain_core.runnables import RunnableLambda
+
+from agents.hedging import Hedger, LatencyTracker, with_hedging
+
+
+def _provider(median: float, slow_rate: float, slow_factor: float, seed: int):
+    rng = random.Random(seed)
+
+    def call(input):
+        latency = rng.lognormvariate(0, 0.25) * median
+        if rng.random() < slow_rate:
+            latency *= slow_factor
+        time.sleep(latency)
+        return input
+
+    return RunnableLambda(call)
+
+
+def _quantile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def run(runnable, games: int, calls_per_game: int, workers: int):
+    call_latencies = []
+
+    def play(_):
+        start = time.perf_counter()
+        for i in range(calls_per_game):
+            call_start = time.perf_counter()
+            runnable.invoke(i)
+            call_latencies.append(time.perf_counter() - call_start)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        game_latencies = list(executor.map(play, range(games)))
+    return call_latencies, game_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the tail latency hedged requests save.")
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--calls-per-game", type=int, default=40)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--median", type=float, default=0.01)
+    parser.add_argument("--slow-rate", type=float, default=0.02)
+    parser.add_argument("--slow-factor", type=float, default=20)
+    parser.add_argument("--percentile", type=float, default=0.95)
+    args = parser.parse_args()
+
+    provider = _provider(args.median, args.slow_rate, args.slow_factor, seed=0)
+    hedger = Hedger("benchmark", LatencyTracker(percentile=args.percentile, initial_delay=args.median * 5))
+    rows = {
+        "plain": run(provider, args.games, args.calls_per_game, args.workers),
+        "hedged": run(with_hedging(provider, hedger=hedger), args.games, args.calls_per_game, args.workers),
+    }
+
+    print(f"{'':<8} {'call p50':>9} {'call p99':>9} {'game p50':>9} {'game p99':>9}")
+    for name, (calls, games) in rows.items():
+        print(
+            f"{name:<8} {statistics.median(calls) * 1000:>7.1f}ms {_quantile(calls, 0.99) * 1000:>7.1f}ms "
+            f"{statistics.median(games):>8.2f}s {_quantile(games, 0.99):>8.2f}s"
+        )
+    plain_p99 = _quantile(rows["plain"][1], 0.99)
+    hedged_p99 = _quantile(rows["hedged"][1], 0.99)
+    stats = hedger.stats()
+    print(f"Game p99 improvement: {1 - hedged_p99 / plain_p99:.0%}")
+    print(f"Extra call rate: {stats.extra_call_rate:.1%} ({stats.hedge_wins} of {stats.hedges} hedges answered first)")
+
+
+if __name__ == "__main__":
+    main()
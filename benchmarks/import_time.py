@@ -0,0 +1,74 @@
+"""
+Measures the cold-start import time of the evaluator and the test suite.
+
+Every measurement runs in a fresh interpreter so nothing is cached between runs.
+The "eager" rows import every installed provider SDK first, which is what importing the evaluator used to cost.
+
+Usage:
+    python -m benchmarks.import_time --runs 5
+"""
+
+import argparse
+import importlib.util
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+PROVIDER_MODULES = ["langchain_openai", "langchain_anthropic", "langchain_google_genai"]
+
+TARGETS = {
+    "evaluator": ["evals.evaluation"],
+    "test suite": [
+        "agents.v1.tests.test_twenty_questions",
+        "agents.v2.tests.test_twenty_questions",
+    ],
+}
+
+
+def _time_import(modules: List[str]) -> float:
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        + "".join(f"import {module}\n" for module in modules)
+        + "print(time.perf_counter() - start)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return float(output.stdout.strip())
+
+
+def _time_pytest_collection() -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "--collect-only", "agents"],
+        capture_output=True,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    installed = [m for m in PROVIDER_MODULES if importlib.util.find_spec(m)]
+    print(f"Installed provider SDKs: {', '.join(installed) or 'none'}")
+
+    print(f"{'target':<12} {'lazy (s)':>10} {'eager (s)':>10}")
+    for name, modules in TARGETS.items():
+        lazy = statistics.median(_time_import(modules) for _ in range(args.runs))
+        eager = statistics.median(
+            _time_import(installed + modules) for _ in range(args.runs)
+        )
+        print(f"{name:<12} {lazy:>10.3f} {eager:>10.3f}")
+
+    collection = statistics.median(_time_pytest_collection() for _ in range(args.runs))
+    print(f"pytest --collect-only wall time: {collection:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
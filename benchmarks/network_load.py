@@ -0,0 +1,86 @@
+"""
+Load test for the networked host service.
+
+Plays many concurrent games with fake guesser LLMs against a host service and reports sessions/sec and per-turn latency.
+By default an in-process host service with a fake host LLM is started; use --connect to target a running one
+(e.g. `python -m agents.remote.host_service --fake-latency 0`).
+
+Usage:
+    python -m benchmarks.network_load --sessions 2000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from agents.fakes import DEFAULT_GUESSES, get_fake_configurable
+from agents.remote.guesser_client import HostClient, play_remote_game
+from agents.remote.host_service import HostService
+
+
+async def run(args) -> None:
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=args.concurrency))
+
+    server = None
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+    else:
+        host_llm = get_fake_configurable(args.version, latency=args.latency)["host_llm"]
+        service = HostService(args.version, host_llm, max_workers=args.concurrency)
+        server = await service.serve(port=0)
+        host, port = server.sockets[0].getsockname()[:2]
+
+    clients = [await HostClient.connect(host, int(port)) for _ in range(args.connections)]
+    configurable = get_fake_configurable(args.version, latency=args.latency)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    rng = random.Random(args.seed)
+
+    async def session(i: int):
+        async with semaphore:
+            return await play_remote_game(
+                clients[i % len(clients)],
+                args.version,
+                configurable,
+                topic=rng.choice(DEFAULT_GUESSES),
+            )
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(session(i) for i in range(args.sessions)))
+    elapsed = time.perf_counter() - start
+
+    for client in clients:
+        await client.close()
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+    latencies = [l * 1000 for r in results for l in r.turn_latencies]
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"Sessions: {len(results)} ({sum(r.correct_guess for r in results)} solved)")
+    print(f"Turns: {len(latencies)}")
+    print(f"Sessions/sec: {len(results) / elapsed:.1f}")
+    print(f"Turns/sec: {len(latencies) / elapsed:.1f}")
+    print(
+        f"Per-turn latency (ms): p50 {quantiles[49]:.2f}, "
+        f"p95 {quantiles[94]:.2f}, p99 {quantiles[98]:.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the host service.")
+    parser.add_argument("--version", choices=["v1", "v2", "v3"], default="v2")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake LLM latency in seconds")
+    parser.add_argument("--connect", default=None, help="HOST:PORT of a running host service")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Prompt size per turn of the v3 recommender, with the full history and incrementally.
+
+Plays a 20 question v3 game with fake LLMs on a topic the fakes never guess, once with `recommender_mode="full"` and once
+with `recommender_mode="incremental"`. Only the recommender reports tokens (about 4 characters per token of its rendered
+prompt, see `TokenCountingChatModel`), so each turn's tokens in the transcript are the recommender's prompt size.
+
+Usage:
+    python -m benchmarks.recommender_prompt_size
+"""
+
+import argparse
+import contextlib
+import os
+
+from agents.fakes import get_fake_configurable
+from evals.corpus import play_transcript
+
+
+def recommender_tokens(mode: str, max_questions: int):
+    counting = get_fake_configurable("v3", count_tokens=True)
+    configurable = {
+        **get_fake_configurable("v3"),
+        "recommender_llm": counting["recommender_llm"],
+        "incremental_recommender_llm": counting["incremental_recommender_llm"],
+        "recommender_mode": mode,
+    }
+    # the nodes print every turn
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        transcript = play_transcript("v3", "spaceship", configurable, max_questions)
+    return [turn.input_tokens for turn in transcript.turns]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the v3 recommender's prompt size per turn.")
+    parser.add_argument("--max-questions", type=int, default=20)
+    args = parser.parse_args()
+
+    tokens = {mode: recommender_tokens(mode, args.max_questions) for mode in ("full", "incremental")}
+    print(f"{'turn':>4} {'full':>6} {'incremental':>12}")
+    for turn, (full, incremental) in enumerate(zip(tokens["full"], tokens["incremental"]), 1):
+        print(f"{turn:>4} {full:>6} {incremental:>12}")
+    for mode, counts in tokens.items():
+        print(
+            f"{mode}: {sum(counts)} tokens in {len(counts)} turns, "
+            f"last turn {counts[-1] / counts[0]:.1f}x the first"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Memory use and aggregation time of evaluation results.
+
+Compares a list of `GameResult` models (what the evaluator used to keep) with the column-based `ResultStore`.
+
+Usage:
+    python -m benchmarks.result_storage --games 100000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from typing import List
+
+from agents.fakes import DEFAULT_GUESSES
+from evals.results import EvaluationMetrics, GameResult, ResultStore
+
+QUESTIONS = [f"Is it a {g}?" for g in DEFAULT_GUESSES] + [
+    "Is it an animal?",
+    "Is it alive?",
+    "Is it bigger than a car?",
+    "Can you eat it?",
+]
+
+
+def _results(n: int, seed: int):
+    rng = random.Random(seed)
+    for _ in range(n):
+        num_questions = rng.randint(1, 20)
+        correct = rng.random() < 0.6
+        messages = []
+        for _ in range(num_questions):
+            messages += [rng.choice(QUESTIONS), rng.choice(["Yes", "No"])]
+        yield GameResult(
+            topic=rng.choice(DEFAULT_GUESSES),
+            correct_guess=correct,
+            num_questions=num_questions,
+            error=None if correct else "Max questions reached!",
+            total_time=rng.uniform(5, 60),
+            messages=messages,
+        )
+
+
+def _list_metrics(results: List[GameResult]) -> EvaluationMetrics:
+    """The list comprehension based metrics the evaluator used before `ResultStore`."""
+    total_games = len(results)
+    successful_games = [r for r in results if r.correct_guess]
+    error_games = [r for r in results if r.error is not None and len(r.error) > 0]
+    return EvaluationMetrics(
+        success_rate=len(successful_games) / total_games,
+        avg_questions_when_correct=(
+            sum(r.num_questions for r in successful_games) / len(successful_games)
+            if successful_games
+            else 0
+        ),
+        avg_time_per_game=sum(r.total_time for r in results) / total_games,
+        error_rate=len(error_games) / total_games,
+    )
+
+
+def _measure(build):
+    tracemalloc.start()
+    container = build()
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return container, used
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare result containers.")
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results, list_bytes = _measure(lambda: list(_results(args.games, args.seed)))
+    store, store_bytes = _measure(
+        lambda: ResultStore.from_results(_results(args.games, args.seed), capacity=args.games)
+    )
+
+    timings = {}
+    for name, compute in [("list", lambda: _list_metrics(results)), ("store", store.compute_metrics)]:
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            metrics = compute()
+        timings[name] = (time.perf_counter() - start) / args.repeats
+    assert abs(_list_metrics(results).success_rate - metrics.success_rate) < 1e-9
+
+    print(f"Games: {args.games}")
+    print(f"{'container':<12} {'memory (MB)':>12} {'metrics (ms)':>13}")
+    print(f"{'list':<12} {list_bytes / 1e6:>12.1f} {timings['list'] * 1000:>13.2f}")
+    print(f"{'ResultStore':<12} {store_bytes / 1e6:>12.1f} {timings['store'] * 1000:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
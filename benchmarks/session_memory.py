@@ -0,0 +1,95 @@
+"""
+Memory per session for the host service's session manager.
+
+Reports the bytes held per resident session (compact tuple vs a full `GameState` with its message history),
+the resulting sessions per GB, and the throughput of spilling and rehydrating sessions.
+
+Usage:
+    python -m benchmarks.session_memory --sessions 100000
+"""
+
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents.fakes import DEFAULT_GUESSES
+from agents.remote.sessions import SessionManager
+
+GB = 1024**3
+
+
+def _states(n: int, seed: int):
+    rng = random.Random(seed)
+    for _ in range(n):
+        yield uuid.uuid4().hex, {
+            "topic": rng.choice(DEFAULT_GUESSES),
+            "question_count": rng.randint(0, 20),
+            "next": "guesser",
+            "correct_guess": False,
+            "error": "",
+        }
+
+
+def _bytes_per_session(n: int, seed: int, compact: bool) -> float:
+    states = list(_states(n, seed))
+    with tempfile.TemporaryDirectory() as spill_dir:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        if compact:
+            store = SessionManager(spill_dir, max_resident=n)
+            for session_id, state in states:
+                store.put(session_id, state)
+        else:
+            store = {
+                session_id: {
+                    **state,
+                    "messages": [
+                        m
+                        for i in range(state["question_count"])
+                        for m in (AIMessage(content=f"Is it a {i}?"), HumanMessage(content="No"))
+                    ],
+                }
+                for session_id, state in states
+            }
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+    return used / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory per game session.")
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--spill-sessions", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for name, compact in [("GameState", False), ("session manager", True)]:
+        per_session = _bytes_per_session(args.sessions, args.seed, compact)
+        print(
+            f"{name:<16} {per_session:8.0f} bytes/session, "
+            f"{GB / per_session:12,.0f} resident sessions/GB"
+        )
+
+    # every put spills one session and every get rehydrates one
+    with tempfile.TemporaryDirectory() as spill_dir:
+        sessions = SessionManager(spill_dir, max_resident=1)
+        states = list(_states(args.spill_sessions, args.seed))
+        start = time.perf_counter()
+        for session_id, state in states:
+            sessions.put(session_id, state)
+        spill_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for session_id, _ in states:
+            sessions.get(session_id)
+        rehydrate_time = time.perf_counter() - start
+    print(f"Spills/sec: {args.spill_sessions / spill_time:,.0f}")
+    print(f"Rehydrations/sec: {args.spill_sessions / rehydrate_time:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Calibration of the v3 guesser's posterior against recorded games.
+
+Every turn of a self-play corpus (evals/corpus.py) records the posterior's most likely candidate and its probability.
+If the posterior is calibrated, the most likely candidate is the topic in about that fraction of the turns.
+`calibration_report` bins the turns by probability and reports each bin's accuracy, the expected calibration error
+(the turn-weighted gap between probability and accuracy) and the Brier score.
+
+Usage:
+    python -m evals.calibration corpus/
+"""
+
+import argparse
+from typing import Any, Dict, Iterable, List
+
+from pydantic import BaseModel
+
+from evals.corpus import CorpusReader
+
+
+class CalibrationBin(BaseModel):
+    lower: float
+    upper: float
+    turns: int
+    avg_confidence: float
+    accuracy: float
+
+
+class CalibrationReport(BaseModel):
+    turns: int
+    expected_calibration_error: float
+    brier_score: float
+    bins: List[CalibrationBin]
+
+
+def calibration_report(records: Iterable[Dict[str, Any]], num_bins: int = 10) -> CalibrationReport:
+    """
+    Compare the posterior's probabilities with how often its most likely candidate was the topic.
+    Args:
+        records: Transcripts as dicts, e.g. from `CorpusReader.iter_records`.
+        num_bins: Number of equal-width probability bins.
+    Returns:
+        The calibration report over every turn with a posterior.
+    """
+    counts = [0] * num_bins
+    confidence_sums = [0.0] * num_bins
+    correct = [0] * num_bins
+    brier = 0.0
+    for record in records:
+        topic = record["topic"].strip().lower()
+        for turn in record["turns"]:
+            confidence = turn.get("posterior_confidence")
+            if confidence is None:
+                continue
+            hit = turn["posterior_top"].strip().lower() == topic
+            i = min(int(confidence * num_bins), num_bins - 1)
+            counts[i] += 1
+            confidence_sums[i] += confidence
+            correct[i] += hit
+            brier += (confidence - hit) ** 2
+
+    total = sum(counts)
+    bins = [
+        CalibrationBin(
+            lower=i / num_bins,
+            upper=(i + 1) / num_bins,
+            turns=counts[i],
+            avg_confidence=confidence_sums[i] / counts[i],
+            accuracy=correct[i] / counts[i],
+        )
+        for i in range(num_bins)
+        if counts[i]
+    ]
+    return CalibrationReport(
+        turns=total,
+        expected_calibration_error=(
+            sum(b.turns * abs(b.avg_confidence - b.accuracy) for b in bins) / total if total else 0.0
+        ),
+        brier_score=brier / total if total else 0.0,
+        bins=bins,
+    )
+
+
+def _print_report(report: CalibrationReport):
+    print(f"{'bin':<11} {'turns':>6} {'confidence':>10} {'accuracy':>9}")
+    for b in report.bins:
+        print(f"{b.lower:.1f}-{b.upper:.1f}    {b.turns:>6} {b.avg_confidence:>10.2f} {b.accuracy:>9.2f}")
+    print(f"Turns: {report.turns}")
+    print(f"Expected Calibration Error: {report.expected_calibration_error:.3f}")
+    print(f"Brier Score: {report.brier_score:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the v3 posterior's calibration on a self-play corpus.")
+    parser.add_argument("corpus", help="corpus directory written by evals.corpus")
+    parser.add_argument("--bins", type=int, default=10)
+    args = parser.parse_args()
+
+    _print_report(calibration_report(CorpusReader(args.corpus).iter_records(), args.bins))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Paired bootstrap comparison of two evaluation runs.
+
+`EvaluationMetrics` are point estimates, so a difference between two runs may be luck. `compare_runs` pairs the games of a
+baseline and a candidate run by (topic, run index) - the k-th game of a topic in one run with the k-th game of the same
+topic in the other - and bootstraps the pairs to get confidence intervals for the differences in success rate, questions
+to solve, time per game and tokens per game. Pairing takes out the variation between topics, which is most of it.
+
+The bootstrap is vectorized: the draw counts per pair of a chunk of resamples come from one `bincount`, and the sums
+every metric needs are one matrix product of the counts with a column per sum. 10k resamples of 100k pairs take about
+16 seconds on one core (`python -m benchmarks.bootstrap`). Resamples are processed in chunks to bound memory.
+
+A metric regressed if its whole confidence interval lies on the worse side of zero, and improved if it lies on the better
+side. The run regressed if any metric did.
+
+Usage:
+    python -m evals.compare evals/results/v1.npz evals/results/v2.npz --resamples 10000
+"""
+
+import argparse
+from typing import Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from evals.results import ResultStore
+
+Verdict = Literal["regression", "improvement", "no significant difference"]
+
+# metric -> whether higher is better
+METRICS = {
+    "success_rate": True,
+    "avg_questions_when_correct": False,
+    "avg_time_per_game": False,
+    "avg_tokens_per_game": False,
+}
+
+
+class MetricComparison(BaseModel):
+    name: str
+    baseline: float
+    candidate: float
+    difference: float  # candidate - baseline
+    ci_low: float
+    ci_high: float
+    verdict: Verdict
+
+
+class RunComparison(BaseModel):
+    pairs: int
+    unpaired_baseline: int  # games without a counterpart in the other run
+    unpaired_candidate: int
+    resamples: int
+    confidence: float
+    metrics: List[MetricComparison]
+    verdict: Verdict
+
+
+def pair_results(baseline: ResultStore, candidate: ResultStore) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pair the games of two runs by (topic, run index).
+    The run index of a game is how many games of its topic came before it in its run.
+    Args:
+        baseline: Results of the baseline run.
+        candidate: Results of the candidate run.
+    Returns:
+        Indices into `baseline` and `candidate` of the paired games.
+    """
+    # the candidate's topic ids, mapped to the baseline's topic ids (or new ids after them)
+    names = {name: i for i, name in enumerate(baseline.topic_names)}
+    for name in candidate.topic_names:
+        names.setdefault(name, len(names))
+    mapping = np.array([names[name] for name in candidate.topic_names], dtype=np.int64)
+
+    def keys(topics: np.ndarray) -> np.ndarray:
+        # run index: position of each game among the games of its topic, in the order they were stored
+        order = np.argsort(topics, kind="stable")
+        sorted_topics = topics[order]
+        starts = np.flatnonzero(np.r_[True, sorted_topics[1:] != sorted_topics[:-1]])
+        counts = np.diff(np.r_[starts, len(topics)])
+        run_index = np.empty(len(topics), dtype=np.int64)
+        run_index[order] = np.arange(len(topics)) - np.repeat(starts, counts)
+        return topics * (len(baseline) + len(candidate) + 1) + run_index
+
+    baseline_keys = keys(baseline.topic_ids.astype(np.int64))
+    candidate_keys = keys(mapping[candidate.topic_ids] if len(candidate) else np.zeros(0, dtype=np.int64))
+    _, baseline_index, candidate_index = np.intersect1d(
+        baseline_keys, candidate_keys, assume_unique=True, return_indices=True
+    )
+    return baseline_index, candidate_index
+
+
+def _columns(baseline: ResultStore, candidate: ResultStore, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Per pair, the terms of every sum the metrics are ratios of."""
+    columns = [np.ones(len(b))]
+    for store, index in ((baseline, b), (candidate, c)):
+        correct = store.correct_guess[index].astype(np.float64)
+        columns += [
+            correct,
+            store.num_questions[index] * correct,
+            store.total_time[index].astype(np.float64),
+            store.total_tokens[index].astype(np.float64),
+        ]
+    return np.stack(columns, axis=1)
+
+
+def _metrics(sums: np.ndarray) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Baseline and candidate value of every metric from the column sums, one row per resample."""
+    n = sums[:, 0]
+    values = {}
+    for side, offset in (("baseline", 1), ("candidate", 5)):
+        correct, questions, time, tokens = (sums[:, offset + i] for i in range(4))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values[side] = {
+                "success_rate": correct / n,
+                "avg_questions_when_correct": questions / correct,
+                "avg_time_per_game": time / n,
+                "avg_tokens_per_game": tokens / n,
+            }
+    return {name: (values["baseline"][name], values["candidate"][name]) for name in METRICS}
+
+
+def bootstrap_sums(
+    columns: np.ndarray,
+    resamples: int,
+    seed: Optional[int] = None,
+    chunk_size: int = 16,
+) -> np.ndarray:
+    """
+    Column sums of paired bootstrap resamples.
+    Args:
+        columns: One row per pair, one column per summed quantity.
+        resamples: Number of resamples.
+        seed: Seed of the resampling.
+        chunk_size: Resamples drawn at once, memory is about 24 bytes per pair and resample in a chunk.
+    Returns:
+        The sums, one row per resample.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(columns)
+    # float64, since float32 sums of 100k token counts lose digits the differences between runs need
+    weights = columns.astype(np.float64)
+    sums = np.empty((resamples, columns.shape[1]), dtype=np.float64)
+    for start in range(0, resamples, chunk_size):
+        size = min(chunk_size, resamples - start)
+        # the draws of resample i are offset by i * n, so one bincount counts every resample of the chunk
+        draws = rng.integers(0, n, size=(size, n)) + np.arange(size, dtype=np.int64)[:, None] * n
+        counts = np.bincount(draws.ravel(), minlength=size * n).reshape(size, n)
+        # how often each pair was drawn, so the sums are one matrix product
+        sums[start : start + size] = counts.astype(np.float64) @ weights
+    return sums
+
+
+def _verdict(low: float, high: float, higher_is_better: bool) -> Verdict:
+    if np.isnan(low) or np.isnan(high) or low <= 0 <= high:
+        return "no significant difference"
+    better = low > 0 if higher_is_better else high < 0
+    return "improvement" if better else "regression"
+
+
+def compare_runs(
+    baseline: ResultStore,
+    candidate: ResultStore,
+    resamples: int = 10_000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+) -> RunComparison:
+    """
+    Compare two runs with a paired bootstrap.
+    Args:
+        baseline: Results of the baseline run.
+        candidate: Results of the candidate run.
+        resamples: Number of bootstrap resamples.
+        confidence: Confidence level of the intervals.
+        seed: Seed of the resampling.
+    Returns:
+        Point estimates, confidence intervals of the differences and a verdict per metric and overall.
+    """
+    b, c = pair_results(baseline, candidate)
+    if not len(b):
+        raise ValueError("The runs have no games in common")
+    columns = _columns(baseline, candidate, b, c)
+    point = _metrics(columns.sum(axis=0, keepdims=True))
+    resampled = _metrics(bootstrap_sums(columns, resamples, seed))
+
+    alpha = (1 - confidence) / 2
+    metrics = []
+    for name, higher_is_better in METRICS.items():
+        base, cand = resampled[name]
+        differences = cand - base
+        # questions to solve is undefined in resamples without a correct guess
+        differences = differences[np.isfinite(differences)]
+        low, high = np.quantile(differences, [alpha, 1 - alpha]) if len(differences) else (np.nan, np.nan)
+        metrics.append(
+            MetricComparison(
+                name=name,
+                baseline=float(point[name][0][0]),
+                candidate=float(point[name][1][0]),
+                difference=float(point[name][1][0] - point[name][0][0]),
+                ci_low=float(low),
+                ci_high=float(high),
+                verdict=_verdict(low, high, higher_is_better),
+            )
+        )
+
+    verdicts = {metric.verdict for metric in metrics}
+    verdict = (
+        "regression"
+        if "regression" in verdicts
+        else "improvement"
+        if "improvement" in verdicts
+        else "no significant difference"
+    )
+    return RunComparison(
+        pairs=len(b),
+        unpaired_baseline=len(baseline) - len(b),
+        unpaired_candidate=len(candidate) - len(c),
+        resamples=resamples,
+        confidence=confidence,
+        metrics=metrics,
+        verdict=verdict,
+    )
+
+
+def print_comparison(comparison: RunComparison):
+    print(
+        f"{comparison.pairs} paired games ({comparison.unpaired_baseline} baseline and "
+        f"{comparison.unpaired_candidate} candidate games unpaired), {comparison.resamples} resamples"
+    )
+    for metric in comparison.metrics:
+        print(
+            f"{metric.name}: {metric.baseline:.4g} -> {metric.candidate:.4g} "
+            f"({metric.difference:+.4g}, {comparison.confidence:.0%} CI [{metric.ci_low:+.4g}, {metric.ci_high:+.4g}]) "
+            f"{metric.verdict}"
+        )
+    print(f"Verdict: {comparison.verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two stored evaluation runs with a paired bootstrap.")
+    parser.add_argument("baseline", help=".npz file written by ResultStore.save")
+    parser.add_argument("candidate")
+    parser.add_argument("--resamples", type=int, default=10_000)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    comparison = compare_runs(
+        ResultStore.load(args.baseline),
+        ResultStore.load(args.candidate),
+        args.resamples,
+        args.confidence,
+        args.seed,
+    )
+    print_comparison(comparison)
+    # a non-zero exit code lets CI fail on regressions
+    raise SystemExit(1 if comparison.verdict == "regression" else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Offline self-play corpus generation.
+
+`generate_corpus` plays games with a bounded number of workers and streams a structured transcript of each one
+(topic, question/answer turns with the guesser's candidates and tokens and the host's confidence, outcome) to gzip compressed
+JSONL shards. A shard is closed once it holds `shard_max_bytes` of JSON lines (the compressed size is only known once
+zlib flushes, so the bound is on the uncompressed size), and `manifest.json` lists the shards with their record counts.
+Nothing is kept in memory beyond the games in flight.
+
+`CorpusReader` iterates the shards lazily, decompressing one line at a time.
+
+Usage:
+    python -m evals.corpus --version v3 --topics evals/topics.txt --games-per-topic 5 --output corpus/
+"""
+
+import argparse
+import concurrent.futures
+import gzip
+import io
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Optional
+
+from pydantic import BaseModel
+
+from agents.executor import GameExecutor
+from agents.resilience import GameTimeoutError
+from agents.roles import get_configurable
+from agents.usage import TokenUsageCallback
+from evals.topics import TopicFile
+
+MANIFEST = "manifest.json"
+
+
+class Turn(BaseModel):
+    question: str
+    answer: Optional[str] = None
+    candidates: Optional[List[str]] = None  # the v3 guesser's candidates when it asked
+    confidence: Optional[float] = None  # the host's confidence in the answer
+    # tokens the guesser's calls used to come up with the question, see agents/usage.py
+    input_tokens: int = 0
+    output_tokens: int = 0
+    # the v3 guesser's most likely candidate and its posterior probability, see evals/calibration.py
+    posterior_top: Optional[str] = None
+    posterior_confidence: Optional[float] = None
+
+
+class Transcript(BaseModel):
+    topic: str
+    version: str
+    correct_guess: bool
+    num_questions: int
+    error: Optional[str] = None
+    error_type: Optional[Literal["error", "timeout"]] = None
+    total_time: float
+    turns: List[Turn]
+
+
+class ShardInfo(BaseModel):
+    file: str
+    records: int
+    compressed_bytes: int
+    uncompressed_bytes: int
+
+
+class Manifest(BaseModel):
+    version: str
+    records: int = 0
+    shards: List[ShardInfo] = []
+
+
+def play_transcript(
+    version: Literal["v1", "v2", "v3"],
+    topic: str,
+    configurable: Dict[str, Any],
+    max_questions: int = 20,
+    game_timeout: Optional[float] = None,
+) -> Transcript:
+    """
+    Play one game with the loop executor and record its transcript.
+    Args:
+        version: Agent version to play.
+        topic: Topic the host is given.
+        configurable: Role runnables, keyed like the graph's `configurable`.
+        max_questions: Maximum number of questions.
+        game_timeout: Wall-clock seconds the game may take.
+    Returns:
+        The transcript, with the error if the game failed.
+    """
+    configurable = {**configurable, "topic": topic, "max_questions": max_questions}
+    if game_timeout is not None:
+        configurable["game_deadline"] = time.monotonic() + game_timeout
+    usage = TokenUsageCallback()
+    config = {
+        "configurable": configurable,
+        "recursion_limit": 2 * max_questions + 10,
+        "callbacks": [usage],
+    }
+
+    turns: List[Turn] = []
+    state: Dict[str, Any] = {}
+    error, error_type = None, None
+    before = usage.usage
+    start = time.perf_counter()
+    try:
+        for event in GameExecutor(version).stream({"question_count": 0, "messages": []}, config):
+            for node, update in event.items():
+                state.update(update)
+                if node == "guesser":
+                    after = usage.usage
+                    posterior = update.get("posterior")
+                    top, confidence = posterior.best() if posterior is not None else (None, None)
+                    turns.append(
+                        Turn(
+                            question=update["guesser_question"].question,
+                            candidates=update.get("candidates"),
+                            input_tokens=after.input_tokens - before.input_tokens,
+                            output_tokens=after.output_tokens - before.output_tokens,
+                            posterior_top=top,
+                            posterior_confidence=confidence if top is not None else None,
+                        )
+                    )
+                elif turns and update.get("messages"):
+                    turns[-1].answer = getattr(
+                        update["messages"][0].content, "value", update["messages"][0].content
+                    )
+                    host_response = update.get("host_response")
+                    turns[-1].confidence = getattr(host_response, "confidence", None)
+                # the host's tokens are not counted towards the next turn
+                before = usage.usage
+        error = state.get("error") or None
+    except GameTimeoutError as e:
+        error, error_type = str(e), "timeout"
+    except Exception as e:
+        error, error_type = str(e), "error"
+
+    return Transcript(
+        topic=topic,
+        version=version,
+        correct_guess=state.get("correct_guess", False),
+        num_questions=state.get("question_count", 0),
+        error=error,
+        error_type=error_type,
+        total_time=time.perf_counter() - start,
+        turns=turns,
+    )
+
+
+class ShardWriter:
+    """
+    Writes JSON lines to gzip compressed shards of bounded size, and keeps the manifest up to date.
+    Args:
+        output_dir: Directory for the shards and the manifest.
+        version: Agent version recorded in the manifest.
+        shard_max_bytes: Uncompressed size of JSON lines after which a shard is closed and a new one started.
+    """
+
+    def __init__(self, output_dir: str, version: str, shard_max_bytes: int = 64 * 1024 * 1024):
+        self.output_dir = output_dir
+        self.shard_max_bytes = shard_max_bytes
+        self.manifest = Manifest(version=version)
+        os.makedirs(output_dir, exist_ok=True)
+        self._raw = None
+        self._gzip = None
+        self._current: Optional[ShardInfo] = None
+
+    def _open_shard(self):
+        name = f"shard-{len(self.manifest.shards):05d}.jsonl.gz"
+        self._raw = open(os.path.join(self.output_dir, name), "wb")
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="wb")
+        self._current = ShardInfo(file=name, records=0, compressed_bytes=0, uncompressed_bytes=0)
+
+    def _close_shard(self):
+        self._gzip.close()
+        self._current.compressed_bytes = self._raw.tell()
+        self._raw.close()
+        self.manifest.shards.append(self._current)
+        self._current = None
+        self._write_manifest()
+
+    def _write_manifest(self):
+        # written to a temporary file first, so a reader never sees a partial manifest
+        path = os.path.join(self.output_dir, MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            f.write(self.manifest.model_dump_json(indent=2))
+        os.replace(path + ".tmp", path)
+
+    def write(self, record: BaseModel):
+        if self._current is None:
+            self._open_shard()
+        line = (record.model_dump_json() + "\n").encode()
+        self._gzip.write(line)
+        self._current.records += 1
+        self._current.uncompressed_bytes += len(line)
+        self.manifest.records += 1
+        if self._current.uncompressed_bytes >= self.shard_max_bytes:
+            self._close_shard()
+
+    def close(self):
+        if self._current is not None:
+            self._close_shard()
+        else:
+            self._write_manifest()
+
+
+def generate_corpus(
+    version: Literal["v1", "v2", "v3"],
+    configurable: Dict[str, Any],
+    topics: Iterable[str],
+    output_dir: str,
+    games_per_topic: int = 1,
+    max_workers: int = 16,
+    shard_max_bytes: int = 64 * 1024 * 1024,
+    max_questions: int = 20,
+    game_timeout: Optional[float] = None,
+) -> Manifest:
+    """
+    Play games concurrently and stream their transcripts to compressed shards.
+    Args:
+        version: Agent version to play.
+        configurable: Role runnables, keyed like the graph's `configurable`.
+        topics: Topics to play, read lazily.
+        output_dir: Directory for the shards and the manifest.
+        games_per_topic: Games played per topic.
+        max_workers: Games in flight at once.
+        shard_max_bytes: Uncompressed size of JSON lines after which a new shard is started.
+        max_questions: Maximum number of questions per game.
+        game_timeout: Wall-clock seconds a game may take.
+    Returns:
+        The manifest of the written corpus.
+    """
+    games = itertools.chain.from_iterable(
+        itertools.repeat(topic, games_per_topic) for topic in topics
+    )
+    writer = ShardWriter(output_dir, version, shard_max_bytes)
+
+    def submit(executor: ThreadPoolExecutor, topic: str):
+        return executor.submit(
+            play_transcript, version, topic, configurable, max_questions, game_timeout
+        )
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # at most max_workers games are in flight, so memory stays bounded however many topics there are
+            futures = {submit(executor, topic) for topic in itertools.islice(games, max_workers)}
+            while futures:
+                done, futures = concurrent.futures.wait(
+                    futures, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    writer.write(future.result())
+                    topic = next(games, None)
+                    if topic is not None:
+                        futures.add(submit(executor, topic))
+    finally:
+        writer.close()
+    return writer.manifest
+
+
+class CorpusReader:
+    """
+    Lazily iterates the transcripts of a corpus, one shard and one line at a time.
+    Args:
+        path: Directory with the manifest and shards.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = Manifest.model_validate_json(f.read())
+
+    def __len__(self) -> int:
+        return self.manifest.records
+
+    def iter_records(self, shards: Optional[Iterable[int]] = None) -> Iterator[dict]:
+        """
+        Iterate the transcripts as plain dicts, skipping Pydantic validation.
+        Args:
+            shards: Indices of the shards to read, all by default (e.g. to split a corpus between processes).
+        """
+        indices = range(len(self.manifest.shards)) if shards is None else shards
+        for index in indices:
+            shard = self.manifest.shards[index]
+            with gzip.open(os.path.join(self.path, shard.file), "rb") as f:
+                for line in io.BufferedReader(f, buffer_size=1024 * 1024):
+                    yield json.loads(line)
+
+    def __iter__(self) -> Iterator[Transcript]:
+        for record in self.iter_records():
+            yield Transcript.model_validate(record)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a self-play transcript corpus.")
+    parser.add_argument("--version", choices=["v1", "v2", "v3"], default="v3")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--topics", default="evals/topics.txt")
+    parser.add_argument("--games-per-topic", type=int, default=1)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--shard-mb", type=float, default=64)
+    parser.add_argument("--max-questions", type=int, default=20)
+    parser.add_argument("--game-timeout", type=float, default=None)
+    parser.add_argument("--fake", action="store_true", help="play with fake LLMs (for dry runs)")
+    args = parser.parse_args()
+
+    if args.fake:
+        from agents.fakes import get_fake_configurable
+
+        configurable = get_fake_configurable(args.version)
+        configurable["rate_limit_delay"] = 0
+    else:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        configurable = get_configurable(args.version, args.model)
+
+    manifest = generate_corpus(
+        args.version,
+        configurable,
+        TopicFile(args.topics),
+        args.output,
+        games_per_topic=args.games_per_topic,
+        max_workers=args.workers,
+        shard_max_bytes=int(args.shard_mb * 1024 * 1024),
+        max_questions=args.max_questions,
+        game_timeout=args.game_timeout,
+    )
+    print(f"Wrote {manifest.records} transcripts in {len(manifest.shards)} shards to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,45 +2,49 @@
 This file discusses the ways in which we can evaluate the performance of the agents.
 """
 
-from typing import Dict, List, Literal, Type
+from typing import Dict, List, Literal, Optional, Type
 import time
-from langchain_anthropic import ChatAnthropic
-from langchain_openai import ChatOpenAI
+from dotenv import load_dotenv
 from pydantic import BaseModel
 from tqdm import tqdm
 from concurrent.futures import ThreadPoolExecutor
 import os
 import concurrent.futures
+import itertools
 import logging
 
 from agents.v1.agent import get_game_graph_v1, get_sample_llms_v1
-from agents.v2.agent import get_game_graph_v2, get_sample_llms_v2
+from agents.v2.agent import get_fused_guesser_llm_v2, get_game_graph_v2, get_sample_llms_v2
+from agents.v3.agent import get_game_graph_v3
+from agents.cascade import cascade_stats, get_cascading_host_llm
+from agents.ensemble import ensemble_stats, get_host_ensemble_llm
+from agents.executor import GameExecutor
+from agents.providers import DEFAULT_CALL_TIMEOUT, connection_stats, get_chat_model
+from agents.hedging import hedging_stats
+from agents.usage import TokenUsageCallback
+from agents.resilience import (
+    GameTimeoutError,
+    check_deadline,
+    guarded_structured_output,
+    resilience_stats,
+)
+from evals.compare import compare_runs, print_comparison
+from evals.live_metrics import LiveMetrics, start_metrics_server
+from evals.profiling import GameProfiler
+from evals.results import EvaluationMetrics, GameResult, ResultStore
+from evals.topics import TopicFile, TopicSource, as_topic_source
 
 from langchain_core.runnables.config import RunnableConfig
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 
 logger = logging.getLogger(__name__)
-class GameResult(BaseModel):
-    topic: str
-    correct_guess: bool
-    num_questions: int
-    error: str | None
-    total_time: float
-    messages: List[str]
-
-
-class EvaluationMetrics(BaseModel):
-    success_rate: float
-    avg_questions_when_correct: float
-    avg_time_per_game: float
-    error_rate: float
 
 
 def _get_llm(
     prompt: ChatPromptTemplate,
     structured_output: Type[BaseModel],
     model_name: str = "gemini-1.5-flash",
+    timeout: float = DEFAULT_CALL_TIMEOUT,
 ):
     """
     Simple function to get a LLM for a given prompt.
@@ -48,32 +52,18 @@ def _get_llm(
         prompt: The prompt to use.
         structured_output: The structured output to use.
         model_name: The model to use.
+        timeout: Seconds a single call may take.
     Returns:
-        A LLM with structured output and retry logic.
+        A LLM with structured output, guarded by its provider's retry budget and circuit breaker.
     """
     if not prompt:
         raise ValueError("Prompt is required")
 
-    if "gemini" in model_name:
-        llm = ChatGoogleGenerativeAI(
-            model=model_name,
-            temperature=1,
-            max_tokens=None,
-            timeout=None,
-            max_retries=2,
-        )
-    elif "gpt" in model_name:
-        llm = ChatOpenAI(model=model_name, temperature=1)
-    elif "claude" in model_name:
-        llm = ChatAnthropic(model=model_name, temperature=1)
-    else:
-        raise ValueError(f"Unsupported model: {model_name}")
-
-    return prompt | llm.with_structured_output(structured_output).with_retry(
-        retry_if_exception_type=(Exception,),
-        wait_exponential_jitter=True,
-        stop_after_attempt=2,
-    )
+    # the provider SDK is only imported the first time one of its models is requested,
+    # and all roles and games asking for the same model share one pooled client
+    llm = get_chat_model(model_name, temperature=1, timeout=timeout)
+
+    return prompt | guarded_structured_output(llm, structured_output)
 
 
 def _print_metrics(metrics: EvaluationMetrics):
@@ -81,50 +71,130 @@ def _print_metrics(metrics: EvaluationMetrics):
     print(f"Avg Questions When Correct: {metrics.avg_questions_when_correct:.1f}")
     print(f"Avg Time per Game: {metrics.avg_time_per_game:.2f}s")
     print(f"Error Rate: {metrics.error_rate:.2%}")
+    print(f"Timeout Rate: {metrics.timeout_rate:.2%}")
+    print(f"Avg LLM Calls per Game: {metrics.avg_llm_calls_per_game:.1f}")
+    print(f"Avg Tokens per Game: {metrics.avg_tokens_per_game:.0f}")
+    for provider, stats in metrics.resilience.items():
+        print(
+            f"{provider}: {stats.retries} retries, "
+            f"{stats.retries_denied} denied by the retry budget, "
+            f"{stats.non_retryable_errors} non-retryable errors, "
+            f"{stats.rejected} calls rejected by the circuit breaker "
+            f"(opened {stats.breaker_opened} times, now {stats.breaker_state})"
+        )
+    for name, stats in metrics.cascade.items():
+        agreement = (
+            f"{stats.agreement_rate:.1%}" if stats.agreement_rate is not None else "not audited"
+        )
+        print(
+            f"{name} cascade: {stats.hit_rate:.1%} answered by the small model, "
+            f"{stats.avg_latency:.2f}s per answer vs {stats.avg_large_latency:.2f}s for the large model, "
+            f"agreement with the large model {agreement}"
+        )
+    for name, stats in metrics.ensemble.items():
+        print(
+            f"{name} ensemble: {stats.stability:.1%} of votes agree with the answer, "
+            f"{stats.unanimous / stats.answers if stats.answers else 0:.1%} unanimous, "
+            f"{stats.cost_multiplier:.1f}x the calls of a single host, "
+            f"{stats.avg_latency:.2f}s per answer vs {stats.avg_member_latency:.2f}s per member call"
+        )
+    for role, stats in metrics.hedging.items():
+        print(
+            f"{role}: {stats.extra_call_rate:.1%} of calls hedged, "
+            f"{stats.hedge_wins} hedges answered first"
+        )
+
+
+def _print_connection_stats():
+    for provider, stats in connection_stats().items():
+        print(
+            f"{provider}: {stats.requests} requests, "
+            f"{stats.connections_opened} connections opened, "
+            f"{stats.connections_reused} reused, "
+            f"{stats.tls_handshakes_avoided} TLS handshakes avoided"
+        )
 
 
 class TwentyQuestionsEvaluator:
     def __init__(
         self,
-        test_topics: List[str],
+        test_topics: List[str] | TopicSource,
         max_questions: int = 20,
         num_runs: int = 1,
         config: RunnableConfig = None,
-        agent_version: Literal["v1", "v2"] = "v1",
+        agent_version: Literal["v1", "v2", "v3"] = "v1",
+        live_metrics: Optional[LiveMetrics] = None,
+        executor: Literal["graph", "loop"] = "graph",
+        profile_sample_rate: float = 0.0,
+        profile_dir: str = "evals/profiles",
+        profile_memory: bool = False,
+        game_timeout: Optional[float] = None,
     ):
-        self.test_topics = test_topics
+        # streamed once per run, see evals/topics.py
+        self.test_topics = as_topic_source(test_topics)
         self.max_questions = max_questions
         self.num_runs = num_runs
-        self.results: List[GameResult] = []
+        self.results = ResultStore()
         self.config = config
         self.agent_version = agent_version
         self.max_workers = min(32, (os.cpu_count() or 1) * 4)
+        # updated as each game finishes, see evals/live_metrics.py
+        self.live_metrics = live_metrics
+        # "loop" plays the games with the direct-loop executor (agents/executor.py) instead of the StateGraph
+        self.executor = executor
+        # wall-clock seconds a game may take, LLM calls stop once it is spent (see agents/resilience.py)
+        self.game_timeout = game_timeout
+        # profiles a sampled fraction of the games, see evals/profiling.py
+        self.profiler = (
+            GameProfiler(profile_dir, profile_sample_rate, memory=profile_memory)
+            if profile_sample_rate > 0
+            else None
+        )
 
     def evaluate_prompt_combination(
         self,
-    ) -> List[GameResult]:
+    ) -> ResultStore:
         """Evaluate a specific prompt and LLM combination using thread pool.
         
         Returns:
-            List[GameResult]: Results from all game evaluations
+            ResultStore: Results from all game evaluations
         """
-        topics_iter = iter(self.test_topics * self.num_runs) # to avoid repeated processing
-        results = []
-        
-        
+        # the source is iterated lazily, once per run, so large topic files are never held in memory
+        topics_iter = itertools.chain.from_iterable(
+            itertools.repeat(self.test_topics, self.num_runs)
+        )
+        total = len(self.test_topics) * self.num_runs
+        results = ResultStore(capacity=max(total, 1))
+        futures = {}
+        game_index = 0
+
+        def submit(executor: ThreadPoolExecutor, topic: str):
+            nonlocal game_index
+            if self.profiler is not None:
+                future = executor.submit(
+                    self._run_profiled_game,
+                    topic,
+                    self.config,
+                    game_index,
+                    time.perf_counter(),
+                    self.profiler.should_profile(),
+                )
+            else:
+                future = executor.submit(self._run_single_game, topic, self.config)
+            game_index += 1
+            futures[future] = topic
+
+        if self.profiler is not None:
+            self.profiler.start()
         try:
             with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                futures = {}
                 for _ in range(self.max_workers):
                     try:
-                        topic = next(topics_iter)
-                        future = executor.submit(self._run_single_game, topic, self.config)
-                        futures[future] = topic
+                        submit(executor, next(topics_iter))
                     except StopIteration:
                         break
 
-                with tqdm(total=len(self.test_topics) * self.num_runs, 
-                         desc="Evaluating games") as pbar:
+                with tqdm(total=total, desc="Evaluating games") as pbar:
                     while futures:
                         done, _ = concurrent.futures.wait(
                             futures,
@@ -135,45 +205,80 @@ class TwentyQuestionsEvaluator:
                             topic = futures.pop(future)
                             try:
                                 result = future.result()
-                                results.append(result)
                             except Exception as e:
                                 logger.error(f"Error processing game for topic '{topic}': {str(e)}")
-                                results.append(GameResult(
+                                result = GameResult(
                                     topic=topic,
                                     correct_guess=False,
                                     num_questions=0,
                                     error=str(e),
+                                    error_type="error",
                                     total_time=0,
                                     messages=[],
-                                ))
+                                )
                             finally:
                                 pbar.update(1)
+                            results.append(result)
+                            if self.live_metrics is not None:
+                                self.live_metrics.record(result)
 
                             try:
-                                next_topic = next(topics_iter)
-                                future = executor.submit(self._run_single_game, next_topic, self.config)
-                                futures[future] = next_topic
+                                submit(executor, next(topics_iter))
                             except StopIteration:
                                 continue
 
         except Exception as e:
             logger.error(f"Fatal error in evaluation process: {str(e)}")
             raise
+        finally:
+            if self.profiler is not None:
+                self.profiler.stop()
 
         return results
 
+    def _run_profiled_game(
+        self, topic: str, config: RunnableConfig, index: int, submitted: float, profiled: bool
+    ) -> GameResult:
+        """Run a single game of a profiled sweep, profiling it if it was sampled."""
+        if profiled:
+            context = self.profiler.profile_game(index, topic, submitted)
+        else:
+            # games profiled for memory run alone, see evals/profiling.py
+            context = self.profiler.unprofiled_game()
+        with context:
+            return self._run_single_game(topic, config)
+
     def _run_single_game(
         self,
         topic: str,
         config: RunnableConfig,
     ) -> GameResult:
         """Run a single game of 20 questions."""
-        if self.agent_version == "v1":
+        if self.executor == "loop":
+            graph = GameExecutor(self.agent_version)
+        elif self.agent_version == "v1":
             graph = get_game_graph_v1()
-        else:
+        elif self.agent_version == "v2":
             graph = get_game_graph_v2()
-
-        config["configurable"]["topic"] = topic
+        else:
+            graph = get_game_graph_v3()
+
+        # games run concurrently, so each one gets its own copy of the configurable
+        configurable = {**config["configurable"], "topic": topic}
+        deadline = None
+        if self.game_timeout is not None:
+            deadline = configurable["game_deadline"] = time.monotonic() + self.game_timeout
+        # counts the game's model calls and tokens
+        usage = TokenUsageCallback()
+        config = {
+            **config,
+            "configurable": configurable,
+            "callbacks": [*(config.get("callbacks") or []), usage],
+        }
+        start = time.perf_counter()
+        # events are {node: update}, merge the updates to get the final state
+        messages = []
+        final_state = {}
 
         try:
             events = graph.stream(
@@ -184,21 +289,32 @@ class TwentyQuestionsEvaluator:
                 config,
             )
 
-            messages = []
-            final_event = None
             for event in events:
-                if "messages" in event:
-                    messages.extend([m.content for m in event["messages"]])
-                # print(event)
-                final_event = event
+                for update in event.values():
+                    messages.extend([m.content for m in update.get("messages", [])])
+                    final_state.update(update)
+                check_deadline(deadline)
 
             return GameResult(
                 topic=topic,
-                correct_guess=final_event.get("correct_guess", False),
-                num_questions=final_event.get("question_count", self.max_questions),
-                error=final_event.get("error"),
-                total_time=0,  # Will be set later
+                correct_guess=final_state.get("correct_guess", False),
+                num_questions=final_state.get("question_count", self.max_questions),
+                error=final_state.get("error"),
+                total_time=time.perf_counter() - start,
                 messages=messages,
+                **usage.usage.model_dump(),
+            )
+
+        except GameTimeoutError as e:
+            return GameResult(
+                topic=topic,
+                correct_guess=False,
+                num_questions=final_state.get("question_count", 0),
+                error=str(e),
+                error_type="timeout",
+                total_time=time.perf_counter() - start,
+                messages=messages,
+                **usage.usage.model_dump(),
             )
 
         except Exception as e:
@@ -208,40 +324,60 @@ class TwentyQuestionsEvaluator:
                 correct_guess=False,
                 num_questions=0,
                 error=str(e),
-                total_time=0,
+                error_type="error",
+                total_time=time.perf_counter() - start,
                 messages=[],
+                **usage.usage.model_dump(),
             )
 
-    def _compute_metrics(self, results: List[GameResult]) -> EvaluationMetrics:
+    def _compute_metrics(
+        self, results: ResultStore | List[GameResult]
+    ) -> EvaluationMetrics:
         """Compute metrics for a set of game results."""
-        total_games = len(results)
-        successful_games = [r for r in results if r.correct_guess]
-        error_games = [r for r in results if r.error is not None and len(r.error) > 0]
-
-        return EvaluationMetrics(
-            success_rate=len(successful_games) / total_games,
-            avg_questions_when_correct=(
-                sum(r.num_questions for r in successful_games) / len(successful_games)
-                if successful_games
-                else 0
-            ),
-            avg_time_per_game=sum(r.total_time for r in results) / total_games,
-            error_rate=len(error_games) / total_games,
-        )
+        if not isinstance(results, ResultStore):
+            results = ResultStore.from_results(results)
+        return results.compute_metrics()
 
     def run_evaluation(
         self, compute_metrics: bool = True
-    ) -> EvaluationMetrics | List[GameResult]:
+    ) -> EvaluationMetrics | ResultStore:
         """Run evaluation and compute metrics."""
 
+        before, hedging_before = resilience_stats(), hedging_stats()
+        cascade_before, ensemble_before = cascade_stats(), ensemble_stats()
         self.results = self.evaluate_prompt_combination()
+        shadow_log = ((self.config or {}).get("configurable") or {}).get("shadow_log")
+        if shadow_log is not None:
+            # shadow calls may still be running after the last game, see agents/shadow.py
+            shadow_log.wait()
         if compute_metrics:
             metrics = self._compute_metrics(self.results)
+            # retries and circuit breaker activity of this evaluation only
+            metrics.resilience = {
+                provider: stats.since(before[provider]) if provider in before else stats
+                for provider, stats in resilience_stats().items()
+            }
+            metrics.cascade = {
+                name: stats.since(cascade_before[name]) if name in cascade_before else stats
+                for name, stats in cascade_stats().items()
+            }
+            metrics.ensemble = {
+                name: stats.since(ensemble_before[name]) if name in ensemble_before else stats
+                for name, stats in ensemble_stats().items()
+            }
+            metrics.hedging = {
+                role: stats.since(hedging_before[role]) if role in hedging_before else stats
+                for role, stats in hedging_stats().items()
+            }
             return metrics
         return self.results
 
 
-def main_v1(test_topics: List[str]):
+def main_v1(
+    test_topics: List[str] | TopicSource,
+    live_metrics: Optional[LiveMetrics] = None,
+    results_path: Optional[str] = None,
+):
 
     host_llm, guesser_llm = get_sample_llms_v1()
     config = RunnableConfig(
@@ -259,27 +395,53 @@ def main_v1(test_topics: List[str]):
         num_runs=1,
         agent_version="v1",
         config=config,
+        live_metrics=live_metrics,
     )
     metrics: EvaluationMetrics = evaluator.run_evaluation()
 
     print("\nEvaluation Results:")
     print("==================")
     _print_metrics(metrics)
+    _print_connection_stats()
     print("==================")
+    if results_path is not None:
+        # compare with other runs with evals/compare.py
+        evaluator.results.save(results_path)
+
+
+def main_v2(
+    test_topics: List[str] | TopicSource,
+    live_metrics: Optional[LiveMetrics] = None,
+    cascade_host: bool = False,
+    host_ensemble_size: int = 1,
+    guesser_mode: Literal["two_call", "fused"] = "two_call",
+    results_path: Optional[str] = None,
+):
 
-
-def main_v2(test_topics: List[str]):
-
-    base_llm = ChatOpenAI(model="gpt-4o-mini", temperature=1)
+    base_llm = get_chat_model("gpt-4o-mini", temperature=1)
     host_llm, guesser_recommender_llm, guesser_evaluator_llm = get_sample_llms_v2(
         base_llm
     )
+    if cascade_host:
+        # the small model answers, uncertain answers escalate to the large one
+        host_llm = get_cascading_host_llm(
+            "v2", base_llm, get_chat_model("gpt-4o", temperature=1)
+        )
+    elif host_ensemble_size > 1:
+        # majority vote of the same model at different seeds
+        host_llm = get_host_ensemble_llm(
+            "v2",
+            [get_chat_model("gpt-4o-mini", temperature=1, seed=seed) for seed in range(host_ensemble_size)],
+        )
 
     config = RunnableConfig(
         configurable={
             "host_llm": host_llm,
             "guesser_recommender_llm": guesser_recommender_llm,
             "guesser_evaluator_llm": guesser_evaluator_llm,
+            # "fused" recommends and chooses in one call, compare its metrics with the two-call guesser
+            "guesser_mode": guesser_mode,
+            "guesser_fused_llm": get_fused_guesser_llm_v2(base_llm),
             "max_questions": 20,
         },
         # we can add recursion limit as a fallback
@@ -292,6 +454,7 @@ def main_v2(test_topics: List[str]):
         num_runs=1,  # Run each topic 1 time
         config=config,
         agent_version="v2",
+        live_metrics=live_metrics,
     )
 
     metrics: EvaluationMetrics = evaluator.run_evaluation()
@@ -299,12 +462,27 @@ def main_v2(test_topics: List[str]):
     print("\nEvaluation Results:")
     print("==================")
     _print_metrics(metrics)
+    _print_connection_stats()
     print("==================")
+    if results_path is not None:
+        # compare with other runs with evals/compare.py
+        evaluator.results.save(results_path)
 
 
 if __name__ == "__main__":
-    # Load test topics from file
-    with open("evals/topics.txt", "r") as f:
-        test_topics = [line.strip() for line in f.readlines()]
-    main_v1(test_topics)
-    main_v2(test_topics)
+    load_dotenv()
+    # Stream test topics from file
+    test_topics = TopicFile("evals/topics.txt")
+    # watch the sweeps live at http://127.0.0.1:9100/metrics
+    v1_metrics = LiveMetrics(labels={"agent_version": "v1"})
+    v2_metrics = LiveMetrics(labels={"agent_version": "v2"})
+    server = start_metrics_server(v1_metrics)
+    os.makedirs("evals/results", exist_ok=True)
+    main_v1(test_topics, v1_metrics, results_path="evals/results/v1.npz")
+    server.live_metrics = v2_metrics
+    main_v2(test_topics, v2_metrics, results_path="evals/results/v2.npz")
+    server.shutdown()
+    # did v2 beat v1, or was it luck?
+    print_comparison(
+        compare_runs(ResultStore.load("evals/results/v1.npz"), ResultStore.load("evals/results/v2.npz"))
+    )
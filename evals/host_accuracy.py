@@ -0,0 +1,219 @@
+"""
+Host accuracy regression suite.
+
+A wrong host answer misleads the guesser for the rest of the game, but full games only show it indirectly. This runs a
+host runnable over a labeled dataset of (topic, question, expected answer) cases, in batches with bounded concurrency,
+and reports accuracy, a yes/no confusion matrix per question type and throughput.
+
+Dataset format, one JSON object per line (see host_cases.jsonl):
+    {"topic": "apple", "question": "Does it start with a vowel?", "expected": "yes", "type": "spelling"}
+`type` groups the cases in the report. Cases may also label `correct_guess`, which is checked against hosts that judge
+guesses (the v1 prompts v2 and v3); the v2 and v3 hosts leave that to string matching.
+
+Usage:
+    python -m evals.host_accuracy --variants v1_prompt_v3 v2 v3 --model gpt-4o-mini --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, Dict, Iterable, List, Literal, Optional
+
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+
+HOST_VARIANTS = ["v1_prompt_v1", "v1_prompt_v2", "v1_prompt_v3", "v2", "v3"]
+
+
+class HostCase(BaseModel):
+    topic: str
+    question: str
+    expected: Literal["yes", "no"]
+    type: str = "other"
+    correct_guess: Optional[bool] = None
+
+
+class Confusion(BaseModel):
+    """Yes/no confusion matrix, with "yes" as the positive answer."""
+
+    true_yes: int = 0
+    false_yes: int = 0
+    true_no: int = 0
+    false_no: int = 0
+    errors: int = 0  # calls that failed
+
+    @property
+    def cases(self) -> int:
+        return self.true_yes + self.false_yes + self.true_no + self.false_no + self.errors
+
+    @property
+    def accuracy(self) -> float:
+        return (self.true_yes + self.true_no) / self.cases if self.cases else 0.0
+
+
+class HostAccuracyReport(BaseModel):
+    variant: str
+    overall: Confusion
+    by_type: Dict[str, Confusion]
+    guess_judgements: int = 0  # cases with a correct_guess label answered by a judging host
+    guess_judgement_accuracy: Optional[float] = None
+    total_time: float
+
+    @property
+    def accuracy(self) -> float:
+        return self.overall.accuracy
+
+    @property
+    def questions_per_second(self) -> float:
+        return self.overall.cases / self.total_time if self.total_time else 0.0
+
+
+def load_cases(path: str) -> List[HostCase]:
+    """Read a JSONL dataset of host cases, skipping blank lines."""
+    with open(path) as f:
+        return [HostCase.model_validate_json(line) for line in f if line.strip()]
+
+
+def get_host_variant(name: str, model_name: str = "gpt-4o-mini") -> Runnable:
+    """
+    Host runnable of one of `HOST_VARIANTS`.
+    Args:
+        name: "v1_prompt_v1/v2/v3" for the v1 agent's host prompts, "v2" or "v3" for the later agents' `HOST_PROMPT`.
+        model_name: Model the host runs on.
+    """
+    from evals.evaluation import _get_llm
+
+    if name.startswith("v1_prompt_"):
+        from agents.v1 import models, prompts
+
+        prompt_version = name.removeprefix("v1_prompt_")
+        return _get_llm(
+            getattr(prompts, f"HOST_PROMPT_{prompt_version}"),
+            getattr(models, f"HostResponse_{prompt_version}"),
+            model_name,
+        )
+    if name == "v2":
+        from agents.v2.models import HostResponse
+        from agents.v2.prompts import HOST_PROMPT_v1
+
+        return _get_llm(HOST_PROMPT_v1, HostResponse, model_name)
+    if name == "v3":
+        from agents.v3.models import HostResponse
+        from agents.v3.prompts import HOST_PROMPT
+
+        return _get_llm(HOST_PROMPT, HostResponse, model_name)
+    raise ValueError(f"Unknown host variant: {name}, expected one of {HOST_VARIANTS}")
+
+
+def _report(
+    variant: str, cases: List[HostCase], responses: List[Any], total_time: float
+) -> HostAccuracyReport:
+    overall = Confusion()
+    by_type: Dict[str, Confusion] = {}
+    judged, judged_right = 0, 0
+    for case, response in zip(cases, responses):
+        confusions = (overall, by_type.setdefault(case.type, Confusion()))
+        if isinstance(response, Exception):
+            for confusion in confusions:
+                confusion.errors += 1
+            continue
+        answer = getattr(response.response, "value", response.response).lower()
+        field = f"{'true' if answer == case.expected else 'false'}_{answer}"
+        for confusion in confusions:
+            setattr(confusion, field, getattr(confusion, field) + 1)
+        if case.correct_guess is not None and hasattr(response, "correct_guess"):
+            judged += 1
+            judged_right += response.correct_guess == case.correct_guess
+
+    return HostAccuracyReport(
+        variant=variant,
+        overall=overall,
+        by_type=dict(sorted(by_type.items())),
+        guess_judgements=judged,
+        guess_judgement_accuracy=judged_right / judged if judged else None,
+        total_time=total_time,
+    )
+
+
+def evaluate_host(
+    host_llm: Runnable,
+    cases: Iterable[HostCase],
+    variant: str = "host",
+    max_concurrency: int = 16,
+) -> HostAccuracyReport:
+    """
+    Ask the host every case's question in one batch and score the answers.
+    Args:
+        host_llm: Host runnable, taking the host prompt's `topic` and `question`.
+        cases: Labeled cases.
+        variant: Name the report is labeled with.
+        max_concurrency: Calls in flight at once.
+    Returns:
+        The accuracy report; failed calls are counted as errors, not answers.
+    """
+    cases = list(cases)
+    start = time.perf_counter()
+    responses = host_llm.batch(
+        [{"topic": case.topic, "question": case.question} for case in cases],
+        {"max_concurrency": max_concurrency},
+        return_exceptions=True,
+    )
+    return _report(variant, cases, responses, time.perf_counter() - start)
+
+
+async def aevaluate_host(
+    host_llm: Runnable,
+    cases: Iterable[HostCase],
+    variant: str = "host",
+    max_concurrency: int = 16,
+) -> HostAccuracyReport:
+    """Like `evaluate_host`, with `abatch`."""
+    cases = list(cases)
+    start = time.perf_counter()
+    responses = await host_llm.abatch(
+        [{"topic": case.topic, "question": case.question} for case in cases],
+        {"max_concurrency": max_concurrency},
+        return_exceptions=True,
+    )
+    return _report(variant, cases, responses, time.perf_counter() - start)
+
+
+def _print_report(report: HostAccuracyReport):
+    overall = report.overall
+    print(f"{report.variant}: accuracy {report.accuracy:.2%} over {overall.cases} cases, "
+          f"{report.questions_per_second:.1f} questions/s, {overall.errors} errors")
+    if report.guess_judgement_accuracy is not None:
+        print(f"  correct guess judgement: {report.guess_judgement_accuracy:.2%} of {report.guess_judgements}")
+    for question_type, confusion in report.by_type.items():
+        print(
+            f"  {question_type}: {confusion.accuracy:.2%} "
+            f"(yes: {confusion.true_yes} right, {confusion.false_yes} wrong; "
+            f"no: {confusion.true_no} right, {confusion.false_no} wrong)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure host accuracy on a labeled dataset.")
+    parser.add_argument("--dataset", default="evals/host_cases.jsonl")
+    parser.add_argument("--variants", nargs="+", choices=HOST_VARIANTS, default=HOST_VARIANTS)
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--use-async", action="store_true", help="batch with abatch instead of a thread pool")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    cases = load_cases(args.dataset)
+    for variant in args.variants:
+        host_llm = get_host_variant(variant, args.model)
+        if args.use_async:
+            report = asyncio.run(aevaluate_host(host_llm, cases, variant, args.concurrency))
+        else:
+            report = evaluate_host(host_llm, cases, variant, args.concurrency)
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
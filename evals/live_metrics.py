@@ -0,0 +1,226 @@
+"""
+Live metrics for long evaluation sweeps.
+
+`LiveMetrics` updates the success rate, questions to solve, error and timeout rates and latency quantiles as each `GameResult` arrives,
+and `start_metrics_server` serves them in the Prometheus text format, so a sweep can be watched (or scraped) while it runs.
+"""
+
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from evals.results import GameResult
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class QuantileSketch:
+    """
+    Streaming quantile sketch with log-spaced buckets (as in DDSketch).
+    Quantiles are within `relative_accuracy` of the exact value, using memory logarithmic in the value range.
+    Args:
+        relative_accuracy: Maximum relative error of the reported quantiles.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0  # values too small for a bucket
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        self.sum += value
+        if value <= 1e-9:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other: "QuantileSketch"):
+        self.count += other.count
+        self.sum += other.sum
+        self.zeros += other.zeros
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms
+                return 2 * self.gamma**index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class LiveMetrics:
+    """
+    Thread-safe online aggregate of game results.
+    Latency quantiles are reported over the whole sweep and over the most recent window,
+    so a provider slowdown shows up even late in a long sweep.
+    Args:
+        labels: Prometheus labels added to every metric, e.g. {"agent_version": "v2"}.
+        window_seconds: Length of the recent window for the latency quantiles.
+        clock: Time source, monotonic by default.
+    """
+
+    def __init__(
+        self,
+        labels: Optional[Dict[str, str]] = None,
+        window_seconds: float = 300,
+        clock=time.monotonic,
+    ):
+        self.labels = labels or {}
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.games = 0
+        self.correct = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.questions_when_correct = 0
+        self.game_seconds = QuantileSketch()
+        self.turn_seconds = QuantileSketch()
+        # the recent window is the current bucket plus the previous one
+        self._window_start = clock()
+        self._recent = QuantileSketch()
+        self._previous = QuantileSketch()
+
+    def record(self, result: GameResult):
+        with self._lock:
+            self.games += 1
+            self.correct += result.correct_guess
+            self.errors += bool(result.error)
+            self.timeouts += result.error_type == "timeout"
+            if result.correct_guess:
+                self.questions_when_correct += result.num_questions
+            self.game_seconds.add(result.total_time)
+            turn_seconds = result.total_time / max(result.num_questions, 1)
+            self.turn_seconds.add(turn_seconds)
+
+            now = self.clock()
+            if now - self._window_start >= self.window_seconds:
+                self._previous, self._recent = self._recent, QuantileSketch()
+                self._window_start = now
+            self._recent.add(turn_seconds)
+
+    def _recent_turn_seconds(self) -> QuantileSketch:
+        recent = QuantileSketch()
+        recent.merge(self._previous)
+        recent.merge(self._recent)
+        return recent
+
+    def snapshot(self) -> Dict[str, float]:
+        """Current values of the metrics, e.g. for logging."""
+        with self._lock:
+            games = max(self.games, 1)
+            snapshot = {
+                "games": self.games,
+                "success_rate": self.correct / games,
+                "error_rate": self.errors / games,
+                "timeout_rate": self.timeouts / games,
+                "avg_questions_when_correct": (
+                    self.questions_when_correct / self.correct if self.correct else 0
+                ),
+            }
+            recent = self._recent_turn_seconds()
+            for q in QUANTILES:
+                snapshot[f"turn_seconds_p{round(q * 100)}"] = self.turn_seconds.quantile(q)
+                snapshot[f"recent_turn_seconds_p{round(q * 100)}"] = recent.quantile(q)
+            return snapshot
+
+    def _format_labels(self, **extra) -> str:
+        labels = {**self.labels, **extra}
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+    def render_prometheus(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        labels = self._format_labels()
+        lines = []
+
+        def metric(name: str, kind: str, help: str, value: float):
+            lines.append(f"# HELP twenty_questions_{name} {help}")
+            lines.append(f"# TYPE twenty_questions_{name} {kind}")
+            lines.append(f"twenty_questions_{name}{labels} {value}")
+
+        with self._lock:
+            metric("games_total", "counter", "Games finished.", self.games)
+            metric("correct_guesses_total", "counter", "Games solved.", self.correct)
+            metric("errors_total", "counter", "Games that ended with an error.", self.errors)
+            metric("timeouts_total", "counter", "Games that ran past their time budget.", self.timeouts)
+        metric("success_rate", "gauge", "Fraction of games solved.", snapshot["success_rate"])
+        metric("error_rate", "gauge", "Fraction of games with an error.", snapshot["error_rate"])
+        metric(
+            "questions_to_solve",
+            "gauge",
+            "Average number of questions in solved games.",
+            snapshot["avg_questions_when_correct"],
+        )
+
+        with self._lock:
+            sketches = [
+                ("game_seconds", "Wall time per game.", self.game_seconds),
+                ("turn_seconds", "Wall time per question.", self.turn_seconds),
+                (
+                    "recent_turn_seconds",
+                    f"Wall time per question over the last {self.window_seconds:g}s to {2 * self.window_seconds:g}s.",
+                    self._recent_turn_seconds(),
+                ),
+            ]
+            for name, help, sketch in sketches:
+                lines.append(f"# HELP twenty_questions_{name} {help}")
+                lines.append(f"# TYPE twenty_questions_{name} summary")
+                for q in QUANTILES:
+                    lines.append(
+                        f"twenty_questions_{name}{self._format_labels(quantile=str(q))} {sketch.quantile(q)}"
+                    )
+                lines.append(f"twenty_questions_{name}_sum{labels} {sketch.sum}")
+                lines.append(f"twenty_questions_{name}_count{labels} {sketch.count}")
+        return "\n".join(lines) + "\n"
+
+
+def start_metrics_server(
+    live_metrics: LiveMetrics, port: int = 9100, host: str = "127.0.0.1"
+) -> ThreadingHTTPServer:
+    """
+    Serve the metrics on http://host:port/metrics from a background thread.
+    Args:
+        live_metrics: Metrics to serve.
+        port: Port to listen on, 0 picks a free port.
+        host: Interface to listen on.
+    Returns:
+        The running server, call `shutdown()` to stop it. Set its `live_metrics` attribute to serve other metrics.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = self.server.live_metrics.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.live_metrics = live_metrics
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
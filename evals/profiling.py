@@ -0,0 +1,295 @@
+"""
+Opt-in profiling of evaluation sweeps.
+
+A sampled fraction of games is profiled with a low-overhead stack sampler: one background thread looks at the
+stacks of the threads running profiled games every few milliseconds (wall clock, so time spent waiting on the provider
+or in retry backoff shows up as well as CPU time). Each profiled game gets a collapsed-stack file, and all of them are
+aggregated into `flamegraph.collapsed`, which flamegraph.pl, speedscope or inferno can render.
+`games.jsonl` records the wall time of each profiled game, how long it waited for a thread in the pool, and the
+sampler's overhead: the seconds the sampler spent taking samples while the game ran, during which it held the GIL, and
+their ratio to the game's wall time. `summary.json` reports the same for the whole sweep.
+
+With `memory=True`, tracemalloc traces allocations and the top allocation sites of the sweep are written to
+`memory_top.txt`. Games run concurrently in one process and tracemalloc cannot tell threads apart, so a profiled game
+runs alone: it waits for the games in flight to finish and holds off new ones until it is done. Its net and peak
+traced memory go to `games.jsonl` and the allocation sites it grew to `games/<game>.memory.txt`. This serializes the
+profiled games, and tracemalloc slows every allocation down, so leave it off unless memory is the question.
+"""
+
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+def _collapse(frame) -> str:
+    """The frame's stack, root first, as `module.function` names separated by semicolons."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__", "?")
+        names.append(f"{module}.{getattr(code, 'co_qualname', code.co_name)}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _write_collapsed(path: str, stacks: Counter):
+    with open(path, "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    """A tracemalloc snapshot without tracemalloc's own allocations."""
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+class Samples:
+    """The samples of one thread: counts of collapsed stacks, and the seconds spent taking them."""
+
+    def __init__(self):
+        self.stacks = Counter()
+        self.sampler_time = 0.0
+
+
+class _GameGate:
+    """Lets games run together, or one game alone once the games in flight have finished."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._running = 0
+        self._alone = False
+        self._waiting_alone = 0
+
+    @contextmanager
+    def together(self) -> Iterator[None]:
+        with self._condition:
+            # games waiting to run alone go first, so they are not starved by a steady stream of games
+            self._condition.wait_for(lambda: not self._alone and not self._waiting_alone)
+            self._running += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._running -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def alone(self) -> Iterator[None]:
+        with self._condition:
+            self._waiting_alone += 1
+            self._condition.wait_for(lambda: not self._alone and not self._running)
+            self._waiting_alone -= 1
+            self._alone = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._alone = False
+                self._condition.notify_all()
+
+
+class StackSampler:
+    """
+    Samples the stacks of registered threads from a background thread.
+    Args:
+        interval: Seconds between samples.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self._threads: Dict[int, Samples] = {}
+        # seconds spent taking samples, the GIL is held meanwhile so the sampled threads are stalled
+        self.sampler_time = 0.0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            with self._lock:
+                if not self._threads:
+                    continue
+                start = time.perf_counter()
+                frames = sys._current_frames()
+                for thread_id, samples in self._threads.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        samples.stacks[_collapse(frame)] += 1
+                del frames
+                elapsed = time.perf_counter() - start
+                self.sampler_time += elapsed
+                for samples in self._threads.values():
+                    samples.sampler_time += elapsed
+
+    @contextmanager
+    def sample(self) -> Iterator[Samples]:
+        """Sample the current thread while in the block, yields its samples."""
+        samples = Samples()
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads[thread_id] = samples
+        try:
+            yield samples
+        finally:
+            with self._lock:
+                del self._threads[thread_id]
+
+
+class GameProfiler:
+    """
+    Profiles a sampled fraction of the games of a sweep.
+    Args:
+        profile_dir: Directory the profiles are written to.
+        sample_rate: Fraction of games to profile.
+        interval: Seconds between stack samples.
+        memory: Whether to trace allocations with tracemalloc, profiled games then run alone.
+        seed: Seed for choosing the profiled games.
+    """
+
+    def __init__(
+        self,
+        profile_dir: str,
+        sample_rate: float = 0.05,
+        interval: float = 0.01,
+        memory: bool = False,
+        seed: Optional[int] = None,
+    ):
+        self.profile_dir = profile_dir
+        self.sample_rate = sample_rate
+        self.memory = memory
+        self.sampler = StackSampler(interval)
+        self.stacks = Counter()
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._started_tracemalloc = False
+        self._gate = _GameGate()
+        self._start_time = 0.0
+        self._game_time = 0.0
+        self._games = 0
+        # peak traced memory of the sweep, tracemalloc's own peak is reset for every profiled game
+        self._peak_memory = 0
+
+    def should_profile(self) -> bool:
+        return self._random.random() < self.sample_rate
+
+    def start(self):
+        os.makedirs(os.path.join(self.profile_dir, "games"), exist_ok=True)
+        self.stacks = Counter()
+        self._game_time = 0.0
+        self._games = 0
+        self._peak_memory = 0
+        with open(os.path.join(self.profile_dir, "games.jsonl"), "w"):
+            pass
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._start_time = time.perf_counter()
+        self.sampler.start()
+
+    @contextmanager
+    def unprofiled_game(self) -> Iterator[None]:
+        """Run a game that is not profiled in the block, it keeps out of the way of games profiled for memory."""
+        if not self.memory:
+            yield
+            return
+        with self._gate.together():
+            yield
+
+    @contextmanager
+    def profile_game(self, index: int, topic: str, submitted: float) -> Iterator[None]:
+        """
+        Profile the game run in the block.
+        Args:
+            index: Index of the game in the sweep, used in the file name.
+            topic: Topic of the game.
+            submitted: `time.perf_counter()` when the game was submitted to the thread pool.
+        """
+        name = f"{index:06d}-{''.join(c if c.isalnum() else '_' for c in topic)}"
+        if not self.memory:
+            with self._sample_game(index, topic, submitted, name):
+                yield
+            return
+
+        with self._gate.alone():
+            before = _snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            self._peak_memory = max(self._peak_memory, peak)
+            tracemalloc.reset_peak()
+            with self._sample_game(index, topic, submitted, name) as record:
+                yield
+                end, peak = tracemalloc.get_traced_memory()
+                record["memory_net"] = end - current
+                record["memory_peak"] = peak - current
+            growth = _snapshot().compare_to(before, "lineno")
+        with open(os.path.join(self.profile_dir, "games", f"{name}.memory.txt"), "w") as f:
+            f.write(f"Net traced memory: {record['memory_net'] / 1024:.1f} KiB\n")
+            f.write(f"Peak traced memory: {record['memory_peak'] / 1024:.1f} KiB above the start\n")
+            for stat in growth[:30]:
+                f.write(f"{stat}\n")
+
+    @contextmanager
+    def _sample_game(self, index: int, topic: str, submitted: float, name: str) -> Iterator[Dict]:
+        """Sample the game run in the block, yields its `games.jsonl` record to add to before it is written."""
+        record = {"index": index, "topic": topic}
+        start = time.perf_counter()
+        with self.sampler.sample() as samples:
+            yield record
+        wall_time = time.perf_counter() - start
+
+        _write_collapsed(os.path.join(self.profile_dir, "games", f"{name}.collapsed"), samples.stacks)
+        record.update(
+            wall_time=wall_time,
+            queue_time=start - submitted,
+            samples=sum(samples.stacks.values()),
+            sampler_time=samples.sampler_time,
+            sampler_overhead=samples.sampler_time / wall_time,
+        )
+        with self._lock:
+            self.stacks.update(samples.stacks)
+            self._game_time += wall_time
+            self._games += 1
+            with open(os.path.join(self.profile_dir, "games.jsonl"), "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def stop(self):
+        """Stop sampling and write the aggregate flamegraph, the overhead summary (and memory report)."""
+        self.sampler.stop()
+        sweep_time = time.perf_counter() - self._start_time
+        _write_collapsed(os.path.join(self.profile_dir, "flamegraph.collapsed"), self.stacks)
+        with open(os.path.join(self.profile_dir, "summary.json"), "w") as f:
+            summary = {
+                "profiled_games": self._games,
+                "game_time": self._game_time,
+                "sweep_time": sweep_time,
+                "sampler_time": self.sampler.sampler_time,
+                # the sampler holds the GIL while sampling, so this is the share of the sweep it stalled the games
+                "sampler_overhead": self.sampler.sampler_time / sweep_time if sweep_time else 0.0,
+            }
+            json.dump(summary, f, indent=2)
+        if self._started_tracemalloc:
+            snapshot = _snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self._peak_memory)
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+            with open(os.path.join(self.profile_dir, "memory_top.txt"), "w") as f:
+                f.write(f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB\n")
+                for stat in snapshot.statistics("lineno")[:30]:
+                    f.write(f"{stat}\n")
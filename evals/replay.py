@@ -0,0 +1,334 @@
+"""
+Guesser-only replay against recorded host answers.
+
+Comparing guesser prompts or models by playing full games pays for a host call on every question, although the host's
+answer to a question about a topic rarely depends on who asked it. `replay_corpus` replays the topics of a recorded corpus
+(see corpus.py) with a new guesser, and puts an `AnswerOracle` in place of the host:
+- questions asked in the recorded games are answered with the recorded answer,
+- questions answered live in an earlier replay are answered from the cache file,
+- only unseen questions go to the live host, and its answers are appended to the cache. Games that ask the same unseen
+  question while it is being answered wait for that answer instead of asking again.
+
+Questions are matched per topic after lowercasing and collapsing whitespace and trailing punctuation. Correct guesses
+never reach the v2 and v3 hosts (they are string matched), so a replay's outcomes are comparable with the recorded ones.
+
+Usage:
+    python -m evals.replay corpus/ --version v3 --model gpt-4o-mini --cache corpus/host_cache.jsonl
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from langchain_core.runnables import Runnable, RunnableLambda
+from pydantic import BaseModel
+
+from agents.roles import get_configurable
+from agents.shadow import normalize_question
+from evals.corpus import CorpusReader, Transcript, play_transcript
+
+# what the v2 and v3 hosts answer to a correct guess
+CORRECT_GUESS = "Correct guess!"
+
+
+class RecordedAnswer(BaseModel):
+    response: str  # "yes" or "no"
+    correct_guess: bool = False
+    confidence: Optional[float] = None
+
+
+class OracleStats(BaseModel):
+    calls: int = 0
+    recorded_hits: int = 0  # answered from the corpus
+    cached_hits: int = 0  # answered from live answers of earlier replays
+    shared_hits: int = 0  # answered by a live call another game had already made
+    live_calls: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of questions answered without a host call."""
+        return 1 - self.live_calls / self.calls if self.calls else 0.0
+
+
+class UnseenQuestionError(LookupError):
+    """Raised by an oracle without a live host when a question was never answered."""
+
+
+def _response_model(version: Literal["v1", "v2", "v3"]) -> type:
+    if version == "v1":
+        from agents.v1.models import HostResponse_v3
+
+        return HostResponse_v3
+    if version == "v2":
+        from agents.v2.models import HostResponse
+
+        return HostResponse
+    from agents.v3.models import HostResponse
+
+    return HostResponse
+
+
+class AnswerOracle:
+    """
+    Answers host questions from recorded and cached answers, asking the live host only for unseen questions.
+    It takes the host's prompt inputs and returns the version's `HostResponse`, so it can stand in for `host_llm`.
+    Args:
+        version: Agent version whose host response model is returned.
+        live_host: Host runnable for unseen questions, unseen questions raise `UnseenQuestionError` without one.
+        cache_path: JSONL file of live answers, read on creation and appended to after every live call.
+    """
+
+    def __init__(
+        self,
+        version: Literal["v1", "v2", "v3"],
+        live_host: Optional[Runnable] = None,
+        cache_path: Optional[str] = None,
+    ):
+        self.response_model = _response_model(version)
+        self.live_host = live_host
+        self.cache_path = cache_path
+        self._recorded: Dict[Tuple[str, str], RecordedAnswer] = {}
+        self._cached: Dict[Tuple[str, str], RecordedAnswer] = {}
+        self._live: Dict[Tuple[str, str], Future] = {}  # live calls in flight
+        self._stats = OracleStats()
+        self._lock = threading.Lock()
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path) as f:
+                for line in f:
+                    record = json.loads(line)
+                    answer = RecordedAnswer.model_validate(record["answer"])
+                    self._cached[(record["topic"], normalize_question(record["question"]))] = answer
+
+    def __len__(self) -> int:
+        return len(self._recorded.keys() | self._cached.keys())
+
+    def stats(self) -> OracleStats:
+        with self._lock:
+            return self._stats.model_copy()
+
+    def add_transcript(self, transcript: Dict[str, Any]):
+        """
+        Record the answers of a game.
+        Args:
+            transcript: A transcript as read by `CorpusReader.iter_records`.
+        """
+        turns = transcript["turns"]
+        for index, turn in enumerate(turns):
+            answer = turn.get("answer")
+            if answer is None:
+                continue
+            correct = transcript["correct_guess"] and index == len(turns) - 1
+            if correct:
+                recorded = RecordedAnswer(response="yes", correct_guess=True)
+            elif answer.lower() in ("yes", "no"):
+                recorded = RecordedAnswer(response=answer.lower(), confidence=turn.get("confidence"))
+            else:
+                continue
+            self._recorded[(transcript["topic"], normalize_question(turn["question"]))] = recorded
+
+    @classmethod
+    def from_corpus(
+        cls,
+        path: str,
+        version: Literal["v1", "v2", "v3"],
+        live_host: Optional[Runnable] = None,
+        cache_path: Optional[str] = None,
+    ) -> "AnswerOracle":
+        """Oracle with the answers of every game in the corpus at `path`."""
+        oracle = cls(version, live_host, cache_path)
+        for record in CorpusReader(path).iter_records():
+            oracle.add_transcript(record)
+        return oracle
+
+    def _response(self, answer: RecordedAnswer) -> BaseModel:
+        fields = self.response_model.model_fields
+        response = next(
+            member
+            for member in fields["response"].annotation
+            if member.value.lower() == answer.response
+        )
+        values: Dict[str, Any] = {"response": response}
+        if "correct_guess" in fields:
+            values["correct_guess"] = answer.correct_guess
+        if "analysis" in fields:
+            values["analysis"] = ""
+        if "confidence" in fields and answer.confidence is not None:
+            values["confidence"] = answer.confidence
+        return self.response_model(**values)
+
+    def _ask_live(self, key: Tuple[str, str], input: Dict[str, Any], config) -> RecordedAnswer:
+        if self.live_host is None:
+            raise UnseenQuestionError(f"No recorded answer to {input['question']!r} about {input['topic']!r}")
+        response = self.live_host.invoke(input, config)
+        answer = RecordedAnswer(
+            response=getattr(response.response, "value", response.response).lower(),
+            correct_guess=getattr(response, "correct_guess", False),
+            confidence=getattr(response, "confidence", None),
+        )
+        with self._lock:
+            self._cached[key] = answer
+            if self.cache_path:
+                with open(self.cache_path, "a") as f:
+                    record = {"topic": input["topic"], "question": input["question"], "answer": answer.model_dump()}
+                    f.write(json.dumps(record) + "\n")
+        return answer
+
+    def invoke(self, input: Dict[str, Any], config=None) -> BaseModel:
+        key = (input["topic"], normalize_question(input["question"]))
+        live, asks = None, False
+        with self._lock:
+            self._stats.calls += 1
+            answer = self._recorded.get(key)
+            if answer is not None:
+                self._stats.recorded_hits += 1
+            else:
+                answer = self._cached.get(key)
+                if answer is not None:
+                    self._stats.cached_hits += 1
+                elif key in self._live:
+                    live = self._live[key]
+                    self._stats.shared_hits += 1
+                else:
+                    live = self._live[key] = Future()
+                    asks = True
+                    self._stats.live_calls += 1
+        if asks:
+            try:
+                answer = self._ask_live(key, input, config)
+            except BaseException as e:
+                live.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    del self._live[key]
+            live.set_result(answer)
+        elif live is not None:
+            answer = live.result()
+        return self._response(answer)
+
+    def as_runnable(self) -> Runnable:
+        return RunnableLambda(self.invoke, name="answer_oracle")
+
+
+class ReplayReport(BaseModel):
+    games: int
+    success_rate: float
+    avg_questions: float
+    error_rate: float
+    recorded_success_rate: float  # of the recorded games, for comparison
+    recorded_avg_questions: float
+    total_time: float
+    oracle: OracleStats
+    transcripts: List[Transcript] = []
+
+
+def replay_corpus(
+    path: str,
+    version: Literal["v1", "v2", "v3"],
+    configurable: Dict[str, Any],
+    cache_path: Optional[str] = None,
+    live: bool = True,
+    max_workers: int = 16,
+    max_questions: int = 20,
+    game_timeout: Optional[float] = None,
+) -> ReplayReport:
+    """
+    Replay every recorded game's topic with the guesser in `configurable`, answered by an `AnswerOracle`.
+    Args:
+        path: Directory of the recorded corpus.
+        version: Agent version of the guesser.
+        configurable: Role runnables, keyed like the graph's `configurable`; `host_llm` answers unseen questions.
+        cache_path: JSONL file of live answers shared between replays.
+        live: Whether unseen questions go to `host_llm`; if not, games that ask one are recorded as errors.
+        max_workers: Games in flight at once.
+        max_questions: Maximum number of questions per game.
+        game_timeout: Wall-clock seconds a game may take.
+    Returns:
+        The replay's outcomes next to the recorded ones, with the oracle's hit counts.
+    """
+    records = list(CorpusReader(path).iter_records())
+    live_host = configurable.get("host_llm") if live else None
+    oracle = AnswerOracle(version, live_host, cache_path)
+    for record in records:
+        oracle.add_transcript(record)
+    # the v1 host node sleeps before every answer to avoid rate limits, which the oracle does not need
+    configurable = {**configurable, "host_llm": oracle.as_runnable(), "rate_limit_delay": 0}
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        transcripts = list(
+            executor.map(
+                lambda record: play_transcript(
+                    version, record["topic"], configurable, max_questions, game_timeout
+                ),
+                records,
+            )
+        )
+    games = len(transcripts) or 1
+    return ReplayReport(
+        games=len(transcripts),
+        success_rate=sum(t.correct_guess for t in transcripts) / games,
+        avg_questions=sum(t.num_questions for t in transcripts) / games,
+        error_rate=sum(t.error_type is not None for t in transcripts) / games,
+        recorded_success_rate=sum(r["correct_guess"] for r in records) / games,
+        recorded_avg_questions=sum(r["num_questions"] for r in records) / games,
+        total_time=time.perf_counter() - start,
+        oracle=oracle.stats(),
+        transcripts=transcripts,
+    )
+
+
+def _print_report(report: ReplayReport):
+    print(f"Games replayed: {report.games} in {report.total_time:.1f}s")
+    print(f"Success rate: {report.success_rate:.2%} (recorded: {report.recorded_success_rate:.2%})")
+    print(f"Average questions: {report.avg_questions:.2f} (recorded: {report.recorded_avg_questions:.2f})")
+    print(f"Error rate: {report.error_rate:.2%}")
+    oracle = report.oracle
+    print(
+        f"Host answers: {oracle.calls} ({oracle.recorded_hits} recorded, {oracle.cached_hits} cached, "
+        f"{oracle.shared_hits} shared, {oracle.live_calls} live, hit rate {oracle.hit_rate:.2%})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded corpus with a new guesser.")
+    parser.add_argument("corpus")
+    parser.add_argument("--version", choices=["v1", "v2", "v3"], default="v3")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--cache", default=None, help="JSONL file of live host answers, reused between replays")
+    parser.add_argument("--offline", action="store_true", help="never call the live host")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--max-questions", type=int, default=20)
+    parser.add_argument("--game-timeout", type=float, default=None)
+    parser.add_argument("--fake", action="store_true", help="replay with fake LLMs (for dry runs)")
+    args = parser.parse_args()
+
+    if args.fake:
+        from agents.fakes import get_fake_configurable
+
+        configurable = get_fake_configurable(args.version)
+    else:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        configurable = get_configurable(args.version, args.model)
+
+    report = replay_corpus(
+        args.corpus,
+        args.version,
+        configurable,
+        cache_path=args.cache,
+        live=not args.offline,
+        max_workers=args.workers,
+        max_questions=args.max_questions,
+        game_timeout=args.game_timeout,
+    )
+    _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Memory-compact storage for evaluation results.
+
+A sweep over 100k games used to keep 100k `GameResult` models, each with its own copy of the transcript.
+`ResultStore` keeps outcomes, counts and timings in fixed-width NumPy columns instead,
+and stores transcripts out of line as ids into a table of interned message strings.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Literal, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from agents.cascade import CascadeStats
+from agents.ensemble import EnsembleStats
+from agents.hedging import HedgingStats
+from agents.resilience import ResilienceStats
+
+
+# categories of games that ended with an exception, rather than by the game's rules
+ERROR_TYPES = ("error", "timeout")
+
+
+class GameResult(BaseModel):
+    topic: str
+    correct_guess: bool
+    num_questions: int
+    error: str | None
+    total_time: float
+    messages: List[str]
+    # "timeout" if the game ran past its time budget, "error" for any other exception
+    error_type: Optional[Literal["error", "timeout"]] = None
+    # chat model calls and the tokens the provider reported, see agents/usage.py
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+class EvaluationMetrics(BaseModel):
+    success_rate: float
+    avg_questions_when_correct: float
+    avg_time_per_game: float
+    error_rate: float
+    timeout_rate: float = 0.0
+    avg_llm_calls_per_game: float = 0.0
+    avg_tokens_per_game: float = 0.0
+    # retries and circuit breaker state per provider, see agents/resilience.py
+    resilience: Dict[str, ResilienceStats] = {}
+    # host cascade hit rate, latency and agreement, see agents/cascade.py
+    cascade: Dict[str, CascadeStats] = {}
+    # host ensemble stability and cost, see agents/ensemble.py
+    ensemble: Dict[str, EnsembleStats] = {}
+    # hedged calls per role, see agents/hedging.py
+    hedging: Dict[str, HedgingStats] = {}
+
+
+class _StringTable:
+    """Interns strings, so every distinct string is stored once and referenced by id."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def intern(self, value: str) -> int:
+        id_ = self.ids.get(value)
+        if id_ is None:
+            id_ = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return id_
+
+
+class ResultStore:
+    """
+    Array-backed container of game results, grows like a list.
+    Args:
+        capacity: Number of results to allocate room for up front.
+        keep_transcripts: Whether to keep the messages of every game.
+    """
+
+    def __init__(self, capacity: int = 1024, keep_transcripts: bool = True):
+        self.keep_transcripts = keep_transcripts
+        self._size = 0
+        self._correct = np.zeros(capacity, dtype=np.bool_)
+        self._num_questions = np.zeros(capacity, dtype=np.int16)
+        self._total_time = np.zeros(capacity, dtype=np.float32)
+        self._topic = np.zeros(capacity, dtype=np.int32)
+        self._error = np.full(capacity, -1, dtype=np.int32)  # -1 means no error
+        self._error_type = np.full(capacity, -1, dtype=np.int8)  # index into ERROR_TYPES
+        self._llm_calls = np.zeros(capacity, dtype=np.int32)
+        self._input_tokens = np.zeros(capacity, dtype=np.int64)
+        self._output_tokens = np.zeros(capacity, dtype=np.int64)
+        # transcript of game i is _message_ids[_transcript_start[i]:_transcript_start[i + 1]]
+        self._transcript_start = np.zeros(capacity + 1, dtype=np.int64)
+        self._message_ids = np.zeros(capacity * 16, dtype=np.int32)
+        self._topics = _StringTable()
+        self._errors = _StringTable()
+        self._messages = _StringTable()
+
+    @classmethod
+    def from_results(cls, results: Iterable[GameResult], **kwargs) -> "ResultStore":
+        store = cls(**kwargs)
+        for result in results:
+            store.append(result)
+        return store
+
+    def _grow(self, capacity: int):
+        for name in (
+            "_correct",
+            "_num_questions",
+            "_total_time",
+            "_topic",
+            "_error",
+            "_error_type",
+            "_llm_calls",
+            "_input_tokens",
+            "_output_tokens",
+        ):
+            column = getattr(self, name)
+            grown = np.full(
+                capacity, -1 if name in ("_error", "_error_type") else 0, dtype=column.dtype
+            )
+            grown[: self._size] = column[: self._size]
+            setattr(self, name, grown)
+        starts = np.zeros(capacity + 1, dtype=np.int64)
+        starts[: self._size + 1] = self._transcript_start[: self._size + 1]
+        self._transcript_start = starts
+
+    def append(self, result: GameResult):
+        if self._size == len(self._correct):
+            self._grow(max(2 * len(self._correct), 16))
+        i = self._size
+        self._correct[i] = result.correct_guess
+        self._num_questions[i] = result.num_questions
+        self._total_time[i] = result.total_time
+        self._topic[i] = self._topics.intern(result.topic)
+        self._error[i] = self._errors.intern(result.error) if result.error else -1
+        self._error_type[i] = ERROR_TYPES.index(result.error_type) if result.error_type else -1
+        self._llm_calls[i] = result.llm_calls
+        self._input_tokens[i] = result.input_tokens
+        self._output_tokens[i] = result.output_tokens
+
+        start = self._transcript_start[i]
+        messages = result.messages if self.keep_transcripts else []
+        end = start + len(messages)
+        if end > len(self._message_ids):
+            grown = np.zeros(max(2 * len(self._message_ids), end), dtype=np.int32)
+            grown[:start] = self._message_ids[:start]
+            self._message_ids = grown
+        self._message_ids[start:end] = [self._messages.intern(m) for m in messages]
+        self._transcript_start[i + 1] = end
+        self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, i: int) -> GameResult:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("result index out of range")
+        error_id = self._error[i]
+        error_type = self._error_type[i]
+        start, end = self._transcript_start[i], self._transcript_start[i + 1]
+        return GameResult(
+            topic=self._topics.strings[self._topic[i]],
+            correct_guess=bool(self._correct[i]),
+            num_questions=int(self._num_questions[i]),
+            error=self._errors.strings[error_id] if error_id >= 0 else None,
+            total_time=float(self._total_time[i]),
+            messages=[self._messages.strings[m] for m in self._message_ids[start:end]],
+            error_type=ERROR_TYPES[error_type] if error_type >= 0 else None,
+            llm_calls=int(self._llm_calls[i]),
+            input_tokens=int(self._input_tokens[i]),
+            output_tokens=int(self._output_tokens[i]),
+        )
+
+    def __iter__(self) -> Iterator[GameResult]:
+        for i in range(self._size):
+            yield self[i]
+
+    def save(self, path: str):
+        """
+        Write the results to a compressed `.npz` file, e.g. to compare runs later (see evals/compare.py).
+        Args:
+            path: File to write, `.npz` is appended if missing.
+        """
+        n, messages = self._size, self._transcript_start[self._size]
+        np.savez_compressed(
+            path,
+            correct=self._correct[:n],
+            num_questions=self._num_questions[:n],
+            total_time=self._total_time[:n],
+            topic=self._topic[:n],
+            error=self._error[:n],
+            error_type=self._error_type[:n],
+            llm_calls=self._llm_calls[:n],
+            input_tokens=self._input_tokens[:n],
+            output_tokens=self._output_tokens[:n],
+            transcript_start=self._transcript_start[: n + 1],
+            message_ids=self._message_ids[:messages],
+            topics=np.array(self._topics.strings, dtype=str),
+            errors=np.array(self._errors.strings, dtype=str),
+            messages=np.array(self._messages.strings, dtype=str),
+            keep_transcripts=np.array(self.keep_transcripts),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "ResultStore":
+        """Read results written by `save`."""
+        with np.load(path) as data:
+            n = len(data["correct"])
+            store = cls(capacity=max(n, 1), keep_transcripts=bool(data["keep_transcripts"]))
+            for name in (
+                "correct",
+                "num_questions",
+                "total_time",
+                "topic",
+                "error",
+                "error_type",
+                "llm_calls",
+                "input_tokens",
+                "output_tokens",
+            ):
+                getattr(store, f"_{name}")[:n] = data[name]
+            store._transcript_start[: n + 1] = data["transcript_start"]
+            store._message_ids = data["message_ids"].copy()
+            for table, strings in (
+                (store._topics, data["topics"]),
+                (store._errors, data["errors"]),
+                (store._messages, data["messages"]),
+            ):
+                for string in strings.tolist():
+                    table.intern(string)
+        store._size = n
+        return store
+
+    @property
+    def topic_ids(self) -> np.ndarray:
+        """Index of each game's topic in `topic_names`."""
+        return self._topic[: self._size]
+
+    @property
+    def topic_names(self) -> List[str]:
+        return self._topics.strings
+
+    @property
+    def correct_guess(self) -> np.ndarray:
+        return self._correct[: self._size]
+
+    @property
+    def num_questions(self) -> np.ndarray:
+        return self._num_questions[: self._size]
+
+    @property
+    def total_time(self) -> np.ndarray:
+        return self._total_time[: self._size]
+
+    @property
+    def has_error(self) -> np.ndarray:
+        return self._error[: self._size] >= 0
+
+    @property
+    def timed_out(self) -> np.ndarray:
+        return self._error_type[: self._size] == ERROR_TYPES.index("timeout")
+
+    @property
+    def llm_calls(self) -> np.ndarray:
+        return self._llm_calls[: self._size]
+
+    @property
+    def total_tokens(self) -> np.ndarray:
+        return self._input_tokens[: self._size] + self._output_tokens[: self._size]
+
+    @property
+    def topics(self) -> List[str]:
+        return [self._topics.strings[t] for t in self._topic[: self._size]]
+
+    def compute_metrics(self) -> EvaluationMetrics:
+        """Compute the evaluation metrics with vectorized operations over the columns."""
+        if not self._size:
+            raise ValueError("No results to compute metrics for")
+        correct = self.correct_guess
+        return EvaluationMetrics(
+            success_rate=float(correct.mean()),
+            avg_questions_when_correct=(
+                float(self.num_questions[correct].mean()) if correct.any() else 0
+            ),
+            avg_time_per_game=float(self.total_time.mean(dtype=np.float64)),
+            error_rate=float(self.has_error.mean()),
+            timeout_rate=float(self.timed_out.mean()),
+            avg_llm_calls_per_game=float(self.llm_calls.mean()),
+            avg_tokens_per_game=float(self.total_tokens.mean()),
+        )
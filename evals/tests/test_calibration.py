@@ -0,0 +1,37 @@
+import pytest
+
+from agents.fakes import get_fake_configurable
+from evals.calibration import calibration_report
+from evals.corpus import CorpusReader, generate_corpus
+
+
+def _record(topic, turns):
+    return {
+        "topic": topic,
+        "turns": [{"posterior_top": top, "posterior_confidence": p} for top, p in turns],
+    }
+
+
+def test_calibration_report_bins_turns():
+    """Test the calibration error and Brier score against values computed by hand"""
+    records = [
+        _record("dog", [("cat", 0.2), ("dog", 0.85)]),
+        _record("car", [("car", 0.2), ("bus", 0.85)]),
+        {"topic": "apple", "turns": [{"posterior_top": None, "posterior_confidence": None}]},
+    ]
+    report = calibration_report(records, num_bins=4)
+
+    assert report.turns == 4
+    assert [(b.lower, b.turns, b.accuracy) for b in report.bins] == [(0.0, 2, 0.5), (0.75, 2, 0.5)]
+    assert report.expected_calibration_error == pytest.approx((2 * 0.3 + 2 * 0.35) / 4)
+    assert report.brier_score == pytest.approx((0.2**2 + 0.15**2 + 0.8**2 + 0.85**2) / 4)
+
+
+def test_calibration_of_recorded_games(tmp_path):
+    """Test that v3 self-play transcripts record the posterior for the calibration report"""
+    generate_corpus("v3", get_fake_configurable("v3"), ["dog", "car"], str(tmp_path))
+    report = calibration_report(CorpusReader(str(tmp_path)).iter_records())
+
+    # a question per turn until "dog" (4th guess) and "car" (6th)
+    assert report.turns == 10
+    assert 0 <= report.expected_calibration_error <= 1
@@ -0,0 +1,69 @@
+import numpy as np
+
+from evals.compare import bootstrap_sums, compare_runs, pair_results
+from evals.results import GameResult, ResultStore
+
+
+def _store(outcomes, time=10.0):
+    """Results of (topic, correct, num_questions) games."""
+    return ResultStore.from_results(
+        GameResult(
+            topic=topic,
+            correct_guess=correct,
+            num_questions=num_questions,
+            error=None,
+            total_time=time,
+            messages=[],
+            input_tokens=100 * num_questions,
+        )
+        for topic, correct, num_questions in outcomes
+    )
+
+
+def test_games_are_paired_by_topic_and_run_index():
+    """Test that the k-th game of a topic is paired with the k-th game of the same topic"""
+    baseline = _store([("dog", True, 3), ("car", False, 20), ("dog", False, 20), ("tree", True, 5)])
+    candidate = _store([("car", True, 8), ("dog", True, 4), ("dog", True, 6), ("car", True, 2), ("cat", True, 1)])
+
+    b, c = pair_results(baseline, candidate)
+    pairs = sorted(zip(b.tolist(), c.tolist()))
+    assert pairs == [(0, 1), (1, 0), (2, 2)]
+
+
+def test_paired_bootstrap_verdicts(tmp_path):
+    """Test the verdicts for an unchanged, a better and a slower candidate, with runs read back from disk"""
+    rng = np.random.default_rng(0)
+    outcomes = [(f"topic-{i % 50}", bool(rng.random() < 0.5), int(rng.integers(1, 21))) for i in range(400)]
+    baseline = _store(outcomes)
+    baseline.save(str(tmp_path / "baseline.npz"))
+    baseline = ResultStore.load(str(tmp_path / "baseline.npz"))
+    assert list(baseline) == list(_store(outcomes))
+
+    same = compare_runs(baseline, _store(outcomes), resamples=500, seed=0)
+    assert same.pairs == 400 and same.verdict == "no significant difference"
+    assert all(m.ci_low == m.ci_high == 0 for m in same.metrics)
+
+    # solves every topic the baseline missed, in the same number of questions
+    better = compare_runs(baseline, _store([(t, True, q) for t, _, q in outcomes]), resamples=500, seed=0)
+    success = better.metrics[0]
+    assert success.name == "success_rate" and success.verdict == "improvement"
+    assert success.ci_low > 0.4 and better.verdict == "improvement"
+
+    slower = compare_runs(baseline, _store(outcomes, time=11.0), resamples=500, seed=0)
+    time_metric = next(m for m in slower.metrics if m.name == "avg_time_per_game")
+    assert time_metric.verdict == "regression" and time_metric.difference == 1.0
+    assert slower.verdict == "regression"
+
+
+def test_bootstrap_sums_are_exact_resample_sums():
+    """Test that the bootstrap sums match summing each resample's draws, even for large token counts"""
+    rng = np.random.default_rng(0)
+    columns = np.stack([np.ones(1000), rng.integers(100_000, 1_000_000, 1000)], axis=1)
+    sums = bootstrap_sums(columns, resamples=5, seed=1, chunk_size=2)
+
+    draws_rng = np.random.default_rng(1)
+    expected = []
+    for size in (2, 2, 1):
+        draws = draws_rng.integers(0, 1000, size=(size, 1000))
+        expected += [columns[row].sum(axis=0) for row in draws]
+    np.testing.assert_array_equal(sums, np.array(expected))
@@ -0,0 +1,62 @@
+import gzip
+import os
+
+from agents.fakes import get_fake_configurable
+from evals.corpus import CorpusReader, generate_corpus
+
+TOPICS = ["apple", "dog", "car", "spaceship"]
+
+
+def test_corpus_round_trip(tmp_path):
+    """Test that generated transcripts are sharded, listed in the manifest and read back lazily"""
+    manifest = generate_corpus(
+        "v3",
+        get_fake_configurable("v3"),
+        iter(TOPICS),
+        str(tmp_path),
+        games_per_topic=3,
+        max_workers=4,
+        shard_max_bytes=1,  # one transcript per shard
+        max_questions=10,
+    )
+    assert manifest.records == 12
+    assert len(manifest.shards) == 12
+    assert all(
+        os.path.getsize(tmp_path / shard.file) == shard.compressed_bytes for shard in manifest.shards
+    )
+
+    reader = CorpusReader(str(tmp_path))
+    assert len(reader) == 12
+    transcripts = list(reader)
+    assert sorted(t.topic for t in transcripts) == sorted(TOPICS * 3)
+
+    car = next(t for t in transcripts if t.topic == "car")
+    assert car.correct_guess and car.num_questions == 6
+    assert [turn.answer for turn in car.turns] == ["No"] * 5 + ["Correct guess!"]
+    assert all(turn.candidates for turn in car.turns)
+
+    spaceship = next(t for t in transcripts if t.topic == "spaceship")
+    assert not spaceship.correct_guess and len(spaceship.turns) == 10
+
+
+def test_shards_are_bounded_and_readable_individually(tmp_path):
+    """Test that shards roll over at the size bound and can be read one at a time"""
+    manifest = generate_corpus(
+        "v2",
+        get_fake_configurable("v2"),
+        TOPICS * 25,
+        str(tmp_path),
+        max_workers=8,
+        shard_max_bytes=16 * 1024,
+    )
+    assert manifest.records == 100
+    assert len(manifest.shards) > 1
+    for shard in manifest.shards:
+        # a shard closes with the line that crosses the bound
+        assert shard.uncompressed_bytes < 20 * 1024
+        with gzip.open(tmp_path / shard.file, "rt") as f:
+            assert sum(1 for _ in f) == shard.records
+
+    reader = CorpusReader(str(tmp_path))
+    assert sum(1 for _ in reader.iter_records(shards=[0])) == manifest.shards[0].records
+    assert sum(1 for _ in reader.iter_records()) == 100
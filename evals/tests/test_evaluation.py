@@ -0,0 +1,151 @@
+import itertools
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from agents.cascade import HostCascade, register_cascade
+from agents.ensemble import HostEnsemble, register_ensemble
+from agents.fakes import get_fake_configurable
+from agents.v2.models import HostResponse, YesNoResponse
+from evals.evaluation import TwentyQuestionsEvaluator
+
+
+@pytest.mark.parametrize("executor", ["graph", "loop"])
+def test_game_timeout_is_recorded_as_timeout(executor):
+    """Test that games past their time budget stop early and are recorded as timeouts"""
+    config = {
+        "configurable": {**get_fake_configurable("v2", latency=0.05), "max_questions": 20},
+        "recursion_limit": 50,
+    }
+    evaluator = TwentyQuestionsEvaluator(
+        test_topics=["spaceship", "apple"],
+        config=config,
+        agent_version="v2",
+        executor=executor,
+        game_timeout=0.3,
+    )
+    metrics = evaluator.run_evaluation()
+
+    timed_out, solved = evaluator.results[0], evaluator.results[1]
+    if timed_out.topic != "spaceship":
+        timed_out, solved = solved, timed_out
+    assert timed_out.error_type == "timeout"
+    assert 0 < timed_out.num_questions < 20
+    assert timed_out.total_time < 1
+    assert solved.correct_guess and solved.error_type is None
+    assert metrics.timeout_rate == 0.5
+
+
+@pytest.mark.parametrize("executor", ["graph", "loop"])
+def test_evaluator_plays_v3_games(executor):
+    """Test that v3 games are played with the v3 graph or nodes"""
+    config = {"configurable": {**get_fake_configurable("v3"), "max_questions": 20}, "recursion_limit": 50}
+    evaluator = TwentyQuestionsEvaluator(
+        test_topics=["car"],
+        config=config,
+        agent_version="v3",
+        executor=executor,
+    )
+    evaluator.run_evaluation()
+
+    # "car" is the 6th guess
+    result = evaluator.results[0]
+    assert result.error is None
+    assert result.correct_guess and result.num_questions == 6
+
+
+def test_evaluator_reports_cascade_stats():
+    """Test that the evaluator reports the cascade's stats for the evaluation"""
+    configurable = get_fake_configurable("v2")
+    unsure = HostResponse(response=YesNoResponse.NO, confidence=0.3)
+    sure = HostResponse(response=YesNoResponse.NO, confidence=0.9)
+    answers = iter([unsure, sure] * 3)
+    configurable["host_llm"] = register_cascade(
+        HostCascade(
+            RunnableLambda(lambda _: next(answers)),
+            RunnableLambda(lambda _: sure),
+            name="test_host",
+        )
+    )
+    evaluator = TwentyQuestionsEvaluator(
+        test_topics=["car"],
+        config={"configurable": {**configurable, "max_questions": 20}, "recursion_limit": 50},
+        agent_version="v2",
+    )
+    metrics = evaluator.run_evaluation()
+
+    stats = metrics.cascade["test_host"]
+    # "car" is the 6th guess, the host model answers the 5 wrong guesses
+    assert stats.calls == 5 and stats.escalations == 3
+    assert metrics.success_rate == 1.0
+
+
+def test_evaluator_reports_ensemble_stats():
+    """Test that the evaluator reports the host ensemble's stability and cost multiplier"""
+    configurable = get_fake_configurable("v2")
+    answers = itertools.cycle([YesNoResponse.NO, YesNoResponse.NO, YesNoResponse.YES])
+    configurable["host_llm"] = register_ensemble(
+        HostEnsemble(
+            [RunnableLambda(lambda _: HostResponse(response=next(answers))) for _ in range(3)],
+            early_stop=False,
+            name="test_ensemble",
+        )
+    )
+    evaluator = TwentyQuestionsEvaluator(
+        test_topics=["car"],
+        config={"configurable": {**configurable, "max_questions": 20}, "recursion_limit": 50},
+        agent_version="v2",
+    )
+    metrics = evaluator.run_evaluation()
+
+    stats = metrics.ensemble["test_ensemble"]
+    # one of the three votes on each of the 5 wrong guesses dissents
+    assert stats.answers == 5 and stats.cost_multiplier == 3.0
+    assert stats.stability == pytest.approx(2 / 3) and stats.unanimous == 0
+    assert metrics.success_rate == 1.0
+
+
+def _fail(_):
+    raise AssertionError("the two-call guesser should not be used")
+
+
+@pytest.mark.parametrize("executor", ["graph", "loop"])
+def test_fused_guesser_mode_counts_calls_and_tokens(executor):
+    """Test that the fused guesser makes one call per turn and that the game's model calls and tokens are counted"""
+    chat_model = GenericFakeChatModel(
+        messages=itertools.repeat(
+            AIMessage(
+                content="", usage_metadata={"input_tokens": 100, "output_tokens": 10, "total_tokens": 110}
+            )
+        )
+    )
+    fused_llm = get_fake_configurable("v2")["guesser_fused_llm"]
+
+    def guesser(input):
+        chat_model.invoke("count this call")
+        return fused_llm.invoke(input)
+
+    configurable = {
+        **get_fake_configurable("v2"),
+        "guesser_recommender_llm": RunnableLambda(_fail),
+        "guesser_evaluator_llm": RunnableLambda(_fail),
+        "guesser_mode": "fused",
+        "guesser_fused_llm": RunnableLambda(guesser),
+        "max_questions": 20,
+    }
+    evaluator = TwentyQuestionsEvaluator(
+        test_topics=["car"],
+        config={"configurable": configurable, "recursion_limit": 50},
+        agent_version="v2",
+        executor=executor,
+    )
+    metrics = evaluator.run_evaluation()
+
+    # "car" is the 6th guess, one guesser call per question
+    result = evaluator.results[0]
+    assert result.correct_guess and result.num_questions == 6
+    assert result.llm_calls == 6
+    assert (result.input_tokens, result.output_tokens) == (600, 60)
+    assert metrics.avg_tokens_per_game == 660
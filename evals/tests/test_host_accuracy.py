@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from agents.v1.models import HostResponse_v3, YesNoResponse
+from evals.host_accuracy import aevaluate_host, evaluate_host, load_cases
+
+
+def _fake_host(input):
+    """Answers yes only when the topic is named, and fails on empty questions."""
+    time.sleep(0.05)
+    if not input["question"]:
+        raise ValueError("empty question")
+    named = input["topic"] in input["question"].lower()
+    return HostResponse_v3(
+        response=YesNoResponse.YES if named else YesNoResponse.NO, correct_guess=named, analysis=""
+    )
+
+
+def test_host_accuracy_report():
+    """Test that the report scores the dataset by question type and batches the calls concurrently"""
+    cases = load_cases("evals/host_cases.jsonl")
+    report = evaluate_host(RunnableLambda(_fake_host), cases, "fake", max_concurrency=len(cases))
+
+    assert report.overall.cases == len(cases) and report.overall.errors == 0
+    guess = report.by_type["guess"]
+    # the fake host gets every guess right except "Is it a fruit that grows on trees?" and "keyboard instrument"
+    assert (guess.true_yes, guess.false_no, guess.true_no) == (4, 2, 2)
+    assert report.guess_judgements == 8 and report.guess_judgement_accuracy == 1.0
+    assert report.by_type["category"].true_yes == 0  # it never answers yes to a category
+    # all calls run at once instead of one after the other
+    assert report.total_time < 0.05 * len(cases) / 4
+
+
+def test_async_host_accuracy_counts_errors():
+    """Test that abatch is bounded by max_concurrency and failed calls count as errors"""
+    cases = load_cases("evals/host_cases.jsonl")[:8]
+    cases[0].question = ""
+    report = asyncio.run(aevaluate_host(RunnableLambda(_fake_host), cases, max_concurrency=4))
+    assert report.overall.errors == 1 and report.overall.cases == 8
+    assert report.total_time >= 0.1  # two rounds of 4 calls
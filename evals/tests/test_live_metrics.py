@@ -0,0 +1,69 @@
+import random
+import urllib.request
+
+import pytest
+
+from evals.live_metrics import LiveMetrics, QuantileSketch, start_metrics_server
+from evals.results import GameResult
+
+
+def _result(total_time: float, correct: bool = True, num_questions: int = 5) -> GameResult:
+    return GameResult(
+        topic="dog",
+        correct_guess=correct,
+        num_questions=num_questions,
+        error=None if correct else "Max questions reached!",
+        total_time=total_time,
+        messages=[],
+    )
+
+
+def test_quantile_sketch_relative_accuracy():
+    """Test that sketch quantiles are within the relative accuracy of the exact ones"""
+    rng = random.Random(0)
+    values = sorted(rng.lognormvariate(0, 1) for _ in range(10_000))
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+    assert sketch.count == len(values)
+
+
+def test_live_metrics_recent_window():
+    """Test that a slowdown shows up in the recent window quantiles"""
+    now = [0.0]
+    metrics = LiveMetrics(window_seconds=10, clock=lambda: now[0])
+    for _ in range(100):
+        metrics.record(_result(5.0))
+    now[0] = 25
+    for _ in range(10):
+        metrics.record(_result(50.0, correct=False, num_questions=20))
+    now[0] = 36
+    metrics.record(_result(50.0, correct=False, num_questions=20))
+
+    snapshot = metrics.snapshot()
+
+    assert snapshot["games"] == 111
+    assert snapshot["success_rate"] == pytest.approx(100 / 111)
+    assert snapshot["avg_questions_when_correct"] == 5
+    assert snapshot["turn_seconds_p50"] == pytest.approx(1.0, rel=0.02)
+    assert snapshot["recent_turn_seconds_p50"] == pytest.approx(2.5, rel=0.02)
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    """Test that the endpoint serves the current metrics in the Prometheus format"""
+    metrics = LiveMetrics(labels={"agent_version": "v2"})
+    metrics.record(_result(2.0))
+    server = start_metrics_server(metrics, port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        body = urllib.request.urlopen(url).read().decode()
+    finally:
+        server.shutdown()
+
+    assert 'twenty_questions_games_total{agent_version="v2"} 1' in body
+    assert "# TYPE twenty_questions_turn_seconds summary" in body
+    assert 'twenty_questions_game_seconds{agent_version="v2",quantile="0.5"}' in body
@@ -0,0 +1,82 @@
+import json
+import os
+import time
+
+from agents.fakes import get_fake_configurable
+from evals.evaluation import TwentyQuestionsEvaluator
+from evals.profiling import StackSampler
+
+
+def _busy_wait(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        # gives up the GIL, so the sampler gets to run at its own interval rather than at the switch interval
+        time.sleep(0)
+
+
+def test_stack_sampler_samples_only_registered_thread():
+    """Test that the sampler counts collapsed stacks of the thread inside the block"""
+    sampler = StackSampler(interval=0.001)
+    sampler.start()
+    try:
+        with sampler.sample() as samples:
+            _busy_wait(0.3)
+    finally:
+        sampler.stop()
+
+    total = sum(samples.stacks.values())
+    assert total > 10
+    # a sample can land on entering or leaving the block, but the thread spends its time in the busy wait,
+    # and the stacks hold the frames that led there
+    busy_stack = f"{__name__}.test_stack_sampler_samples_only_registered_thread;{__name__}._busy_wait"
+    busy = sum(count for stack, count in samples.stacks.items() if stack.endswith(busy_stack))
+    assert busy >= 0.8 * total
+    assert 0 < samples.sampler_time <= sampler.sampler_time < 0.3
+
+
+def test_evaluator_writes_profiles(tmp_path):
+    """Test that profiled games get their own collapsed stacks and are aggregated into one flamegraph"""
+    config = {
+        "configurable": {**get_fake_configurable("v2", latency=0.02), "max_questions": 20},
+        "recursion_limit": 50,
+    }
+    evaluator = TwentyQuestionsEvaluator(
+        test_topics=["dog", "car", "apple"],
+        num_runs=2,
+        config=config,
+        agent_version="v2",
+        profile_sample_rate=1.0,
+        profile_dir=str(tmp_path),
+        profile_memory=True,
+    )
+    evaluator.run_evaluation()
+
+    assert len([name for name in os.listdir(tmp_path / "games") if name.endswith(".collapsed")]) == 6
+    with open(tmp_path / "games.jsonl") as f:
+        records = [json.loads(line) for line in f]
+    assert sorted(r["index"] for r in records) == list(range(6))
+    assert all(r["wall_time"] > 0 and r["queue_time"] >= 0 for r in records)
+
+    flamegraph = (tmp_path / "flamegraph.collapsed").read_text().splitlines()
+    assert any("agents.v2.nodes.guesser_node" in line for line in flamegraph)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in flamegraph) == sum(
+        r["samples"] for r in records
+    )
+    assert (tmp_path / "memory_top.txt").read_text().startswith("Peak traced memory")
+
+    # a sample can land on entering or leaving a game, but every game's own stacks are in the game's frames
+    for record in records:
+        name = f"{record['index']:06d}-{record['topic']}"
+        stacks = (tmp_path / "games" / f"{name}.collapsed").read_text().splitlines()
+        in_game = sum(
+            int(line.rsplit(" ", 1)[1]) for line in stacks if "TwentyQuestionsEvaluator._run_single_game" in line
+        )
+        assert in_game >= 0.8 * record["samples"] > 0
+        assert any("agents.v2.nodes." in line for line in stacks)
+        assert (tmp_path / "games" / f"{name}.memory.txt").read_text().startswith("Net traced memory")
+        assert record["memory_peak"] > 0
+        assert 0 < record["sampler_overhead"] < 0.5
+
+    summary = json.loads((tmp_path / "summary.json").read_text())
+    assert summary["profiled_games"] == 6
+    assert 0 < summary["sampler_overhead"] < 0.5
@@ -0,0 +1,110 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from agents.fakes import get_fake_configurable
+from agents.v2.models import HostResponse, YesNoResponse
+from evals.corpus import generate_corpus
+from evals.replay import AnswerOracle, UnseenQuestionError, normalize_question, replay_corpus
+
+TOPICS = ["car", "dog", "spaceship"]
+
+
+def _counting_host(configurable, calls):
+    host_llm = configurable["host_llm"]
+
+    def invoke(input):
+        calls.append(input["question"])
+        return host_llm.invoke(input)
+
+    return {**configurable, "host_llm": RunnableLambda(invoke), "rate_limit_delay": 0}
+
+
+def test_replay_only_calls_the_host_for_unseen_questions(tmp_path):
+    """Test that replays answer recorded questions offline and cache the live answers"""
+    corpus = str(tmp_path / "corpus")
+    generate_corpus("v3", get_fake_configurable("v3"), TOPICS, corpus, max_questions=10)
+
+    # the same guesser asks only recorded questions
+    calls = []
+    report = replay_corpus(corpus, "v3", _counting_host(get_fake_configurable("v3"), calls), max_questions=10)
+    assert calls == []
+    assert report.games == 3 and report.oracle.live_calls == 0
+    assert report.success_rate == report.recorded_success_rate
+    assert report.avg_questions == report.recorded_avg_questions
+
+    # a guesser with other guesses needs the live host for its new questions, once
+    guesses = ["tree", "dog", "car"]
+    cache = str(tmp_path / "host_cache.jsonl")
+    for _ in range(2):
+        calls = []
+        report = replay_corpus(
+            corpus,
+            "v3",
+            _counting_host(get_fake_configurable("v3", guesses), calls),
+            cache_path=cache,
+            max_questions=10,
+        )
+        assert report.success_rate == 2 / 3 and report.error_rate == 0
+        car = next(t for t in report.transcripts if t.topic == "car")
+        assert car.num_questions == 3
+    assert calls == []
+    assert report.oracle.cached_hits > 0 and report.oracle.live_calls == 0
+
+
+def test_oracle_without_live_host():
+    """Test that the oracle answers with the version's response model and fails on unseen questions"""
+    oracle = AnswerOracle("v1")
+    oracle.add_transcript(
+        {
+            "topic": "dog",
+            "correct_guess": True,
+            "turns": [
+                {"question": "Is it alive?", "answer": "Yes", "confidence": 0.9},
+                {"question": "Is it a dog?", "answer": "Correct guess!"},
+            ],
+        }
+    )
+    assert len(oracle) == 2
+    response = oracle.invoke({"topic": "dog", "question": "is it  ALIVE"})
+    assert response.response.value == "yes" and not response.correct_guess
+    assert oracle.invoke({"topic": "dog", "question": "Is it a dog?"}).correct_guess
+    assert normalize_question(" Is it a dog ?") == "is it a dog"
+
+    with pytest.raises(UnseenQuestionError):
+        oracle.invoke({"topic": "dog", "question": "Is it a cat?"})
+    assert oracle.stats().recorded_hits == 2 and oracle.stats().live_calls == 1
+
+
+def test_replay_skips_the_v1_rate_limit_delay(tmp_path):
+    """Test that v1 replays do not sleep before answers that the oracle gives without a host call"""
+    corpus = str(tmp_path / "corpus")
+    generate_corpus("v1", {**get_fake_configurable("v1"), "rate_limit_delay": 0}, ["dog"], corpus, max_questions=10)
+
+    report = replay_corpus(corpus, "v1", get_fake_configurable("v1"), max_questions=10)
+
+    assert report.success_rate == 1.0 and report.oracle.live_calls == 0
+    # four answers with the host node's default 1s delay would take 4s
+    assert report.total_time < 1
+
+
+def test_concurrent_unseen_questions_share_one_live_call():
+    """Test that games asking the same unseen question at once wait for one live call"""
+    calls = []
+
+    def live_host(input):
+        calls.append(input["question"])
+        time.sleep(0.2)
+        return HostResponse(response=YesNoResponse.NO)
+
+    oracle = AnswerOracle("v2", RunnableLambda(live_host))
+    questions = ["Is it a cat?", "is it a  cat", "IS IT A CAT?", "Is it a cat"]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        responses = list(executor.map(lambda q: oracle.invoke({"topic": "dog", "question": q}), questions))
+
+    assert len(calls) == 1
+    assert all(response.response == YesNoResponse.NO for response in responses)
+    stats = oracle.stats()
+    assert stats.live_calls == 1 and stats.shared_hits == 3 and stats.hit_rate == 0.75
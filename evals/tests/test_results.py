@@ -0,0 +1,73 @@
+import pytest
+
+from agents.fakes import get_fake_configurable
+from evals.evaluation import TwentyQuestionsEvaluator
+from evals.results import GameResult, ResultStore
+
+RESULTS = [
+    GameResult(
+        topic="dog",
+        correct_guess=True,
+        num_questions=4,
+        error=None,
+        total_time=1.5,
+        messages=["Is it an animal?", "Yes", "Is it a dog?", "Correct guess!"],
+    ),
+    GameResult(
+        topic="car",
+        correct_guess=False,
+        num_questions=20,
+        error="Max questions reached!",
+        total_time=4.5,
+        messages=["Is it an animal?", "No"],
+    ),
+    GameResult(
+        topic="dog",
+        correct_guess=True,
+        num_questions=2,
+        error="",
+        total_time=0.0,
+        messages=[],
+    ),
+]
+
+
+def test_result_store_round_trip():
+    """Test that results read back from the store equal the appended ones"""
+    store = ResultStore.from_results(RESULTS, capacity=1)
+
+    assert len(store) == 3
+    assert list(store) == [RESULTS[0], RESULTS[1], RESULTS[2].model_copy(update={"error": None})]
+    assert store[-1].topic == "dog"
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_result_store_metrics():
+    """Test the vectorized metrics against the values computed by hand"""
+    metrics = ResultStore.from_results(RESULTS).compute_metrics()
+
+    assert metrics.success_rate == pytest.approx(2 / 3)
+    assert metrics.avg_questions_when_correct == pytest.approx(3)
+    assert metrics.avg_time_per_game == pytest.approx(2)
+    assert metrics.error_rate == pytest.approx(1 / 3)
+
+
+def test_evaluator_records_outcomes_and_timings():
+    """Test that the evaluator stores the final state of each game"""
+    config = {
+        "configurable": {**get_fake_configurable("v2"), "max_questions": 20},
+        "recursion_limit": 100,
+    }
+    evaluator = TwentyQuestionsEvaluator(
+        test_topics=["dog", "car"], num_runs=2, config=config, agent_version="v2"
+    )
+
+    results = evaluator.run_evaluation(compute_metrics=False)
+
+    assert len(results) == 4
+    assert sorted(r.num_questions for r in results) == [4, 4, 6, 6]
+    assert all(r.correct_guess for r in results)
+    assert all(r.total_time > 0 for r in results)
+    assert "Correct guess!" in results[0].messages
+    assert "topic" not in config["configurable"]
@@ -0,0 +1,100 @@
+import collections
+
+import pytest
+
+from agents.fakes import get_fake_configurable
+from agents.topics import TopicCatalog, read_entries, write_catalog
+from evals.evaluation import TwentyQuestionsEvaluator
+from evals.topics import SampledTopics, TopicEntry, TopicFile, TopicList, TopicSource
+
+
+def _write_corpus(path, sizes):
+    with open(path, "w") as f:
+        f.write("# topic\tcategory\tweight\n\n")
+        for category, size in sizes.items():
+            for i in range(size):
+                f.write(f"{category}-{i}\t{category}\t{1 + i % 3}\n")
+
+
+def test_topic_file_streams_entries_and_filters_categories(tmp_path):
+    """Test that topics files are parsed line by line, with optional category and weight"""
+    path = tmp_path / "topics.txt"
+    path.write_text("# comment\nelephant\tanimal\t2.5\ncar\tvehicle\n\napple\n")
+
+    assert list(TopicFile(str(path)).entries()) == [
+        TopicEntry("elephant", "animal", 2.5),
+        TopicEntry("car", "vehicle", 1.0),
+        TopicEntry("apple", None, 1.0),
+    ]
+    vehicles = TopicFile(str(path), categories=["vehicle"])
+    assert list(vehicles) == ["car"] and len(vehicles) == 1
+
+
+def test_topic_file_and_catalog_parse_lines_alike(tmp_path):
+    """Test that a topics file gives the same entries to the evaluations and to the topic catalog"""
+    path = tmp_path / "topics.txt"
+    path.write_text("# comment\nelephant\tanimal\t2\t0.5\ncar\ndog\t\t3\n\n")
+    with open(tmp_path / "topics.cat", "wb") as f:
+        write_catalog(read_entries(str(path)), f)
+    catalog = TopicCatalog.open(str(tmp_path / "topics.cat"))
+
+    entries = set(TopicFile(str(path)).entries())
+    assert entries == {TopicEntry("elephant", "animal", 2.0, 0.5), TopicEntry("car"), TopicEntry("dog", None, 3.0)}
+    assert {catalog.entry(i) for i in range(len(catalog))} == entries
+
+
+def test_stratified_sample_is_proportional_and_seeded(tmp_path):
+    """Test that a stratified sample keeps the categories' proportions and depends only on the seed"""
+    path = tmp_path / "topics.txt"
+    _write_corpus(path, {"animal": 6000, "food": 3000, "vehicle": 1000})
+    source = TopicFile(str(path))
+
+    sample = SampledTopics(source, 100, method="stratified", seed=1)
+    counts = collections.Counter(entry.category for entry in sample.entries())
+    assert counts == {"animal": 60, "food": 30, "vehicle": 10}
+    assert len(set(sample)) == 100
+
+    assert list(SampledTopics(source, 100, seed=1)) == list(sample)
+    assert list(SampledTopics(source, 100, seed=2)) != list(sample)
+
+
+def test_weighted_sample_prefers_heavy_topics():
+    """Test that a weighted sample draws topics in proportion to their weight"""
+    source = TopicList(
+        [TopicEntry(f"light-{i}", weight=1) for i in range(1000)]
+        + [TopicEntry(f"heavy-{i}", weight=9) for i in range(1000)]
+    )
+    sample = SampledTopics(source, 200, method="weighted", seed=0)
+    heavy = sum(topic.startswith("heavy") for topic in sample)
+    # about 9 in 10 without replacement from an inexhaustible pool
+    assert 160 <= heavy <= 195
+
+
+def test_evaluator_plays_topic_source_each_run(tmp_path):
+    """Test that the evaluator streams a topic source once per run"""
+    path = tmp_path / "topics.txt"
+    path.write_text("dog\tanimal\ncar\tvehicle\napple\tfood\n")
+    config = {
+        "configurable": {**get_fake_configurable("v2"), "max_questions": 20},
+        "recursion_limit": 50,
+    }
+    evaluator = TwentyQuestionsEvaluator(
+        test_topics=TopicFile(str(path), categories=["animal", "vehicle"]),
+        num_runs=2,
+        config=config,
+        agent_version="v2",
+    )
+    metrics = evaluator.run_evaluation()
+
+    assert sorted(evaluator.results.topics) == ["car", "car", "dog", "dog"]
+    assert metrics.success_rate == 1.0
+
+
+def test_topic_sources_must_implement_entries():
+    """Test that a topic source without `entries` cannot be instantiated"""
+
+    class Incomplete(TopicSource):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
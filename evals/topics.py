@@ -0,0 +1,209 @@
+"""
+Topic sources for evaluations.
+
+A `TopicSource` is a re-iterable stream of topics, so the evaluator can play every topic `num_runs` times without holding
+the corpus in memory:
+- `TopicList` wraps an in-memory list.
+- `TopicFile` streams a topics file line by line, optionally keeping only some categories.
+- `SampledTopics` draws a fixed-size, seeded sample from another source in a single streaming pass, keeping only the sample:
+  `"uniform"` (reservoir sampling), `"stratified"` (categories in proportion to their size) or `"weighted"`
+  (by each topic's weight, Efraimidis-Spirakis reservoir).
+
+Topics files hold one topic per line, optionally followed by a category, a weight and a difficulty, separated by tabs:
+
+    elephant	animal	2.0
+    car	vehicle
+
+Blank lines and lines starting with `#` are skipped. The topic catalog (agents/topics.py) is built from the same files,
+so both parse them with `agents.topics.parse_topic_line`.
+"""
+
+import abc
+import heapq
+import math
+import random
+from typing import Iterable, Iterator, List, Literal, Optional, Set, Union
+
+from agents.topics import TopicEntry, parse_topic_line
+
+
+class TopicSource(abc.ABC):
+    """Re-iterable stream of topics. Subclasses implement `entries`."""
+
+    _count: Optional[int] = None
+
+    @abc.abstractmethod
+    def entries(self) -> Iterator[TopicEntry]:
+        """A fresh iterator over the source's entries, on every call."""
+
+    def __iter__(self) -> Iterator[str]:
+        for entry in self.entries():
+            yield entry.topic
+
+    def __len__(self) -> int:
+        # a streaming pass on first use, for progress bars and result capacity
+        if self._count is None:
+            self._count = sum(1 for _ in self.entries())
+        return self._count
+
+
+class TopicList(TopicSource):
+    """
+    Topics held in memory.
+    Args:
+        topics: Topic names or entries.
+    """
+
+    def __init__(self, topics: Iterable[Union[str, TopicEntry]]):
+        self._entries = [
+            topic if isinstance(topic, TopicEntry) else TopicEntry(topic) for topic in topics
+        ]
+
+    def entries(self) -> Iterator[TopicEntry]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TopicFile(TopicSource):
+    """
+    Topics streamed from a file, one line at a time.
+    Args:
+        path: Topics file, see the module docstring for the format.
+        categories: Categories to keep, all by default.
+    """
+
+    def __init__(self, path: str, categories: Optional[Iterable[str]] = None):
+        self.path = path
+        self.categories: Optional[Set[str]] = set(categories) if categories is not None else None
+
+    def entries(self) -> Iterator[TopicEntry]:
+        with open(self.path) as f:
+            for line in f:
+                entry = parse_topic_line(line)
+                if entry is None:
+                    continue
+                if self.categories is not None and entry.category not in self.categories:
+                    continue
+                yield entry
+
+
+def _reservoir(entries: Iterable[TopicEntry], k: int, rng: random.Random) -> List[TopicEntry]:
+    """Uniform sample of `k` entries in one pass (Algorithm R)."""
+    sample: List[TopicEntry] = []
+    for i, entry in enumerate(entries):
+        if i < k:
+            sample.append(entry)
+        else:
+            j = rng.randrange(i + 1)
+            if j < k:
+                sample[j] = entry
+    return sample
+
+
+def _weighted_reservoir(
+    entries: Iterable[TopicEntry], k: int, rng: random.Random
+) -> List[TopicEntry]:
+    """Sample of `k` entries without replacement, with probability proportional to weight, in one pass (A-Res)."""
+    heap = []  # (key, index, entry), the smallest key is replaced first
+    for i, entry in enumerate(entries):
+        if entry.weight <= 0:
+            continue
+        # log(u) / w orders like u ** (1 / w) without underflowing for small weights
+        key = math.log(1.0 - rng.random()) / entry.weight
+        if len(heap) < k:
+            heapq.heappush(heap, (key, i, entry))
+        elif key > heap[0][0]:
+            heapq.heapreplace(heap, (key, i, entry))
+    return [entry for _, _, entry in sorted(heap, reverse=True)]
+
+
+def _stratified(entries: Iterable[TopicEntry], k: int, rng: random.Random) -> List[TopicEntry]:
+    """
+    Sample of `k` entries with each category represented in proportion to its size, in one pass.
+    Every category keeps a reservoir of up to `k` entries, so memory is bounded by `k` times the number of categories.
+    """
+    reservoirs = {}
+    counts = {}
+    for entry in entries:
+        seen = counts.get(entry.category, 0)
+        reservoir = reservoirs.setdefault(entry.category, [])
+        if seen < k:
+            reservoir.append(entry)
+        else:
+            j = rng.randrange(seen + 1)
+            if j < k:
+                reservoir[j] = entry
+        counts[entry.category] = seen + 1
+
+    total = sum(counts.values())
+    if total <= k:
+        return [entry for reservoir in reservoirs.values() for entry in reservoir]
+    # largest remainder allocation of k between the categories
+    quotas = {category: k * count / total for category, count in counts.items()}
+    allocation = {category: int(quota) for category, quota in quotas.items()}
+    remaining = k - sum(allocation.values())
+    for category in sorted(quotas, key=lambda c: quotas[c] - allocation[c], reverse=True)[:remaining]:
+        allocation[category] += 1
+
+    sample = []
+    for category, reservoir in reservoirs.items():
+        # a uniform subset of a uniform sample is a uniform sample
+        sample.extend(rng.sample(reservoir, allocation[category]))
+    return sample
+
+
+class SampledTopics(TopicSource):
+    """
+    Fixed-size sample of another source, drawn in one streaming pass on first iteration and reused after.
+    Args:
+        source: Source to sample from.
+        n: Sample size, the whole source if it is smaller.
+        method: "uniform", "stratified" by category, or "weighted" by the entries' weights.
+        seed: Seed, the same seed and source give the same sample.
+    """
+
+    def __init__(
+        self,
+        source: TopicSource,
+        n: int,
+        method: Literal["uniform", "stratified", "weighted"] = "stratified",
+        seed: int = 0,
+    ):
+        self.source = source
+        self.n = n
+        self.method = method
+        self.seed = seed
+        self._sample: Optional[List[TopicEntry]] = None
+
+    def _draw(self) -> List[TopicEntry]:
+        rng = random.Random(self.seed)
+        if self.method == "uniform":
+            sample = _reservoir(self.source.entries(), self.n, rng)
+        elif self.method == "stratified":
+            sample = _stratified(self.source.entries(), self.n, rng)
+        elif self.method == "weighted":
+            sample = _weighted_reservoir(self.source.entries(), self.n, rng)
+        else:
+            raise ValueError(f"Unknown sampling method: {self.method}")
+        # mix the categories, so a partial run is representative too
+        rng.shuffle(sample)
+        return sample
+
+    def entries(self) -> Iterator[TopicEntry]:
+        if self._sample is None:
+            self._sample = self._draw()
+        return iter(self._sample)
+
+    def __len__(self) -> int:
+        if self._sample is None:
+            self._sample = self._draw()
+        return len(self._sample)
+
+
+def as_topic_source(topics: Union[TopicSource, Iterable[str]]) -> TopicSource:
+    """Wrap a list of topics in a `TopicList`, sources are returned as they are."""
+    if isinstance(topics, TopicSource):
+        return topics
+    return TopicList(topics)